@@ -1,12 +1,10 @@
 import logging
 from src.parser.ozon_parser import OzonSellerParser
 from src.parser.seller_products_parser import OzonProductParser
+from src.logging_core import setup_logging
 
 # Настройка логирования
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
+setup_logging()
 
 if __name__ == "__main__":
     URL = "https://www.ozon.ru/seller/trade-electronics-183434/?miniapp=seller_183434"
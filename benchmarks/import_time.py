@@ -0,0 +1,91 @@
+"""Профиль времени импорта при запуске приложения.
+
+Запускает `python -X importtime -c "import <модуль>"` в отдельном процессе,
+печатает общее время и самые тяжелые импорты по накопленному времени.
+С --check завершается с ошибкой, если при импорте GUI подгрузились тяжелые
+стеки (aiogram, Selenium, openpyxl), которые должны загружаться только при
+запуске бота или первой задаче.
+
+Запуск из корня проекта:
+    python -m benchmarks.import_time [--module gui.app] [--top 15] [--check]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Что сравнивается по умолчанию: окно приложения и полный стек бота
+DEFAULT_MODULES = ["gui.app", "src.bot.register_handlers"]
+# Пакеты, которых не должно быть в импорте GUI
+HEAVY_PACKAGES = ["aiogram", "selenium", "openpyxl", "src.parser", "src.bot.handlers"]
+
+
+def profile_imports(module):
+    """Список (модуль, собственное время, накопленное время) в микросекундах"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        try:
+            self_us, cumulative_us = int(parts[0]), int(parts[1])
+        except ValueError:
+            # Строка заголовка
+            continue
+        rows.append((parts[2].strip(), self_us, cumulative_us))
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()[-1:] or ["неизвестная ошибка"]
+        raise RuntimeError(f"Импорт {module} завершился ошибкой: {error[0]}")
+    return rows
+
+
+def heavy_imports(rows):
+    return sorted({
+        name for name, _, _ in rows
+        if any(name == package or name.startswith(package + ".") for package in HEAVY_PACKAGES)
+    })
+
+
+def report(module, rows, top):
+    total = sum(self_us for _, self_us, _ in rows)
+    print(f"\n{module}: {len(rows)} модулей, {total / 1000:.1f} мс")
+    for name, self_us, cumulative_us in sorted(rows, key=lambda row: row[2], reverse=True)[:top]:
+        print(f"  {cumulative_us / 1000:8.1f} мс  (свое {self_us / 1000:6.1f})  {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", action="append", dest="modules",
+                        help="модуль для профилирования (можно несколько раз)")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--check", action="store_true",
+                        help="ошибка, если gui.app тянет aiogram, Selenium, openpyxl или парсеры")
+    args = parser.parse_args()
+
+    failed = False
+    for module in args.modules or DEFAULT_MODULES:
+        try:
+            rows = profile_imports(module)
+        except RuntimeError as e:
+            print(f"\n{e}")
+            failed = failed or module == "gui.app"
+            continue
+        report(module, rows, args.top)
+        if module == "gui.app":
+            heavy = heavy_imports(rows)
+            if heavy:
+                print(f"  Тяжелые импорты при старте GUI: {', '.join(heavy[:10])}")
+                failed = failed or args.check
+
+    if args.check and failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Бенчмарк классификатора строк тултипа продавца.
+
+Сравнивает прежнюю логику (поиск по спискам и filter(str.isdigit) на каждую проверку)
+с общим классификатором src.parser.legal_info на корпусе записанных тултипов.
+
+Запуск из корня проекта:
+    python -m benchmarks.legal_info_bench [--repeat 2000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.parser.legal_info import classifier, identifier_kind  # noqa: E402
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "tooltips.txt")
+
+COMPANY_INDICATORS = ['ИП', 'ООО', 'АО', 'ЗАО', 'ПАО', 'Ltd', 'LLC', 'Inc', 'ОАО']
+WORKING_HOURS_INDICATORS = [
+    'режим работы', 'график работы', 'working hours', 'работаем',
+    'часы работы', 'время работы', 'schedule', 'график'
+]
+ADDRESS_INDICATORS = [
+    'г.', 'город', 'ул.', 'улица', 'пр.', 'проспект', 'д.', 'дом',
+    'обл.', 'область', 'кв.', 'квартира', 'офис', 'помещение',
+    'наб.', 'набережная', 'пер.', 'переулок', 'бул.', 'бульвар'
+]
+
+
+def load_corpus(path=CORPUS_PATH):
+    tooltips, current = [], []
+    with open(path, encoding="utf-8") as f:
+        for raw in f:
+            line = raw.strip()
+            if line.startswith("#"):
+                continue
+            if not line:
+                if current:
+                    tooltips.append(current)
+                current = []
+                continue
+            current.append(line)
+    if current:
+        tooltips.append(current)
+    return tooltips
+
+
+def legacy_classify_lines(lines):
+    """Прежняя логика SellerDetailsParser._parse_text_content"""
+    details = {}
+    for line in lines:
+        digits_only = ''.join(filter(str.isdigit, line))
+        if any(indicator in line for indicator in COMPANY_INDICATORS):
+            details['company_name'] = line
+        elif len(digits_only) in [10, 12, 13, 15] and len(digits_only) / len(line) > 0.8:
+            details['inn'] = line
+        elif any(indicator in line.lower() for indicator in WORKING_HOURS_INDICATORS):
+            details['working_hours'] = line
+        elif any(indicator in line.lower() for indicator in ADDRESS_INDICATORS):
+            details['address'] = line
+        else:
+            details.setdefault('other_info', []).append(line)
+    return details
+
+
+def run(name, func, corpus, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        results = [func(lines) for lines in corpus]
+    elapsed = time.perf_counter() - started
+    per_tooltip_us = elapsed / (repeat * len(corpus)) * 1e6
+
+    found = sum(1 for r in results if r.get('inn'))
+    invalid = sum(
+        1 for r in results
+        if r.get('inn') and not identifier_kind(''.join(filter(str.isdigit, r['inn'])))
+    )
+    print(f"{name:<12} {per_tooltip_us:8.2f} мкс/тултип  ИНН/ОГРН найдено: {found:3d}  "
+          f"с неверной контрольной суммой: {invalid}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    print(f"Корпус: {len(corpus)} тултипов, {sum(len(t) for t in corpus)} строк, повторов: {args.repeat}")
+    run("legacy", legacy_classify_lines, corpus, args.repeat)
+    run("legal_info", classifier.classify_lines, corpus, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,4 @@
 import tkinter as tk
-import queue
 from .config import ConfigManager
 from .bot import BotManager
 from .logs import LogManager
@@ -9,7 +8,6 @@ from .utils import Utils
 class TelegramBotApp(ConfigManager, BotManager, LogManager, TabManager, Utils):
     def __init__(self):
         self.root = tk.Tk()
-        self.log_queue = queue.Queue()
         self.setup_logging()
         self.setup_ui()
         self.load_existing_config()
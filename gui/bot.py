@@ -3,19 +3,31 @@ import threading
 import tkinter.messagebox as messagebox
 import os
 import tkinter as tk
-from aiogram import Bot, Dispatcher
-from src.bot.register_handlers import register_handlers
-from src.utils import load_config
+from src.config_service import get_config
 
 class BotManager:
     async def run_bot_async(self):
         try:
-            config = load_config(self.get_config_path())
-            token = config["TELEGRAM_BOT_TOKEN"]
+            # aiogram, Selenium и парсеры загружаются в потоке бота при первом запуске,
+            # чтобы окно приложения появлялось без ожидания их импорта
+            from aiogram import Bot, Dispatcher
+            from src.bot.register_handlers import register_handlers
+            from src.bot.log_bus import install_log_bus_handler
+            from src.parser.browser_pool import start_browser_pool
+            
+            config = get_config()
+            token = config.get("TELEGRAM_BOT_TOKEN")
             
             self.bot = Bot(token=token)
             self.dp = Dispatcher()
-            register_handlers(self.dp, self.bot)
+            register_handlers(self.dp, self.bot, config.values())
+            # Логи задач расходятся по чатам через шину логов
+            install_log_bus_handler()
+            
+            # Браузеры прогреваются в фоне и переиспользуются между задачами
+            start_browser_pool(config)
+            # Изменения config.txt доходят до работающих задач без перезапуска
+            config.start_watching()
             
             self.logger.info("Telegram бот инициализирован")
             await self.dp.start_polling(self.bot)
@@ -53,7 +65,7 @@ class BotManager:
             return
         
         try:
-            config = load_config(config_path)
+            config = get_config().values()
             if not config.get("TELEGRAM_BOT_TOKEN") or not config.get("TELEGRAM_CHAT_ID"):
                 messagebox.showerror("Ошибка", "Некорректная конфигурация!")
                 return
@@ -95,12 +107,21 @@ class BotManager:
             self._update_bot_stopped_status()
 
     async def _stop_bot_async(self):
+        from src.bot.job_scheduler import get_scheduler
+        from src.parser.browser_pool import stop_browser_pool
+        
         try:
             if self.bot:
                 await self.bot.session.close()
                 self.logger.info("Сессия бота закрыта")
         except Exception as e:
             self.logger.error(f"Ошибка при закрытии сессии бота: {e}")
+        # Запущенные парсеры прерываются и закрывают браузеры до остановки пула
+        scheduler = get_scheduler()
+        if scheduler.cancel_all("бот остановлен"):
+            await scheduler.drain(timeout=10)
+        await asyncio.to_thread(stop_browser_pool)
+        await asyncio.to_thread(get_config().stop_watching)
 
     def _update_bot_stopped_status(self):
         self.bot_status_var.set("🔴 Остановлен")
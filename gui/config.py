@@ -1,31 +1,27 @@
 import os
 import tkinter.messagebox as messagebox
 import tkinter as tk
-import sys
+
+from src.utils import get_app_dir, get_config_path
+from src.config_service import get_config
 
 class ConfigManager:
     def get_app_dir(self):
-        if getattr(sys, 'frozen', False):
-            return os.path.dirname(sys.executable)
-        return os.path.dirname(os.path.abspath(__file__))
+        return get_app_dir()
     
     def get_config_path(self):
-        return os.path.join(self.get_app_dir(), "config.txt")
+        # Тот же config.txt, что читают бот и парсеры
+        return get_config_path()
     
     def load_existing_config(self):
         config_path = self.get_config_path()
         if os.path.exists(config_path):
             try:
-                with open(config_path, "r", encoding="utf-8") as f:
-                    for line in f:
-                        if "=" in line:
-                            key, value = line.strip().split("=", 1)
-                            if key == "TELEGRAM_BOT_TOKEN" and value:
-                                self.token_entry.delete(0, tk.END)
-                                self.token_entry.insert(0, value)
-                            elif key == "TELEGRAM_CHAT_ID" and value:
-                                self.chat_id_entry.delete(0, tk.END)
-                                self.chat_id_entry.insert(0, value)
+                config = get_config().values()
+                for key, entry in (("TELEGRAM_BOT_TOKEN", self.token_entry), ("TELEGRAM_CHAT_ID", self.chat_id_entry)):
+                    if config.get(key):
+                        entry.delete(0, tk.END)
+                        entry.insert(0, config[key])
                 self.status_var.set("Конфигурация загружена")
                 self.update_config_info()
                 self.logger.info("Конфигурация успешно загружена")
@@ -43,10 +39,8 @@ class ConfigManager:
             return
         
         try:
-            config_path = self.get_config_path()
-            with open(config_path, "w", encoding="utf-8") as f:
-                f.write(f"TELEGRAM_BOT_TOKEN={token}\n")
-                f.write(f"TELEGRAM_CHAT_ID={chat_id}\n")
+            # Остальные настройки (парсер, лимиты) в файле сохраняются
+            get_config().update({"TELEGRAM_BOT_TOKEN": token, "TELEGRAM_CHAT_ID": chat_id})
             
             messagebox.showinfo("Успех", f"Настройки сохранены!")
             self.status_var.set("Конфигурация сохранена")
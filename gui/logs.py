@@ -1,61 +1,139 @@
 import logging
-from datetime import datetime
-import queue
+import time
+from collections import deque
 
 import tkinter as tk
 
+from src import logging_core
+
+# Сколько строк хранит и показывает окно логов
+MAX_LOG_LINES = 1000
+# Сколько записей вставляется за один тик отрисовки
+MAX_BATCH = 500
+# Период отрисовки и минимальный интервал автопрокрутки, мс
+RENDER_INTERVAL_MS = 150
+AUTOSCROLL_INTERVAL_MS = 300
+
+LEVEL_TAGS = {
+    logging.DEBUG: "DEBUG",
+    logging.INFO: "INFO",
+    logging.WARNING: "WARNING",
+    logging.ERROR: "ERROR",
+    logging.CRITICAL: "ERROR",
+}
+LEVEL_FILTERS = ["DEBUG", "INFO", "WARNING", "ERROR"]
+
+
 class LogHandler(logging.Handler):
-    def __init__(self, log_queue):
+    """Записи для окна логов в ограниченном буфере.
+
+    Работает в фоновом потоке логирования. При всплеске старые записи
+    вытесняются до отрисовки, счетчик пропусков показывается в окне.
+    """
+
+    def __init__(self, maxlen=MAX_LOG_LINES):
         super().__init__()
-        self.log_queue = log_queue
-    
+        self.pending = deque(maxlen=maxlen)
+        self.dropped = 0
+
     def emit(self, record):
-        log_entry = self.format(record)
-        self.log_queue.put(log_entry)
+        if len(self.pending) == self.pending.maxlen:
+            self.dropped += 1
+        self.pending.append((record.levelno, self.format(record)))
+
 
 class LogManager:
     def setup_logging(self):
         self.logger = logging.getLogger()
-        self.logger.setLevel(logging.INFO)
-        
-        for handler in self.logger.handlers[:]:
-            self.logger.removeHandler(handler)
-        
-        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-        
-        gui_handler = LogHandler(self.log_queue)
-        gui_handler.setFormatter(formatter)
-        self.logger.addHandler(gui_handler)
-        
+        # Последние записи всех уровней: смена фильтра перерисовывает окно из них
+        self.log_history = deque(maxlen=MAX_LOG_LINES)
+        self.log_level_filter = logging.INFO
+        self._rendered_lines = deque()
+        self._last_autoscroll = 0.0
+        self._scroll_pending = False
+
+        formatter = logging.Formatter(logging_core.LOG_FORMAT)
+
+        self.gui_log_handler = LogHandler()
+        self.gui_log_handler.setFormatter(formatter)
+        handlers = [self.gui_log_handler]
+
         try:
             file_handler = logging.FileHandler('bot.log', encoding='utf-8')
             file_handler.setFormatter(formatter)
-            self.logger.addHandler(file_handler)
+            handlers.append(file_handler)
         except:
             pass
-    
+
+        # Обработчики пишут в фоновом потоке, парсеры только кладут записи в очередь
+        logging_core.setup_logging(handlers)
+
     def update_logs(self):
+        """Тик отрисовки: одна вставка на пачку записей и не более одной прокрутки"""
         try:
-            while True:
-                try:
-                    log_entry = self.log_queue.get_nowait()
-                    tag = "INFO"
-                    if "WARNING" in log_entry: tag = "WARNING"
-                    elif "ERROR" in log_entry: tag = "ERROR"
-                    elif "DEBUG" in log_entry: tag = "DEBUG"
-                    
-                    self.log_text.insert(tk.END, log_entry + "\n", tag)
-                    self.log_text.see(tk.END)
-                    
-                    lines = int(self.log_text.index('end-1c').split('.')[0])
-                    if lines > 1000:
-                        self.log_text.delete(1.0, f"{lines-1000}.0")
-                except queue.Empty:
-                    break
-        except:
+            batch = self._take_pending()
+            if batch:
+                self.log_history.extend(batch)
+                self._render(batch)
+            elif self._scroll_pending:
+                self._autoscroll()
+        except Exception:
+            # Окно логов не должно останавливать цикл отрисовки
             pass
-        self.root.after(100, self.update_logs)
-    
+        self.root.after(RENDER_INTERVAL_MS, self.update_logs)
+
+    def _take_pending(self):
+        handler = self.gui_log_handler
+        batch = []
+        dropped, handler.dropped = handler.dropped, 0
+        if dropped:
+            batch.append((logging.WARNING, f"… пропущено строк при всплеске логов: {dropped}"))
+        while handler.pending and len(batch) < MAX_BATCH:
+            batch.append(handler.pending.popleft())
+        return batch
+
+    def _render(self, entries, autoscroll=True):
+        visible = [(text, level) for level, text in entries if level >= self.log_level_filter]
+        if not visible:
+            return
+        # Прокручиваем, только если пользователь не листает историю
+        follow = self._scroll_pending or self.log_text.yview()[1] >= 0.999
+
+        chunks = []
+        for text, level in visible:
+            chunks.extend((text + "\n", LEVEL_TAGS.get(level, "INFO")))
+            self._rendered_lines.append(text.count("\n") + 1)
+        self.log_text.insert(tk.END, *chunks)
+
+        # Лишние строки удаляются одним вызовом по собственному счетчику
+        excess = 0
+        while len(self._rendered_lines) > MAX_LOG_LINES:
+            excess += self._rendered_lines.popleft()
+        if excess:
+            self.log_text.delete("1.0", f"{excess + 1}.0")
+
+        if autoscroll and follow:
+            self._scroll_pending = True
+            self._autoscroll()
+
+    def _autoscroll(self):
+        # Прокрутка не чаще AUTOSCROLL_INTERVAL_MS, отложенная выполнится на следующем тике
+        now = time.monotonic() * 1000
+        if now - self._last_autoscroll >= AUTOSCROLL_INTERVAL_MS:
+            self.log_text.see(tk.END)
+            self._last_autoscroll = now
+            self._scroll_pending = False
+
+    def set_log_level_filter(self, level_name):
+        """Фильтр уровня для окна логов; окно перерисовывается из истории"""
+        self.log_level_filter = logging.getLevelName(level_name)
+        self.log_text.delete(1.0, tk.END)
+        self._rendered_lines.clear()
+        self._render(list(self.log_history), autoscroll=False)
+        self.log_text.see(tk.END)
+
     def clear_logs(self):
         self.log_text.delete(1.0, tk.END)
-        self.logger.info("Логи очищены")
\ No newline at end of file
+        self.log_history.clear()
+        self._rendered_lines.clear()
+        self.logger.info("Логи очищены")
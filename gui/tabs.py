@@ -3,6 +3,9 @@ import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox
 import webbrowser
 
+from .logs import LEVEL_FILTERS
+from src.config_service import get_config
+
 class TabManager:
     def setup_ui(self):
         self.root.title("Telegram Bot Manager")
@@ -102,6 +105,15 @@ class TabManager:
         ttk.Button(log_buttons_frame, text="🔄 Обновить", 
                   command=self.refresh_logs).pack(side=tk.LEFT)
         
+        # Фильтр применяется до отрисовки, скрытые записи не попадают в окно
+        self.log_level_var = tk.StringVar(value="INFO")
+        level_box = ttk.Combobox(log_buttons_frame, textvariable=self.log_level_var,
+                                 values=LEVEL_FILTERS, state="readonly", width=10)
+        level_box.pack(side=tk.RIGHT)
+        level_box.bind("<<ComboboxSelected>>",
+                       lambda event: self.set_log_level_filter(self.log_level_var.get()))
+        ttk.Label(log_buttons_frame, text="Уровень:").pack(side=tk.RIGHT, padx=(0, 5))
+        
         self.log_text = scrolledtext.ScrolledText(logs_frame, wrap=tk.WORD, 
                                                  font=('Consolas', 10), 
                                                  bg='#1e1e1e', fg='#ffffff',
@@ -342,15 +354,7 @@ class TabManager:
                 messagebox.showerror("Ошибка", f"Некорректные значения настроек: {e}")
                 return
             
-            # Читаем существующий конфиг
-            config_lines = []
-            config_file = "config.txt"
-            
-            if os.path.exists(config_file):
-                with open(config_file, "r", encoding="utf-8") as f:
-                    config_lines = f.readlines()
-            
-            # Обновляем или добавляем настройки парсера
+            # Обновляем только настройки парсера, остальные строки файла сохраняются
             parser_settings = {
                 "MAX_SELLERS": str(max_sellers),
                 # "WORKERS_COUNT": str(workers),
@@ -359,34 +363,8 @@ class TabManager:
                 "LOAD_TIMEOUT": str(load_timeout),
                 # "HEADLESS": "False" if self.headless_var.get() else "True"
             }
-            
-            # Обновляем существующие настройки или добавляем новые
-            updated_lines = []
-            updated_keys = set()
-            
-            for line in config_lines:
-                line = line.strip()
-                if '=' in line and not line.startswith('#'):
-                    key = line.split('=')[0].strip()
-                    if key in parser_settings:
-                        updated_lines.append(f"{key}={parser_settings[key]}\n")
-                        updated_keys.add(key)
-                    else:
-                        updated_lines.append(line + "\n")
-                else:
-                    updated_lines.append(line + "\n")
-            
-            # Добавляем новые настройки, которых не было в файле
-            if not updated_keys:  # Если секции парсера не было
-                updated_lines.append("\n# Настройки парсера категорий\n")
-            
-            for key, value in parser_settings.items():
-                if key not in updated_keys:
-                    updated_lines.append(f"{key}={value}\n")
-            
-            # Сохраняем конфиг
-            with open(config_file, "w", encoding="utf-8") as f:
-                f.writelines(updated_lines)
+            # Паузы и таймауты подхватываются уже идущим парсингом
+            get_config().update(parser_settings)
             
             messagebox.showinfo("Успех", "Настройки парсера сохранены!")
             self.status_var.set("Настройки парсера сохранены")
@@ -401,30 +379,18 @@ class TabManager:
     def load_parser_settings(self):
         """Загрузка настроек парсера из конфигурационного файла"""
         try:
-            config_file = "config.txt"
-            if not os.path.exists(config_file):
-                return
-            
-            with open(config_file, "r", encoding="utf-8") as f:
-                for line in f:
-                    line = line.strip()
-                    if '=' in line and not line.startswith('#'):
-                        key, value = line.split('=', 1)
-                        key = key.strip()
-                        value = value.strip()
-                        
-                        if key == "MAX_SELLERS":
-                            self.max_sellers_var.set(value)
-                        # elif key == "WORKERS_COUNT":
-                        #     self.workers_var.set(value)
-                        # elif key == "MAX_IDLE_SCROLLS":
-                        #     self.max_idle_scrolls_var.set(value)
-                        elif key == "SCROLL_DELAY":
-                            self.scroll_delay_var.set(value)
-                        elif key == "LOAD_TIMEOUT":
-                            self.load_timeout_var.set(value)
-                        # elif key == "HEADLESS":
-                        #     self.headless_var.set(value.lower() == "false")
+            config = get_config()
+            fields = {
+                "MAX_SELLERS": self.max_sellers_var,
+                # "MAX_PARSE_WORKERS": self.workers_var,
+                "SCROLL_DELAY": self.scroll_delay_var,
+                "LOAD_TIMEOUT": self.load_timeout_var,
+            }
+            # Незаданные в файле поля сохраняют значения формы
+            present = config.values()
+            for key, var in fields.items():
+                if present.get(key, "").strip():
+                    var.set(str(config.typed(key)))
             
             if hasattr(self, 'logger'):
                 self.logger.info("Настройки парсера загружены из config.txt")
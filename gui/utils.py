@@ -2,6 +2,8 @@ import tkinter.messagebox as messagebox
 import os
 import tkinter as tk
 
+from src.config_service import get_config
+
 class Utils:
     def toggle_token_visibility(self):
         if self.show_token_var.get():
@@ -36,18 +38,17 @@ class Utils:
         config_path = self.get_config_path()
         if os.path.exists(config_path):
             try:
-                with open(config_path, "r", encoding="utf-8") as f:
-                    lines = f.readlines()
-                    token_set = any(line.startswith("TELEGRAM_BOT_TOKEN=") and len(line.strip()) > len("TELEGRAM_BOT_TOKEN=") for line in lines)
-                    chat_id_set = any(line.startswith("TELEGRAM_CHAT_ID=") and len(line.strip()) > len("TELEGRAM_CHAT_ID=") for line in lines)
-                    
-                    if token_set and chat_id_set:
-                        self.config_info_var.set("✅ Конфигурация настроена")
-                    else:
-                        missing = []
-                        if not token_set: missing.append("токен")
-                        if not chat_id_set: missing.append("chat_id")
-                        self.config_info_var.set(f"⚠️ Отсутствует: {', '.join(missing)}")
+                config = get_config().values()
+                token_set = bool(config.get("TELEGRAM_BOT_TOKEN", "").strip())
+                chat_id_set = bool(config.get("TELEGRAM_CHAT_ID", "").strip())
+                
+                if token_set and chat_id_set:
+                    self.config_info_var.set("✅ Конфигурация настроена")
+                else:
+                    missing = []
+                    if not token_set: missing.append("токен")
+                    if not chat_id_set: missing.append("chat_id")
+                    self.config_info_var.set(f"⚠️ Отсутствует: {', '.join(missing)}")
             except:
                 self.config_info_var.set("❌ Ошибка чтения")
         else:
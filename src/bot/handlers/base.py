@@ -3,6 +3,7 @@ from aiogram import types
 from aiogram.fsm.context import FSMContext
 from src.bot.keyboards import main_keyboard, cancel_keyboard
 from src.bot.states import ParserStates
+from src.bot.job_scheduler import get_scheduler
 
 logger = logging.getLogger('bot.base_handlers')
 
@@ -14,6 +15,17 @@ async def start_command(message: types.Message, state: FSMContext):
         reply_markup=main_keyboard()
     )
 
+async def cancel_command(message: types.Message, state: FSMContext):
+    """Отмена ввода и задач парсинга чата, включая уже запущенные"""
+    await state.clear()
+    cancelled = get_scheduler().cancel_chat(message.chat.id)
+    if cancelled:
+        logger.info(f"Чат {message.chat.id} отменил задач: {cancelled}")
+        text = "❌ Парсинг отменяется, браузеры закрываются"
+    else:
+        text = "❌ Действие отменено"
+    await message.answer(text, reply_markup=main_keyboard())
+
 async def parse_seller_products(message: types.Message, state: FSMContext):
     await state.set_state(ParserStates.waiting_seller_url)
     await message.answer(
@@ -1,9 +1,11 @@
 import asyncio
-from src.parser.category_inn_parser.main import CategoryParser
 from aiogram import Bot
 from aiogram.types import Message, FSInputFile
 from aiogram.fsm.context import FSMContext
 from src.bot.keyboards import main_keyboard
+from src.bot.job_scheduler import get_scheduler, QuotaExceededError, PRIORITY_LOW
+from src.parser.cancellation import JobCancelled
+from src.bot.result_streamer import ResultStreamer
 import logging
 import os
 
@@ -46,16 +48,41 @@ async def handle_category_url(message: Message, state: FSMContext, bot: Bot):
 
     # Создаем задачу для отправки "typing" уведомлений
     typing_task = asyncio.create_task(send_typing_action(bot, message.chat.id))
+    streamer = None
 
     try:
-        # Асинхронный парсинг
+        # Парсеры и Selenium загружаются при первой задаче, а не при старте бота
+        from src.parser.category_inn_parser.main import CategoryParser
+        
         parser = CategoryParser()
-        sellers_data = await asyncio.get_event_loop().run_in_executor(
-            None, parser.parse_category, category_url
+        # Продавцы по мере готовности: сводка и промежуточные файлы
+        streamer = ResultStreamer(
+            bot, message.chat.id, "Продавцы категории",
+            total=parser.link_collector.max_sellers,
+            export=lambda items: parser.export_partial(items, category_url),
+            format_item=lambda item: f"{item[1].get('seller_name', item[0])} — ИНН: {item[1].get('inn', 'Не найдено')}",
+            is_found=lambda item: item[1].get('inn') not in (None, 'Не найдено', 'Ошибка парсинга'),
+        ).start()
+
+        async def report_position(position):
+            await bot.send_message(message.chat.id, f"🕒 Задача в очереди, позиция: {position}")
+        
+        # Парсинг через общую очередь: сборщик ссылок плюс воркеры парсинга продавцов
+        sellers_data = await get_scheduler().run(
+            message.chat.id,
+            'category',
+            parser.parse_category,
+            category_url,
+            key=category_url,
+            on_result=lambda name, data: streamer.on_result((name, data)),
+            priority=PRIORITY_LOW,
+            cost=1 + parser.link_collector.max_workers,
+            on_position=report_position,
         )
 
         # Отменяем задачу "typing"
         typing_task.cancel()
+        await streamer.finish()
 
         # Проверяем результат
         if not sellers_data or '_files' not in sellers_data:
@@ -100,6 +127,14 @@ async def handle_category_url(message: Message, state: FSMContext, bot: Bot):
             reply_markup=main_keyboard()
         )
 
+    except QuotaExceededError as e:
+        typing_task.cancel()
+        await message.reply(f"⏳ {str(e)}", reply_markup=main_keyboard())
+    except JobCancelled:
+        typing_task.cancel()
+        if streamer:
+            await streamer.finish(export=True)
+        await message.reply("❌ Парсинг категории отменен", reply_markup=main_keyboard())
     except FileNotFoundError as e:
         # Обработка отсутствия файлов
         typing_task.cancel()
@@ -116,4 +151,8 @@ async def handle_category_url(message: Message, state: FSMContext, bot: Bot):
         await message.reply(
             f"❌ Произошла ошибка: {str(e)}",
             reply_markup=main_keyboard()
-        )
\ No newline at end of file
+        )
+    finally:
+        typing_task.cancel()
+        if streamer:
+            await streamer.finish()
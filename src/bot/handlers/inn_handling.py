@@ -6,21 +6,44 @@ from aiogram import types
 from aiogram.fsm.context import FSMContext
 from src.bot.keyboards import main_keyboard
 from src.bot.telegram_logger import TelegramLogsHandler
-from src.parse_inn import run_inn_parser_from_list
-from src.parse_products_inn import run_product_inn_parser_from_list
+from src.bot.job_scheduler import get_scheduler, QuotaExceededError
+from src.parser.cancellation import JobCancelled
+from src.bot.result_streamer import ResultStreamer
 
 logger = logging.getLogger('bot.inn_handlers')
 
+
+def _inn_found(result):
+    return result.get('inn') not in (None, 'Не найдено', 'Ошибка', 'Таймаут')
+
+
+def _format_seller(result):
+    return f"{result.get('seller_name', 'Не найдено')} — ИНН: {result.get('inn', 'Не найдено')}"
+
+
+def _format_product(result):
+    return (f"{result.get('seller_name', 'Не найдено')} ({result.get('company_name', 'Не найдено')}) "
+            f"— ИНН: {result.get('inn', 'Не найдено')}")
+
+
 async def handle_inn_urls(message: types.Message, state: FSMContext, bot, mode='sellers'):
-    if message.text == "❌ Отмена":
-        await state.clear()
-        await message.answer("❌ Действие отменено", reply_markup=main_keyboard())
-        return
+    # Парсеры, Selenium и openpyxl загружаются при первой задаче, а не при старте бота
+    from src.parse_inn import run_inn_parser_from_list, export_partial_results as export_sellers
+    from src.parse_products_inn import run_product_inn_parser_from_list, export_partial_results as export_products
     
     urls = [url.strip() for url in message.text.split('\n') if url.strip()]
     
     # Инициализируем систему логов
     telegram_logger = TelegramLogsHandler(bot, message.chat.id)
+    # Результаты по мере готовности: сводка и промежуточные файлы
+    streamer = ResultStreamer(
+        bot, message.chat.id,
+        "Продавцы" if mode == 'sellers' else "Товары",
+        total=len(urls),
+        export=export_sellers if mode == 'sellers' else export_products,
+        format_item=_format_seller if mode == 'sellers' else _format_product,
+        is_found=_inn_found,
+    ).start()
     
     try:
         # Отправляем начальное сообщение
@@ -29,39 +52,35 @@ async def handle_inn_urls(message: types.Message, state: FSMContext, bot, mode='
         else:
             await telegram_logger.add_log(f"📦 Начинаем парсинг ИНН для {len(urls)} товаров")
         
-        # Для парсинга товаров: будем отправлять результаты по каждому товару
-        results = []
+        async def report_position(position):
+            await telegram_logger.add_log(f"🕒 Задача в очереди, позиция: {position}")
         
+        scheduler = get_scheduler()
         if mode == 'sellers':
-            result_message, _, filepath = await asyncio.to_thread(
+            result_message, _, filepath = await scheduler.run(
+                message.chat.id,
+                'inn_sellers',
                 run_inn_parser_from_list, 
-                urls
+                urls,
+                key='\n'.join(urls),
+                on_result=streamer.on_result,
+                on_position=report_position,
+                log_channel=telegram_logger.channel_name,
             )
         else:  # mode == 'products'
-            # Запускаем парсинг и собираем результаты
-            result_message, _, filepath, results = await asyncio.to_thread(
+            result_message, _, filepath, _ = await scheduler.run(
+                message.chat.id,
+                'inn_products',
                 run_product_inn_parser_from_list, 
-                urls
+                urls,
+                key='\n'.join(urls),
+                on_result=streamer.on_result,
+                on_position=report_position,
+                log_channel=telegram_logger.channel_name,
             )
-            
-            # Отправляем результаты по каждому товару
-            for i, result in enumerate(results, 1):
-                seller_name = result.get('seller_name', 'Не найдено')
-                company_name = result.get('company_name', 'Не найдено')
-                inn = result.get('inn', 'Не найдено')
-                product_url = result.get('product_url', '')
-                
-                # Формируем сообщение
-                result_msg = (
-                    f"✅ Товар {i} обработан:\n"
-                    f"Продавец: {seller_name}\n"
-                    f"Компания: {company_name}\n"
-                    f"ИНН: {inn}\n"
-                    f"Ссылка: {product_url}"
-                )
-                
-                # Отправляем через логгер (будет очищено от HTML)
-                await telegram_logger.send_result_message(result_msg)
+        
+        # Итоговая сводка; полный файл отправляется ниже
+        await streamer.finish()
         
         # Даем время на обработку оставшихся логов
         await asyncio.sleep(1)
@@ -94,11 +113,19 @@ async def handle_inn_urls(message: types.Message, state: FSMContext, bot, mode='
         # Показываем меню после завершения
         await message.answer("Выберите следующее действие:", reply_markup=main_keyboard())
             
+    except QuotaExceededError as e:
+        await telegram_logger.final_message(f"⏳ {str(e)}")
+        await message.answer("Выберите следующее действие:", reply_markup=main_keyboard())
+    except JobCancelled:
+        # Меню уже показал обработчик отмены, пользователю остается собранное до отмены
+        await streamer.finish(export=True)
+        await telegram_logger.final_message("❌ Парсинг отменен")
     except Exception as e:
         logger.error(f"Критическая ошибка: {str(e)}")
         await telegram_logger.add_log(f"💥 Критическая ошибка: {str(e)}")
         await telegram_logger.final_message(f"💥 Произошла критическая ошибка: {str(e)}")
         await message.answer("❌ Произошла ошибка при обработке", reply_markup=main_keyboard())
     finally:
+        await streamer.finish()
         await telegram_logger.stop()
         await state.clear()
\ No newline at end of file
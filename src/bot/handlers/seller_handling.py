@@ -3,17 +3,16 @@ import asyncio
 import os
 from aiogram import types
 from aiogram.fsm.context import FSMContext
-from src.parse_seller_and_products import parse_seller_and_products
 from src.bot.keyboards import main_keyboard
 from src.bot.telegram_logger import TelegramLogsHandler
+from src.bot.job_scheduler import get_scheduler, QuotaExceededError, PRIORITY_HIGH
+from src.parser.cancellation import JobCancelled
 
 logger = logging.getLogger('bot.seller_handlers')
 
 async def handle_seller_url(message: types.Message, state: FSMContext, bot):
-    if message.text == "❌ Отмена":
-        await state.clear()
-        await message.answer("❌ Действие отменено", reply_markup=main_keyboard())
-        return
+    # Парсеры и Selenium загружаются при первой задаче, а не при старте бота
+    from src.parse_seller_and_products import parse_seller_and_products
     
     url = message.text
     if not url.startswith('https://www.ozon.ru/seller/'):
@@ -26,11 +25,20 @@ async def handle_seller_url(message: types.Message, state: FSMContext, bot):
     try:
         await telegram_logger.add_log(f"⏳ Начинаем парсинг продавца: {url}")
         
-        # Запускаем парсинг без callback
-        result = await asyncio.to_thread(
-            parse_seller_and_products, 
-            url, 
+        async def report_position(position):
+            await telegram_logger.add_log(f"🕒 Задача в очереди, позиция: {position}")
+        
+        # Запускаем парсинг через общую очередь задач
+        result = await get_scheduler().run(
+            message.chat.id,
+            'seller',
+            parse_seller_and_products,
+            url,
             True,
+            key=url,
+            priority=PRIORITY_HIGH,
+            on_position=report_position,
+            log_channel=telegram_logger.channel_name,
         )
         
         # Отправляем информацию о продавце после получения результата
@@ -69,6 +77,12 @@ async def handle_seller_url(message: types.Message, state: FSMContext, bot):
         # Показываем меню после завершения
         await message.answer("Выберите следующее действие:", reply_markup=main_keyboard())
             
+    except QuotaExceededError as e:
+        await telegram_logger.final_message(f"⏳ {str(e)}")
+        await message.answer("Выберите следующее действие:", reply_markup=main_keyboard())
+    except JobCancelled:
+        # Меню уже показал обработчик отмены
+        await telegram_logger.final_message("❌ Парсинг отменен")
     except Exception as e:
         logger.error(f"Критическая ошибка: {str(e)}")
         await telegram_logger.add_log(f"💥 Критическая ошибка: {str(e)}")
@@ -0,0 +1,307 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+
+from src.config_service import get_config
+from src.parser.timing import timing_report
+from src.parser.cancellation import CancellationToken, JobCancelled, use_token
+from src.bot.log_bus import use_channels
+
+logger = logging.getLogger('bot.job_scheduler')
+
+# Чем меньше значение, тем раньше задача покидает очередь
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 10
+PRIORITY_LOW = 20
+
+
+class QuotaExceededError(Exception):
+    """Превышен лимит одновременных задач для чата"""
+
+
+def _consume_exception(future):
+    # Ожидающий мог быть отменен, пока задача работала под shield: ошибку никто не заберет
+    if not future.cancelled():
+        future.exception()
+
+
+class Job:
+    """Задача парсинга в очереди планировщика"""
+
+    def __init__(self, job_id, chat_id, kind, key, func, args, priority, cost):
+        self.job_id = job_id
+        self.chat_id = chat_id
+        self.kind = kind
+        self.key = key
+        self.func = func
+        self.args = args
+        self.priority = priority
+        self.cost = cost
+        self.status = 'queued'
+        self.created_at = time.monotonic()
+        self.future = asyncio.get_running_loop().create_future()
+        self.future.add_done_callback(_consume_exception)
+        self.position_callbacks = []
+        self.last_position = None
+        self.task = None
+        # Чаты, ожидающие результат; задача отменяется, когда от нее отказались все
+        self.chats = {chat_id}
+        self.token = CancellationToken()
+        # Каналы шины логов; присоединившиеся к задаче добавляют свои
+        self.log_channels = []
+        # Получатели промежуточных результатов всех объединенных запросов
+        self.result_callbacks = []
+
+    def publish_result(self, *result):
+        """on_result для парсера: результат уходит каждому присоединившемуся чату"""
+        for callback in list(self.result_callbacks):
+            try:
+                callback(*result)
+            except Exception as e:
+                logger.warning(f"Ошибка передачи промежуточного результата задачи #{self.job_id}: {str(e)}")
+
+    def __lt__(self, other):
+        return self.job_id < other.job_id
+
+
+class JobScheduler:
+    """Очередь задач бота с общим бюджетом браузеров.
+
+    Задача стартует, только когда ее стоимость (число браузеров) помещается
+    в свободный бюджет. Очередь упорядочена по приоритету и времени постановки,
+    одинаковые задачи в работе объединяются, число задач на чат ограничено.
+    """
+
+    def __init__(self, browser_budget=3, per_chat_limit=2):
+        self.browser_budget = max(1, browser_budget)
+        self.per_chat_limit = max(1, per_chat_limit)
+        self._queue = []
+        self._ids = itertools.count(1)
+        self._running = {}
+        self._in_flight = {}
+        self._used = 0
+        self._loop = None
+
+    async def run(self, chat_id, kind, func, *args, key=None, priority=PRIORITY_NORMAL,
+                  cost=1, on_position=None, log_channel=None, on_result=None):
+        """Постановка задачи в очередь и ожидание ее результата.
+
+        on_position — корутинная функция, получающая номер в очереди при его изменении.
+        log_channel — канал шины логов, в который пойдут логи задачи.
+        on_result — получатель промежуточных результатов; func получает его как
+        аргумент on_result, общий для всех присоединившихся запросов.
+        """
+        job = self.submit(chat_id, kind, func, *args, key=key, priority=priority,
+                          cost=cost, on_position=on_position, log_channel=log_channel,
+                          on_result=on_result)
+        # Результат общий для объединенных запросов, отмена одного не отменяет задачу
+        return await asyncio.shield(job.future)
+
+    def submit(self, chat_id, kind, func, *args, key=None, priority=PRIORITY_NORMAL,
+               cost=1, on_position=None, log_channel=None, on_result=None):
+        self._loop = asyncio.get_running_loop()
+        dedupe_key = (kind, key) if key is not None else None
+        if dedupe_key in self._in_flight:
+            job = self._in_flight[dedupe_key]
+            job.chats.add(chat_id)
+            if log_channel:
+                job.log_channels.append(log_channel)
+            if on_result:
+                # Результаты, готовые до присоединения, придут только в итоговом файле
+                job.result_callbacks.append(on_result)
+            if on_position:
+                job.position_callbacks.append(on_position)
+                if job.status == 'queued':
+                    position = self._position(job)
+                    asyncio.create_task(on_position(position))
+            logger.info(f"Запрос {kind} уже выполняется, присоединяемся к задаче #{job.job_id}")
+            return job
+
+        if self._chat_load(chat_id) >= self.per_chat_limit:
+            raise QuotaExceededError(
+                f"Для чата уже выполняется {self.per_chat_limit} задач(и), дождитесь их завершения"
+            )
+
+        cost = max(1, min(cost, self.browser_budget))
+        job = Job(next(self._ids), chat_id, kind, key, func, args, priority, cost)
+        if on_position:
+            job.position_callbacks.append(on_position)
+        if log_channel:
+            job.log_channels.append(log_channel)
+        if on_result:
+            job.result_callbacks.append(on_result)
+        if dedupe_key is not None:
+            self._in_flight[dedupe_key] = job
+
+        heapq.heappush(self._queue, (priority, job.job_id, job))
+        logger.info(f"Задача #{job.job_id} ({kind}) поставлена в очередь, браузеров: {cost}")
+        self._dispatch()
+        self._notify_positions()
+        return job
+
+    def configure(self, browser_budget, per_chat_limit):
+        """Новые лимиты без перезапуска, можно вызывать из любого потока.
+
+        Увеличенный бюджет сразу запускает ожидающие задачи, уменьшенный
+        применяется по мере завершения работающих.
+        """
+        self.browser_budget = max(1, browser_budget)
+        self.per_chat_limit = max(1, per_chat_limit)
+        logger.info(f"Планировщик задач: бюджет браузеров {self.browser_budget}, задач на чат {self.per_chat_limit}")
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._dispatch)
+
+    def cancel_chat(self, chat_id, reason="отменено пользователем"):
+        """Отмена задач чата. Возвращает число отмененных задач.
+
+        Задача из очереди снимается сразу. Запущенная получает сигнал через
+        токен отмены: парсер прерывается на ближайшей проверке, закрывает
+        браузеры и освобождает бюджет.
+        """
+        cancelled = 0
+        for job in [job for _, _, job in self._queue] + list(self._running.values()):
+            if chat_id not in job.chats:
+                continue
+            job.chats.discard(chat_id)
+            if job.chats:
+                logger.info(f"Задача #{job.job_id} нужна другим чатам и продолжает работу")
+                continue
+            self._cancel_job(job, reason)
+            cancelled += 1
+        if cancelled:
+            self._dispatch()
+            self._notify_positions()
+        return cancelled
+
+    def cancel_all(self, reason="бот остановлен"):
+        """Отмена всех задач, например при остановке бота"""
+        jobs = [job for _, _, job in self._queue] + list(self._running.values())
+        for job in jobs:
+            job.chats.clear()
+            self._cancel_job(job, reason)
+        self._dispatch()
+        return len(jobs)
+
+    async def drain(self, timeout=10):
+        """Ожидание завершения запущенных задач. True, если все успели завершиться"""
+        tasks = [job.task for job in self._running.values() if job.task]
+        if not tasks:
+            return True
+        done, pending = await asyncio.wait(tasks, timeout=timeout)
+        if pending:
+            logger.warning(f"Не завершились за {timeout}с задач: {len(pending)}")
+        return not pending
+
+    def _cancel_job(self, job, reason):
+        job.token.cancel(reason)
+        # Новый такой же запрос не должен присоединяться к отменяемой задаче
+        self._forget(job)
+        if job.status == 'queued':
+            self._queue = [entry for entry in self._queue if entry[2] is not job]
+            heapq.heapify(self._queue)
+            job.status = 'cancelled'
+            if not job.future.done():
+                job.future.set_exception(JobCancelled(f"Задача отменена: {reason}"))
+            logger.info(f"Задача #{job.job_id} ({job.kind}) снята с очереди: {reason}")
+        else:
+            logger.info(f"Задача #{job.job_id} ({job.kind}) отменяется: {reason}")
+
+    def _forget(self, job):
+        if self._in_flight.get((job.kind, job.key)) is job:
+            del self._in_flight[(job.kind, job.key)]
+
+    def stats(self):
+        return {
+            'queued': len(self._queue),
+            'running': len(self._running),
+            'browsers_used': self._used,
+            'browser_budget': self.browser_budget,
+        }
+
+    def _chat_load(self, chat_id):
+        queued = sum(1 for _, _, job in self._queue if job.chat_id == chat_id)
+        running = sum(1 for job in self._running.values() if job.chat_id == chat_id)
+        return queued + running
+
+    def _position(self, job):
+        ordered = sorted(self._queue)
+        for position, (_, _, queued_job) in enumerate(ordered, 1):
+            if queued_job is job:
+                return position
+        return 0
+
+    def _dispatch(self):
+        # Строгий порядок очереди: крупная задача не голодает из-за мелких
+        while self._queue:
+            _, _, job = self._queue[0]
+            if self._used + job.cost > self.browser_budget:
+                break
+            heapq.heappop(self._queue)
+            self._used += job.cost
+            job.status = 'running'
+            self._running[job.job_id] = job
+            job.task = asyncio.create_task(self._execute(job))
+        self._update_gauges()
+
+    async def _execute(self, job):
+        timing_report.record('job_queue_wait', time.monotonic() - job.created_at)
+        logger.info(f"Задача #{job.job_id} ({job.kind}) запущена")
+        try:
+            # to_thread копирует контекст, поэтому токен виден парсеру в его потоке
+            with use_token(job.token), use_channels(job.log_channels), \
+                    timing_report.measure(f'job_{job.kind}'):
+                kwargs = {'on_result': job.publish_result} if job.result_callbacks else {}
+                result = await asyncio.to_thread(job.func, *job.args, **kwargs)
+            job.future.set_result(result)
+        except JobCancelled as e:
+            logger.info(f"Задача #{job.job_id} ({job.kind}) отменена")
+            job.future.set_exception(e)
+        except Exception as e:
+            logger.error(f"Задача #{job.job_id} ({job.kind}) завершилась с ошибкой: {str(e)}")
+            job.future.set_exception(e)
+        finally:
+            job.status = 'done'
+            self._used -= job.cost
+            self._running.pop(job.job_id, None)
+            self._forget(job)
+            self._dispatch()
+            self._notify_positions()
+
+    def _notify_positions(self):
+        for position, (_, _, job) in enumerate(sorted(self._queue), 1):
+            if job.last_position == position:
+                continue
+            job.last_position = position
+            for callback in job.position_callbacks:
+                asyncio.create_task(self._safe_callback(callback, position))
+
+    async def _safe_callback(self, callback, position):
+        try:
+            await callback(position)
+        except Exception as e:
+            logger.debug(f"Ошибка уведомления о позиции в очереди: {str(e)}")
+
+    def _update_gauges(self):
+        timing_report.set_gauge('jobs_queued', len(self._queue))
+        timing_report.set_gauge('jobs_running', len(self._running))
+        timing_report.set_gauge('browser_budget_used', f"{self._used}/{self.browser_budget}")
+
+
+_scheduler = None
+
+
+def get_scheduler():
+    """Общий планировщик, BROWSER_BUDGET и JOB_QUOTA_PER_CHAT из config.txt применяются на лету"""
+    global _scheduler
+    if _scheduler is None:
+        config = get_config()
+        _scheduler = JobScheduler(config.typed("BROWSER_BUDGET"), config.typed("JOB_QUOTA_PER_CHAT"))
+        logger.info(f"Планировщик задач: бюджет браузеров {_scheduler.browser_budget}, "
+                    f"задач на чат {_scheduler.per_chat_limit}")
+        config.subscribe(
+            lambda _changed: _scheduler.configure(config.typed("BROWSER_BUDGET"), config.typed("JOB_QUOTA_PER_CHAT")),
+            ("BROWSER_BUDGET", "JOB_QUOTA_PER_CHAT"),
+        )
+    return _scheduler
@@ -0,0 +1,188 @@
+import asyncio
+import contextvars
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from src.logging_core import add_log_handler, register_context_field
+
+# Сколько последних записей хранит канал; отставший подписчик получает отметку о пропуске
+CHANNEL_BUFFER_SIZE = 200
+
+
+class LogEntry:
+    __slots__ = ('seq', 'level', 'message', 'timestamp')
+
+    def __init__(self, seq, level, message):
+        self.seq = seq
+        self.level = level
+        self.message = message
+        self.timestamp = time.time()
+
+
+class Subscription:
+    """Подписка на канал: get() спит до появления новых записей"""
+
+    def __init__(self, channel, loop):
+        self.channel = channel
+        self.loop = loop
+        self.cursor = channel.last_seq
+        self.closed = False
+        self._event = asyncio.Event()
+
+    def notify(self):
+        # Публикация может прийти из потока парсера
+        try:
+            self.loop.call_soon_threadsafe(self._event.set)
+        except RuntimeError:
+            pass
+
+    async def get(self):
+        """Новые записи с прошлого вызова; пустой список после close()"""
+        while not self.closed:
+            entries, skipped = self.channel.read_since(self.cursor)
+            if entries:
+                self.cursor = entries[-1].seq
+                if skipped:
+                    entries.insert(0, LogEntry(self.cursor, logging.WARNING, f"… пропущено записей: {skipped}"))
+                return entries
+            self._event.clear()
+            # Повторная проверка после сброса, чтобы не потерять публикацию между ними
+            if self.channel.last_seq != self.cursor:
+                continue
+            await self._event.wait()
+        return []
+
+    def close(self):
+        self.closed = True
+        self.channel.unsubscribe(self)
+        try:
+            self.loop.call_soon_threadsafe(self._event.set)
+        except RuntimeError:
+            pass
+
+
+class LogChannel:
+    """Канал логов одной задачи с кольцевым буфером"""
+
+    def __init__(self, name, maxlen=CHANNEL_BUFFER_SIZE):
+        self.name = name
+        self._entries = deque(maxlen=maxlen)
+        self._seq = itertools.count(1)
+        self._lock = threading.Lock()
+        self._subscribers = []
+        self.last_seq = 0
+
+    def publish(self, level, message):
+        with self._lock:
+            entry = LogEntry(next(self._seq), level, message)
+            self._entries.append(entry)
+            self.last_seq = entry.seq
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.notify()
+
+    def read_since(self, seq):
+        """Записи после seq и число вытесненных из буфера"""
+        with self._lock:
+            entries = [entry for entry in self._entries if entry.seq > seq]
+            skipped = entries[0].seq - seq - 1 if entries else 0
+            return entries, skipped
+
+    def subscribe(self, loop=None):
+        subscription = Subscription(self, loop or asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+
+
+class LogBus:
+    """Шина логов с каналами по задачам.
+
+    Записи логгеров попадают в каналы из контекста, в котором они созданы
+    (use_channels), поэтому параллельные задачи не перемешивают логи, а
+    подписчики просыпаются только при появлении новых записей.
+    """
+
+    def __init__(self):
+        self._channels = {}
+        self._lock = threading.Lock()
+
+    def channel(self, name):
+        with self._lock:
+            channel = self._channels.get(name)
+            if channel is None:
+                channel = self._channels[name] = LogChannel(name)
+            return channel
+
+    def close(self, name):
+        with self._lock:
+            self._channels.pop(name, None)
+
+    def publish(self, names, level, message):
+        for name in names:
+            with self._lock:
+                channel = self._channels.get(name)
+            if channel is not None:
+                channel.publish(level, message)
+
+
+log_bus = LogBus()
+
+_current_channels = contextvars.ContextVar('log_channels', default=())
+
+
+def current_channels():
+    return _current_channels.get()
+
+
+@contextmanager
+def use_channels(names):
+    """Логи внутри блока (и в потоках, унаследовавших контекст) идут в каналы names.
+
+    names может быть изменяемым списком: присоединившиеся позже подписчики тоже получат записи.
+    """
+    reset = _current_channels.set(names)
+    try:
+        yield names
+    finally:
+        _current_channels.reset(reset)
+
+
+# Каналы снимаются в потоке, создавшем запись: обработчики работают в фоновом потоке логирования
+register_context_field('log_channels', lambda: tuple(_current_channels.get()))
+
+
+class LogBusHandler(logging.Handler):
+    """Передает записи логгеров в каналы задачи, в которой они созданы"""
+
+    def emit(self, record):
+        names = getattr(record, 'log_channels', None)
+        if names is None:
+            names = _current_channels.get()
+        if not names:
+            return
+        try:
+            log_bus.publish(tuple(names), record.levelno, record.getMessage())
+        except Exception:
+            self.handleError(record)
+
+
+_handler = None
+
+
+def install_log_bus_handler(level=logging.INFO):
+    """Подключение шины к корневому логгеру (повторный вызов ничего не меняет)"""
+    global _handler
+    if _handler is None:
+        _handler = LogBusHandler(level)
+    add_log_handler(_handler)
+    return _handler
@@ -5,6 +5,7 @@ from aiogram.types import Message
 from aiogram.fsm.context import FSMContext
 from src.bot.handlers.base import (
     start_command,
+    cancel_command,
     parse_seller_products,
     parse_inn_command,
     parse_products_inn_command,
@@ -14,24 +15,26 @@ from src.bot.handlers.seller_handling import handle_seller_url
 from src.bot.handlers.inn_handling import handle_inn_urls
 from src.bot.handlers.category_handling import handle_category_url  # Новый импорт
 from src.bot.states import ParserStates
-from src.utils import load_config
+from src.config_service import get_config
 
 logger = logging.getLogger('bot.register_handlers')
 
-# Загрузка конфигурации
-config = load_config("config.txt")
-
-# Устанавливаем ALLOWED_CHAT_ID, если TELEGRAM_CHAT_ID задан
+# Устанавливается в register_handlers: конфиг читается при запуске бота, а не при импорте
 ALLOWED_CHAT_ID = None
-chat_id = config.get("TELEGRAM_CHAT_ID", "")
-if chat_id:
+
+def load_allowed_chat_id(config):
+    """ALLOWED_CHAT_ID из TELEGRAM_CHAT_ID, None — без ограничения"""
+    chat_id = config.get("TELEGRAM_CHAT_ID", "")
+    if not chat_id:
+        logger.info("TELEGRAM_CHAT_ID не задан или пустой в config.txt, бот будет работать без ограничения chat_id")
+        return None
     try:
-        ALLOWED_CHAT_ID = int(chat_id)
-        logger.info(f"ALLOWED_CHAT_ID установлен: {ALLOWED_CHAT_ID}")
+        allowed_chat_id = int(chat_id)
+        logger.info(f"ALLOWED_CHAT_ID установлен: {allowed_chat_id}")
+        return allowed_chat_id
     except ValueError:
         logger.warning(f"Некорректный TELEGRAM_CHAT_ID: {chat_id}, бот будет работать без ограничения chat_id")
-else:
-    logger.info("TELEGRAM_CHAT_ID не задан или пустой в config.txt, бот будет работать без ограничения chat_id")
+        return None
 
 async def check_chat_id(message: Message) -> bool:
     """Промежуточная проверка chat_id"""
@@ -53,13 +56,21 @@ def create_handler(handler):
             await handler(message)
     return wrapped_handler
 
-def register_handlers(dp: Dispatcher, bot: Bot):
+def register_handlers(dp: Dispatcher, bot: Bot, config=None):
     """Регистрация всех обработчиков с проверкой chat_id"""
+    global ALLOWED_CHAT_ID
+    ALLOWED_CHAT_ID = load_allowed_chat_id(config if config is not None else get_config().values())
+    
     # Регистрация базовых команд
     dp.message.register(
         create_handler(start_command), 
         Command("start")
     )
+    # Отмена раньше обработчиков состояний: работает и во время парсинга
+    dp.message.register(
+        create_handler(cancel_command),
+        F.text == "❌ Отмена"
+    )
     dp.message.register(
         create_handler(parse_seller_products), 
         F.text == "🔍 Парсинг продавца и товары"
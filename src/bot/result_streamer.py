@@ -0,0 +1,159 @@
+import asyncio
+import logging
+import os
+import time
+
+from aiogram.exceptions import TelegramRetryAfter, TelegramBadRequest
+from aiogram.types import FSInputFile
+
+from src.config_service import get_config
+
+logger = logging.getLogger('bot.result_streamer')
+
+_STOP = object()
+
+
+class ResultStreamer:
+    """Промежуточные результаты длинной задачи в Telegram.
+
+    Парсер отдает результаты из своего потока через on_result. Бот копит их и
+    не чаще раза в STREAM_SUMMARY_SECONDS редактирует одно сообщение со сводкой,
+    а каждые STREAM_EXPORT_EVERY результатов или STREAM_EXPORT_MINUTES минут
+    присылает промежуточный Excel, чтобы с данными можно было работать до конца задачи.
+    """
+
+    def __init__(self, bot, chat_id, title, total=None, export=None, format_item=str, is_found=None):
+        config = get_config()
+        self.summary_interval = config.typed("STREAM_SUMMARY_SECONDS")
+        self.export_every = config.typed("STREAM_EXPORT_EVERY")
+        self.export_interval = config.typed("STREAM_EXPORT_MINUTES") * 60
+
+        self.bot = bot
+        self.chat_id = chat_id
+        self.title = title
+        self.total = total
+        self.export = export
+        self.format_item = format_item
+        self.is_found = is_found
+        self.results = []
+        self.message_id = None
+        self._loop = asyncio.get_running_loop()
+        self._pending = asyncio.Queue()
+        self._task = None
+
+    def on_result(self, item):
+        """Колбэк для парсера, безопасен для вызова из любого потока"""
+        try:
+            self._loop.call_soon_threadsafe(self._pending.put_nowait, item)
+        except RuntimeError:
+            # Цикл бота уже остановлен, показывать результаты некому
+            pass
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    async def finish(self, export=False):
+        """Последняя сводка; export=True присылает и файл с тем, что успели собрать"""
+        if self._task is None:
+            return
+        self._pending.put_nowait(_STOP)
+        await self._task
+        self._task = None
+        if export and self.results and self.export:
+            await self._send_export()
+
+    async def _run(self):
+        last_summary = 0.0
+        summarized = 0
+        last_export = time.monotonic()
+        exported = 0
+        stopping = False
+        while not stopping:
+            try:
+                item = await asyncio.wait_for(self._pending.get(), timeout=self.summary_interval)
+            except asyncio.TimeoutError:
+                item = None
+            # Забираем все, что накопилось, одним пакетом
+            while item is not None:
+                if item is _STOP:
+                    stopping = True
+                else:
+                    self.results.append(item)
+                item = self._pending.get_nowait() if not self._pending.empty() else None
+
+            now = time.monotonic()
+            count = len(self.results)
+            if count > summarized and (stopping or now - last_summary >= self.summary_interval):
+                await self._update_summary()
+                summarized = count
+                last_summary = now
+
+            if stopping or not self.export or count <= exported:
+                continue
+            if self.export_every > 0 and count - exported >= self.export_every or \
+                    self.export_interval > 0 and now - last_export >= self.export_interval:
+                await self._send_export()
+                exported = count
+                last_export = time.monotonic()
+
+    def _summary_text(self):
+        count = len(self.results)
+        progress = f"{count}/{self.total}" if self.total else str(count)
+        lines = [f"📊 {self.title}: обработано {progress}"]
+        if self.is_found:
+            found = sum(1 for item in self.results if self.is_found(item))
+            lines.append(f"✅ ИНН найден: {found}")
+        lines.append("")
+        lines.extend(self.format_item(item) for item in self.results[-5:])
+        return "\n".join(lines)[:4000]
+
+    async def _update_summary(self):
+        text = self._summary_text()
+        try:
+            if self.message_id:
+                await self._call(self.bot.edit_message_text, chat_id=self.chat_id,
+                                 message_id=self.message_id, text=text)
+            else:
+                msg = await self._call(self.bot.send_message, self.chat_id, text)
+                self.message_id = msg.message_id
+        except TelegramBadRequest as e:
+            if "message is not modified" in str(e):
+                return
+            if "message to edit not found" in str(e):
+                self.message_id = None
+            logger.warning(f"Не удалось обновить сводку: {str(e)}")
+        except Exception as e:
+            logger.warning(f"Не удалось обновить сводку: {str(e)}")
+
+    async def _send_export(self):
+        snapshot = list(self.results)
+        try:
+            filepath = await asyncio.to_thread(self.export, snapshot)
+        except Exception as e:
+            logger.error(f"Ошибка промежуточного экспорта: {str(e)}")
+            return
+        if not filepath or not os.path.exists(filepath):
+            return
+        progress = f"{len(snapshot)}/{self.total}" if self.total else str(len(snapshot))
+        try:
+            await self._call(
+                self.bot.send_document, self.chat_id, FSInputFile(filepath),
+                caption=f"📎 Промежуточные результаты: {progress}"
+            )
+        except Exception as e:
+            logger.warning(f"Не удалось отправить промежуточный файл: {str(e)}")
+        finally:
+            try:
+                os.remove(filepath)
+            except OSError as e:
+                logger.debug(f"Ошибка удаления промежуточного файла: {str(e)}")
+
+    async def _call(self, method, *args, **kwargs):
+        """Вызов Telegram API с одним повтором после Too Many Requests"""
+        try:
+            return await method(*args, **kwargs)
+        except TelegramRetryAfter as e:
+            logger.warning(f"Telegram просит подождать {e.retry_after}с")
+            await asyncio.sleep(e.retry_after)
+            return await method(*args, **kwargs)
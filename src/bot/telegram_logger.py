@@ -1,16 +1,28 @@
 import asyncio
+import itertools
 import logging
 import time
 import re
 import html
-from .central_logger import central_logger
+from .log_bus import log_bus
+
+_channel_ids = itertools.count(1)
 
 class TelegramLogsHandler:
+    """Логи задачи в одном сообщении чата.
+
+    Подписывается на собственный канал шины логов: имя канала (channel_name)
+    передается планировщику, и туда попадают только записи этой задачи.
+    Пачки записей объединяются в одно редактирование не чаще update_interval.
+    """
+
     def __init__(self, bot, chat_id):
         self.bot = bot
         self.chat_id = chat_id
         self.message_id = None
         self.is_running = True
+        self.channel_name = f"telegram-{chat_id}-{next(_channel_ids)}"
+        self.subscription = log_bus.channel(self.channel_name).subscribe()
         self.log_buffer = []
         self.buffer_size = 15
         self.max_message_length = 4090  # Telegram limit is 4096 chars
@@ -27,19 +39,23 @@ class TelegramLogsHandler:
         return html.escape(cleaned)
 
     async def process_logs(self):
-        """Асинхронная задача для обработки логов из очереди"""
+        """Ожидание записей канала и обновление сообщения пачками"""
         while self.is_running:
             try:
-                if not central_logger.log_queue.empty():
-                    log_entry = central_logger.log_queue.get_nowait()
-                    await self.add_log(log_entry['message'])
-                else:
-                    await asyncio.sleep(0.5)
+                entries = await self.subscription.get()
+                if not entries:
+                    break
+                for entry in entries:
+                    self._append(entry.message)
+                await self._flush()
             except Exception as e:
                 logging.error(f"Ошибка обработки логов: {str(e)}")
     
     async def add_log(self, log_entry):
-        """Добавляет запись в лог и обновляет сообщение"""
+        """Добавляет запись в канал задачи; сообщение обновится при ближайшей отправке"""
+        log_bus.publish((self.channel_name,), logging.INFO, log_entry)
+    
+    def _append(self, log_entry):
         # Упрощаем лог (убираем временные метки)
         clean_log = log_entry.split(" - ", 3)[-1] if " - " in log_entry else log_entry
         
@@ -54,6 +70,13 @@ class TelegramLogsHandler:
         
         if len(self.log_buffer) > self.buffer_size:
             self.log_buffer.pop(0)
+    
+    async def _flush(self):
+        """Одно редактирование сообщения на все накопленные записи"""
+        wait = self.update_interval - (time.time() - self.last_update_time)
+        if wait > 0 and self.is_running:
+            # Записи, пришедшие за это время, попадут в следующее редактирование
+            await asyncio.sleep(wait)
         
         log_text = "\n".join(self.log_buffer)
         
@@ -61,12 +84,12 @@ class TelegramLogsHandler:
         if len(log_text) > self.max_message_length:
             log_text = log_text[-self.max_message_length:]
         
-        await self._safe_update(log_text)
+        await self._safe_update(log_text, force=not self.is_running)
     
-    async def _safe_update(self, log_text):
+    async def _safe_update(self, log_text, force=False):
         """Безопасное обновление сообщения с обработкой ошибок"""
         current_time = time.time()
-        if current_time - self.last_update_time < self.update_interval:
+        if not force and current_time - self.last_update_time < self.update_interval:
             return
             
         try:
@@ -95,7 +118,7 @@ class TelegramLogsHandler:
             # Обработка случая, когда сообщение не найдено
             if "message to edit not found" in error_msg:
                 self.message_id = None  # Сбрасываем ID сообщения
-                await self._safe_update(log_text)  # Пробуем снова
+                await self._safe_update(log_text, force)  # Пробуем снова
                 return
             
             if "Too Many Requests" in error_msg:
@@ -153,9 +176,16 @@ class TelegramLogsHandler:
         await self.send_result_message(message)
     
     async def stop(self):
-        """Останавливает обработчик"""
+        """Останавливает обработчик, дописав последние записи, и закрывает канал"""
         self.is_running = False
+        self.subscription.close()
         try:
             await self.task
         except asyncio.CancelledError:
-            pass
\ No newline at end of file
+            pass
+        entries, _ = self.subscription.channel.read_since(self.subscription.cursor)
+        if entries:
+            for entry in entries:
+                self._append(entry.message)
+            await self._flush()
+        log_bus.close(self.channel_name)
\ No newline at end of file
@@ -0,0 +1,405 @@
+"""Запуск парсеров из командной строки, без GUI и Telegram бота.
+
+Результаты пишутся в stdout (или в --output) построчно в формате JSON Lines,
+прогресс и логи — в stderr, поэтому команду удобно запускать из cron или systemd.
+
+Примеры запуска из корня проекта:
+    python cli.py inn-sellers sellers.txt --workers 3 > sellers.jsonl
+    cat products.txt | python cli.py inn-products - --rate 0.5
+    python cli.py category https://www.ozon.ru/category/... --excel
+    python cli.py seller https://www.ozon.ru/seller/...
+    python cli.py inn-sellers sellers.txt -o sellers.jsonl --resume
+    python cli.py inn-products products.txt --refresh
+
+Код возврата: 0 — все ссылки обработаны, 2 — часть с ошибками,
+1 — ни одной успешной, 130 — прервано (Ctrl+C, SIGTERM).
+"""
+import argparse
+import contextvars
+import json
+import logging
+import os
+import signal
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime
+
+from src.config_service import get_config
+from src.logging_core import setup_logging
+from src.parser.category_inn_parser.url_utils import UrlUtils
+from src.parser.cancellation import CancellationToken, JobCancelled, use_token
+
+logger = logging.getLogger('cli')
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_PARTIAL = 2
+EXIT_CANCELLED = 130
+
+# Значения ИНН, которыми парсеры помечают необработанную ссылку
+ERROR_MARKERS = ('Ошибка', 'Таймаут', 'Ошибка парсинга')
+
+_url_utils = UrlUtils()
+
+
+def read_urls(inputs, stdin=None):
+    """Ссылки из аргументов: URL, файлы со ссылками по одной в строке или '-' для stdin"""
+    stdin = stdin or sys.stdin
+    if not inputs:
+        if stdin.isatty():
+            return []
+        inputs = ['-']
+
+    urls = []
+    for item in inputs:
+        if item == '-':
+            lines = stdin.read().splitlines()
+        elif item.startswith(('http://', 'https://')):
+            lines = [item]
+        else:
+            with open(item, 'r', encoding='utf-8') as f:
+                lines = f.read().splitlines()
+        urls.extend(line.strip() for line in lines)
+    # Пустые строки и комментарии пропускаются, повторы убираются с сохранением порядка
+    return list(dict.fromkeys(url for url in urls if url and not url.startswith('#')))
+
+
+def load_done_urls(path):
+    """Ссылки, уже успешно обработанные в прошлом запуске (для --resume)"""
+    done = set()
+    if not path or not os.path.exists(path):
+        return done
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # Последняя строка могла оборваться при аварийной остановке
+                continue
+            if record.get('ok') and not record.get('partial'):
+                done.add(record.get('url'))
+                # Фронтир пишет ссылки в каноническом виде, поэтому сравниваем и по ID
+                key = _url_utils.canonical_key(record.get('url'))
+                if key:
+                    done.add(key)
+    return done
+
+
+class ResultSink:
+    """Потокобезопасный вывод записей: JSON Lines сразу по строке или JSON-массив в конце"""
+
+    def __init__(self, stream, output_format='jsonl', total=0):
+        self.stream = stream
+        self.output_format = output_format
+        self.total = total
+        self.done = 0
+        self.failed = 0
+        self._records = []
+        self._lock = threading.Lock()
+
+    def write(self, command, url, ok, data=None, error=None, partial=False):
+        record = {'command': command, 'url': url, 'ok': ok}
+        if partial:
+            record['partial'] = True
+        if data is not None:
+            record['data'] = data
+        if error:
+            record['error'] = error
+        with self._lock:
+            if not partial:
+                self.done += 1
+                self.failed += 0 if ok else 1
+                logger.info("[%s/%s] %s %s", self.done, self.total, '✓' if ok else '✗', url)
+            if self.output_format == 'jsonl':
+                self.stream.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+                # Построчный сброс: результаты видны сразу и не теряются при остановке
+                self.stream.flush()
+            else:
+                self._records.append(record)
+
+    def close(self):
+        if self.output_format == 'json':
+            json.dump(self._records, self.stream, ensure_ascii=False, indent=2, default=str)
+            self.stream.write("\n")
+        self.stream.flush()
+
+
+# Токен отмены всего запуска: его выставляют Ctrl+C и SIGTERM
+_token = CancellationToken()
+
+
+def run_parallel(func, items, workers):
+    """func(item) в пуле потоков; контекст (токен отмены) переходит в каждый поток"""
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = [executor.submit(contextvars.copy_context().run, func, item) for item in items]
+        pending = set(futures)
+        while pending:
+            # Короткое ожидание, чтобы главный поток успевал обрабатывать сигналы
+            _, pending = wait(pending, timeout=0.5)
+    for future in futures:
+        if future.cancelled():
+            continue
+        error = future.exception()
+        if error is not None and not isinstance(error, JobCancelled):
+            logger.error(f"Ошибка в потоке обработки: {str(error)}")
+
+
+def _inn_ok(result):
+    return result.get('inn') not in ERROR_MARKERS
+
+
+def run_inn(args, urls, sink, mode):
+    """ИНН продавцов или продавцов по товарам в --workers браузерах.
+
+    С фронтиром браузеры берут ссылки из общей очереди по одной, повторы и
+    свежие результаты прошлых запусков не парсятся. Без него ссылки заранее
+    делятся между браузерами поровну.
+    """
+    from src.parser.excel_writer import ExcelWriter
+    from src.parser.frontier import get_frontier, DEFERRED_MARKER
+    if mode == 'sellers':
+        from src.parser.inn_parser import INNParser as parser_class, seller_results_to_rows
+        url_key = 'seller_url'
+    else:
+        from src.parser.product_inn_parser import ProductINNParser as parser_class
+        url_key = 'product_url'
+
+    # Результаты держатся в памяти, только если из них нужно собрать Excel
+    results = []
+    results_lock = threading.Lock()
+
+    def emit(result):
+        ok = _inn_ok(result)
+        sink.write(args.command, result.get(url_key), ok, result, error=None if ok else result.get('inn'))
+        if args.excel:
+            with results_lock:
+                results.append(result)
+
+    frontier = get_frontier()
+    batch = frontier.plan(urls, f'inn-{mode}', refresh=args.refresh) if frontier else None
+    if batch:
+        for result in batch.cached:
+            emit(result)
+
+    def run_shard(shard):
+        parser = None
+        finished = set()
+        try:
+            parser = parser_class(headless=not args.show_browser)
+            source = frontier.iter_leases(batch) if batch else shard
+            for result in parser.iter_url_list(source):
+                if batch:
+                    frontier.record(batch, result)
+                finished.add(result.get(url_key))
+                emit(result)
+        except JobCancelled:
+            raise
+        except Exception as e:
+            # Ссылки, до которых парсер не дошел, тоже попадают в вывод
+            logger.error(f"Ошибка обработки пакета ссылок: {str(e)}")
+            for url in shard or ():
+                if url not in finished:
+                    sink.write(args.command, url, False, error=str(e))
+        finally:
+            if parser:
+                parser.close()
+
+    if batch:
+        workers = max(1, min(args.workers or 1, batch.to_crawl))
+        try:
+            if batch.to_crawl:
+                run_parallel(run_shard, [None] * workers, workers)
+            if not _token.cancelled:
+                # Ссылки, которые за это время обработала другая задача с общим фронтиром
+                for result in frontier.shared_results(batch):
+                    emit(result)
+                # Ссылки упавших браузеров, которые никто не успел забрать
+                for url in frontier.unfinished(batch):
+                    sink.write(args.command, url, False, error='Ссылка не обработана')
+                for url in batch.deferred:
+                    sink.write(args.command, url, False, error=DEFERRED_MARKER)
+        finally:
+            frontier.finish(batch)
+    else:
+        workers = max(1, min(args.workers or 1, len(urls)))
+        shards = [urls[i::workers] for i in range(workers)]
+        run_parallel(run_shard, shards, workers)
+
+    if args.excel and results:
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        writer = ExcelWriter()
+        if mode == 'sellers':
+            filepath = writer.save_sellers_to_excel(seller_results_to_rows(results), f"sellers_inn_{timestamp}")
+        else:
+            filepath = writer.save_sellers_from_products(results, filename_prefix=f"sellers_from_products_{timestamp}")
+        logger.info(f"Excel: {filepath}")
+
+
+def run_sellers(args, urls, sink):
+    """Продавец и его товары; Excel по каждому продавцу сохраняется в output, как и в боте"""
+    from src.parse_seller_and_products import parse_seller_and_products
+
+    def run_one(url):
+        result = parse_seller_and_products(url, not args.show_browser)
+        if result.get('success'):
+            data = {key: result.get(key) for key in ('seller', 'products', 'excel_path')}
+            sink.write(args.command, url, True, data)
+        else:
+            sink.write(args.command, url, False, error=result.get('error', 'Не удалось получить данные продавца'))
+
+    run_parallel(run_one, urls, args.workers or 1)
+
+
+def run_categories(args, urls, sink):
+    """Категории по очереди; продавцы категории выводятся по мере готовности с partial=true"""
+    from src.parser.category_inn_parser.main import CategoryParser
+
+    for url in urls:
+        _token.check()
+
+        def on_result(seller_name, seller_data, url=url):
+            sink.write(args.command, url, seller_data.get('inn') not in ERROR_MARKERS,
+                       {'seller_name': seller_name, **seller_data}, partial=True)
+
+        sellers_data = CategoryParser().parse_category(url, on_result=on_result)
+        if sellers_data:
+            files = sellers_data.pop('_files', None)
+            sink.write(args.command, url, True, {'sellers': len(sellers_data), 'files': files})
+        else:
+            sink.write(args.command, url, False, error='Не удалось собрать данные продавцов')
+
+
+COMMANDS = {
+    'seller': run_sellers,
+    'inn-sellers': lambda args, urls, sink: run_inn(args, urls, sink, 'sellers'),
+    'inn-products': lambda args, urls, sink: run_inn(args, urls, sink, 'products'),
+    'category': run_categories,
+}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='cli.py',
+        description=__doc__.splitlines()[0],
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="\n".join(__doc__.splitlines()[5:]),
+    )
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    helps = {
+        'seller': "продавец и его товары по ссылке на магазин",
+        'inn-sellers': "ИНН продавцов по ссылкам на магазины (sellers.txt)",
+        'inn-products': "ИНН продавцов по ссылкам на товары (products.txt)",
+        'category': "продавцы и ИНН по ссылке на категорию",
+    }
+    for name, help_text in helps.items():
+        sub = subparsers.add_parser(name, help=help_text, description=help_text)
+        sub.add_argument('inputs', nargs='*', metavar='URL|FILE|-',
+                         help="ссылки, файлы со ссылками по одной в строке или '-' для stdin (по умолчанию stdin)")
+        sub.add_argument('-w', '--workers', type=int,
+                         help="параллельных браузеров (для category — воркеров сбора ИНН, MAX_PARSE_WORKERS)")
+        sub.add_argument('--rate', type=float, help="загрузок страниц в секунду (RATE_LIMIT_RPS)")
+        sub.add_argument('--job-timeout', type=float, metavar='SECONDS',
+                         help="бюджет всей задачи в секундах, 0 — без ограничения (JOB_TIMEOUT)")
+        sub.add_argument('--no-cache', action='store_true',
+                         help="заново найти chromedriver и Chrome вместо сохраненного кэша")
+        sub.add_argument('-f', '--format', choices=('jsonl', 'json'), default='jsonl',
+                         help="jsonl — запись на строку по мере готовности, json — массив в конце")
+        sub.add_argument('-o', '--output', help="файл результатов вместо stdout")
+        sub.add_argument('--resume', action='store_true',
+                         help="пропустить ссылки, уже успешно записанные в --output, и дописывать в него")
+        sub.add_argument('--refresh', action='store_true',
+                         help="парсить заново ссылки со свежим результатом во фронтире (FRONTIER_FRESH_HOURS)")
+        sub.add_argument('--excel', action='store_true', help="дополнительно сохранить Excel в output")
+        sub.add_argument('--show-browser', action='store_true', help="запускать браузер с окном")
+        sub.add_argument('-q', '--quiet', action='store_true', help="в stderr только предупреждения и ошибки")
+        sub.add_argument('-v', '--verbose', action='store_true', help="подробные логи")
+    return parser
+
+
+def _install_signal_handlers():
+    """Первый Ctrl+C или SIGTERM отменяет задачи, повторный Ctrl+C завершает процесс сразу"""
+    def handle(signum, _frame):
+        name = signal.Signals(signum).name
+        if _token.cancelled:
+            raise KeyboardInterrupt
+        logger.warning(f"Получен {name}, останавливаем обработку...")
+        _token.cancel(name)
+
+    signal.signal(signal.SIGINT, handle)
+    if hasattr(signal, 'SIGTERM'):
+        signal.signal(signal.SIGTERM, handle)
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.resume and not args.output:
+        parser.error("--resume требует --output")
+    if args.resume and args.format != 'jsonl':
+        parser.error("--resume работает только с --format jsonl")
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers должен быть не меньше 1")
+    if args.job_timeout is not None and args.job_timeout < 0:
+        parser.error("--job-timeout не может быть отрицательным")
+
+    level = logging.DEBUG if args.verbose else logging.WARNING if args.quiet else logging.INFO
+    setup_logging(level=level)
+
+    overrides = {}
+    if args.rate is not None:
+        overrides['RATE_LIMIT_RPS'] = args.rate
+    if args.job_timeout is not None:
+        overrides['JOB_TIMEOUT'] = args.job_timeout
+    if args.command == 'category' and args.workers:
+        overrides['MAX_PARSE_WORKERS'] = args.workers
+    if overrides:
+        get_config().override(overrides)
+
+    try:
+        urls = read_urls(args.inputs)
+    except OSError as e:
+        logger.error(f"Не удалось прочитать список ссылок: {str(e)}")
+        return EXIT_FAILED
+    if args.resume:
+        done = load_done_urls(args.output)
+        pending = [url for url in urls if url not in done and _url_utils.canonical_key(url) not in done]
+        skipped = len(urls) - len(pending)
+        urls = pending
+        if skipped:
+            logger.info(f"Пропущено уже обработанных ссылок: {skipped}")
+    if not urls:
+        logger.warning("Нет ссылок для обработки")
+        return EXIT_OK if args.resume else EXIT_FAILED
+
+    if args.no_cache:
+        from src.parser.driver_resolver import driver_resolver
+        driver_resolver.invalidate()
+
+    stream = open(args.output, 'a' if args.resume else 'w', encoding='utf-8') if args.output else sys.stdout
+    sink = ResultSink(stream, args.format, total=len(urls))
+    _install_signal_handlers()
+    logger.info(f"{args.command}: {len(urls)} ссылок")
+    try:
+        with use_token(_token):
+            COMMANDS[args.command](args, urls, sink)
+    except JobCancelled:
+        pass
+    finally:
+        sink.close()
+        if stream is not sys.stdout:
+            stream.close()
+        from src.parser.timing import timing_report
+        timing_report.log_report()
+
+    if _token.cancelled:
+        logger.warning(f"Остановлено: обработано {sink.done}/{len(urls)}")
+        return EXIT_CANCELLED
+    logger.info(f"Готово: {sink.done - sink.failed} успешно, {sink.failed} с ошибками")
+    if sink.failed == 0:
+        return EXIT_OK
+    return EXIT_PARTIAL if sink.failed < sink.done else EXIT_FAILED
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,388 @@
+"""Асинхронный API парсеров для встраивания в другие приложения.
+
+    async with OzonClient() as client:
+        seller = await client.get_seller("https://www.ozon.ru/seller/...")
+        async for product in client.iter_seller_products(seller.url):
+            ...
+        async for result in client.resolve_inns(urls):
+            print(result.url, result.inn)
+
+Клиент запускает общий пул браузеров (если его еще не запустил бот) и
+останавливает его при выходе. Каждый вызов арендует свой браузер, работа
+Selenium идет в отдельных потоках, поэтому один клиент можно использовать из
+нескольких корутин одновременно: лишние вызовы ждут свободный браузер.
+Прерванная корутина или брошенный итератор отменяют свою задачу в парсере.
+"""
+import asyncio
+import concurrent.futures
+import logging
+from typing import NamedTuple, Optional, Tuple
+
+from src.config_service import get_config
+from src.parser.browser_pool import get_browser_pool, start_browser_pool, stop_browser_pool
+from src.parser.cancellation import CancellationToken, JobCancelled, use_token
+
+logger = logging.getLogger('client')
+
+# Значения, которыми парсеры помечают отсутствие данных
+MISSING_VALUES = ('Не найдено', 'Ошибка', 'Таймаут', 'Ошибка парсинга', '')
+
+# Сколько готовых элементов поток парсера держит впереди потребителя итератора
+STREAM_QUEUE_SIZE = 16
+# Шаг, с которым поток парсера проверяет отмену, пока очередь заполнена
+STREAM_PUT_WAIT_STEP = 0.5
+
+
+def _value(data, key):
+    value = data.get(key)
+    return None if value in MISSING_VALUES else value
+
+
+class Seller(NamedTuple):
+    """Карточка магазина и юридические данные продавца"""
+    url: str
+    company_name: Optional[str]
+    inn: Optional[str]
+    address: Optional[str]
+    working_hours: Optional[str]
+    is_premium: bool
+    orders_count: Optional[int]
+    working_since: Optional[str]
+    average_rating: Optional[float]
+    reviews_count: Optional[int]
+    raw: dict
+
+    @classmethod
+    def from_dict(cls, url, data):
+        return cls(
+            url=url,
+            company_name=_value(data, 'company_name'),
+            inn=_value(data, 'inn'),
+            address=_value(data, 'address'),
+            working_hours=_value(data, 'working_hours'),
+            is_premium=bool(data.get('is_premium')),
+            orders_count=data.get('orders_count'),
+            working_since=_value(data, 'working_since'),
+            average_rating=data.get('average_rating'),
+            reviews_count=data.get('reviews_count'),
+            raw=dict(data),
+        )
+
+
+class SellerLegal(NamedTuple):
+    """Юридические данные продавца из тултипа на странице товара"""
+    url: str
+    company_name: Optional[str]
+    inn: Optional[str]
+    address: Optional[str]
+    working_hours: Optional[str]
+    other_info: Tuple[str, ...]
+
+    @classmethod
+    def from_dict(cls, url, data):
+        return cls(
+            url=url,
+            company_name=_value(data, 'company_name'),
+            inn=_value(data, 'inn'),
+            address=_value(data, 'address'),
+            working_hours=_value(data, 'working_hours'),
+            other_info=tuple(data.get('other_info') or ()),
+        )
+
+
+class Product(NamedTuple):
+    """Карточка товара со страницы продавца"""
+    url: str
+    name: str
+    price_with_discount: Optional[str]
+    price_without_discount: Optional[str]
+    discount_percent: Optional[str]
+    rating: Optional[str]
+    reviews_count: Optional[str]
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            url=data['url'],
+            name=data['name'],
+            price_with_discount=data.get('price_with_discount') or None,
+            price_without_discount=data.get('price_without_discount') or None,
+            discount_percent=data.get('discount_percent') or None,
+            rating=data.get('rating') or None,
+            reviews_count=data.get('reviews_count') or None,
+        )
+
+
+class CategorySeller(NamedTuple):
+    """Продавец, найденный в фильтре категории"""
+    category_url: str
+    seller_name: str
+    company_name: Optional[str]
+    inn: Optional[str]
+    raw: dict
+
+    @classmethod
+    def from_dict(cls, category_url, seller_name, data):
+        return cls(
+            category_url=category_url,
+            seller_name=seller_name,
+            company_name=_value(data, 'company_name'),
+            inn=_value(data, 'inn'),
+            raw=dict(data),
+        )
+
+
+class InnResult(NamedTuple):
+    """ИНН по ссылке на продавца или товар. error заполнен, если ссылку обработать не удалось"""
+    url: str
+    seller_name: Optional[str]
+    company_name: Optional[str]
+    inn: Optional[str]
+    error: Optional[str]
+
+    @classmethod
+    def from_dict(cls, data):
+        inn = data.get('inn')
+        error = inn if inn in ('Ошибка', 'Таймаут') else None
+        return cls(
+            url=data.get('seller_url') or data.get('product_url'),
+            seller_name=None if error else _value(data, 'seller_name'),
+            company_name=None if error else _value(data, 'company_name'),
+            inn=_value(data, 'inn'),
+            error=error,
+        )
+
+    @property
+    def found(self):
+        return self.inn is not None
+
+
+class _Lease:
+    """Браузер из общего пула на время вызова.
+
+    После ротации антиботом в driver нужно положить актуальный браузер парсера,
+    чтобы в пул вернулся именно он. Без пула driver остается None, и парсер
+    создает и закрывает свой браузер сам.
+    """
+
+    def __init__(self):
+        self.pool = get_browser_pool()
+        self.driver = None
+
+    def __enter__(self):
+        self.driver = self.pool.acquire() if self.pool else None
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.driver is not None and self.pool.owns(self.driver):
+            broken = exc_type is not None and not self.pool.is_healthy(self.driver)
+            self.pool.release(self.driver, broken=broken)
+        return False
+
+
+class OzonClient:
+    """Асинхронный клиент парсеров Ozon с общим пулом браузеров.
+
+    max_browsers и headless переопределяют BROWSER_POOL_SIZE и
+    BROWSER_POOL_HEADLESS, если пул запускает сам клиент.
+    """
+
+    def __init__(self, max_browsers=None, headless=None):
+        self.max_browsers = max_browsers
+        self.headless = headless
+        self._owns_pool = False
+        self._slots = None
+        self._tokens = set()
+
+    async def __aenter__(self):
+        if get_browser_pool() is None:
+            # Настройки клиента передаются только его пулу, общий конфиг процесса не меняется
+            pool = await asyncio.to_thread(
+                start_browser_pool, max_size=self.max_browsers, headless=self.headless)
+            self._owns_pool = pool is not None
+        pool = get_browser_pool()
+        if self.headless is None:
+            self.headless = pool.headless if pool else get_config().typed('BROWSER_POOL_HEADLESS')
+        # Вызовов в работе не больше, чем браузеров, остальные ждут в цикле событий, а не в потоках
+        self._slots = asyncio.Semaphore(pool.max_size if pool else max(1, self.max_browsers or 1))
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+        return False
+
+    async def aclose(self):
+        for token in list(self._tokens):
+            token.cancel("клиент закрыт")
+        if self._owns_pool:
+            self._owns_pool = False
+            await asyncio.to_thread(stop_browser_pool)
+
+    async def get_seller(self, url):
+        """Карточка магазина и юридические данные продавца"""
+        def work():
+            from src.parser.ozon_parser import OzonSellerParser
+            with _Lease() as lease:
+                # parse_seller сам закрывает браузер, если создавал его
+                parser = OzonSellerParser(headless=self.headless, driver=lease.driver)
+                try:
+                    return Seller.from_dict(url, parser.parse_seller(url))
+                finally:
+                    lease.driver = parser.driver
+        return await self._call(work)
+
+    async def get_seller_legal(self, url):
+        """Юридические данные по ссылке на продавца (через его первый товар) или на товар"""
+        def work():
+            from src.parser.ozon_parser import OzonSellerParser
+            from src.parser.deadline import item_deadline, job_deadline
+            from src.parser.cancellation import current_token
+            from src.parser.utils import open_page, SELLER_PAGE_READY, PRODUCT_PAGE_READY
+            with _Lease() as lease:
+                parser = OzonSellerParser(headless=self.headless, driver=lease.driver)
+                try:
+                    deadline = item_deadline(job_deadline(current_token()))
+                    product_url = url
+                    if '/product/' not in url:
+                        open_page(parser.driver, url, wait_for=SELLER_PAGE_READY, deadline=deadline)
+                        product_url = parser._get_first_product_link()
+                        if not product_url:
+                            return SellerLegal.from_dict(url, {})
+                    open_page(parser.driver, product_url, wait_for=PRODUCT_PAGE_READY, deadline=deadline)
+                    return SellerLegal.from_dict(url, parser.read_seller_details(deadline))
+                finally:
+                    lease.driver = parser.driver
+                    parser.close()
+        return await self._call(work)
+
+    def iter_seller_products(self, url, limit=None):
+        """Товары продавца по мере прокрутки страницы; limit — сколько собрать (по умолчанию 50)"""
+        def produce(emit):
+            from src.parser.seller_products_parser import OzonProductParser
+            with _Lease() as lease:
+                parser = OzonProductParser(headless=self.headless, driver=lease.driver)
+                try:
+                    if limit:
+                        parser.target_count = limit
+                    parser.init_driver()
+                    if not parser.load_seller_page(url):
+                        raise RuntimeError(f"Не удалось загрузить страницу продавца: {url}")
+                    for data in parser.iter_products():
+                        emit(Product.from_dict(data))
+                finally:
+                    parser.close()
+        return self._stream(produce)
+
+    def iter_category_sellers(self, url):
+        """Продавцы категории с ИНН по мере готовности. Файлы Excel/txt не создаются"""
+        def produce(emit):
+            from src.parser.category_inn_parser.main import CategoryParser
+            parser = CategoryParser()
+            is_valid, message = parser.url_utils.validate_ozon_url(url)
+            if not is_valid:
+                raise ValueError(f"Некорректная ссылка на категорию: {message}")
+            category_url = parser.url_utils.normalize_url(url) or url
+            for name, data in parser.link_collector.iter_seller_data(category_url, parser.seller_parser):
+                emit(CategorySeller.from_dict(url, name, data))
+        return self._stream(produce)
+
+    def resolve_inns(self, urls):
+        """ИНН по списку ссылок на продавцов и товары, результаты по мере готовности"""
+        urls = list(urls)
+
+        def produce(emit):
+            from src.parser.inn_parser import INNParser
+            from src.parser.product_inn_parser import ProductINNParser
+            product_urls = [url for url in urls if '/product/' in url]
+            seller_urls = [url for url in urls if '/product/' not in url]
+            for parser_class, group in ((INNParser, seller_urls), (ProductINNParser, product_urls)):
+                if not group:
+                    continue
+                with _Lease() as lease:
+                    parser = parser_class(headless=self.headless, driver=lease.driver)
+                    try:
+                        for data in parser.iter_url_list(group):
+                            emit(InnResult.from_dict(data))
+                    finally:
+                        lease.driver = parser.driver
+                        parser.close()
+        return self._stream(produce)
+
+    async def _call(self, work):
+        """work() в отдельном потоке со своим токеном отмены"""
+        token = CancellationToken()
+
+        def run():
+            with use_token(token):
+                return work()
+
+        async with self._slots_or_fail():
+            self._tokens.add(token)
+            try:
+                return await asyncio.to_thread(run)
+            except asyncio.CancelledError:
+                # Поток парсера остановится на ближайшей проверке токена
+                token.cancel("вызов отменен")
+                raise
+            finally:
+                self._tokens.discard(token)
+
+    async def _stream(self, produce):
+        """Асинхронный итератор по элементам, которые produce(emit) отдает из своего потока"""
+        loop = asyncio.get_running_loop()
+        # Ограниченная очередь: медленный потребитель притормаживает поток парсера
+        queue = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+        done = object()
+        token = CancellationToken()
+
+        def emit(item):
+            try:
+                future = asyncio.run_coroutine_threadsafe(queue.put(item), loop)
+            except RuntimeError:
+                # Цикл событий уже закрыт, отдавать элементы некому
+                token.cancel("цикл событий закрыт")
+                token.check()
+            while True:
+                try:
+                    return future.result(timeout=STREAM_PUT_WAIT_STEP)
+                except concurrent.futures.TimeoutError:
+                    if token.cancelled:
+                        # Итерацию бросили: очередь больше никто не разберет
+                        future.cancel()
+                        token.check()
+
+        def run():
+            with use_token(token):
+                try:
+                    produce(emit)
+                finally:
+                    try:
+                        # Ждущий потребитель держит очередь пустой, и done в нее встанет сразу
+                        emit(done)
+                    except JobCancelled:
+                        pass
+
+        async with self._slots_or_fail():
+            self._tokens.add(token)
+            task = asyncio.ensure_future(asyncio.to_thread(run))
+            try:
+                while True:
+                    item = await queue.get()
+                    if item is done:
+                        break
+                    yield item
+                # Ошибка парсера доходит до вызывающего после уже отданных элементов
+                await task
+            finally:
+                self._tokens.discard(token)
+                if not task.done():
+                    token.cancel("итерация прервана")
+                    try:
+                        await task
+                    except Exception as e:
+                        logger.debug(f"Поток парсера завершился после отмены: {str(e)}")
+
+    def _slots_or_fail(self):
+        if self._slots is None:
+            raise RuntimeError("OzonClient используется вне 'async with'")
+        return self._slots
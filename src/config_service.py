@@ -0,0 +1,266 @@
+import logging
+import os
+import threading
+import time
+
+from src.utils import get_config_path, load_config
+
+logger = logging.getLogger('config_service')
+
+_TRUE_VALUES = ('1', 'true', 'yes', 'on', 'да')
+_FALSE_VALUES = ('0', 'false', 'no', 'off', 'нет')
+
+
+def parse_bool(value):
+    value = str(value).strip().lower()
+    if value in _TRUE_VALUES:
+        return True
+    if value in _FALSE_VALUES:
+        return False
+    raise ValueError(f"ожидалось true/false: {value}")
+
+
+class Setting:
+    """Описание типизированной настройки config.txt"""
+    __slots__ = ('key', 'cast', 'default', 'minimum', 'description')
+
+    def __init__(self, key, cast, default, minimum=None, description=""):
+        self.key = key
+        self.cast = cast
+        self.default = default
+        self.minimum = minimum
+        self.description = description
+
+    def parse(self, raw):
+        value = self.cast(raw)
+        if self.minimum is not None and value < self.minimum:
+            raise ValueError(f"меньше {self.minimum}")
+        return value
+
+
+def _settings(*items):
+    return {item.key: item for item in items}
+
+
+# Известные настройки: тип, значение по умолчанию и нижняя граница
+SETTINGS = _settings(
+    # Параллелизм
+    Setting("MAX_PARSE_WORKERS", int, 5, 1, "воркеров парсинга категории"),
+    Setting("BROWSER_BUDGET", int, 3, 1, "браузеров на все задачи бота"),
+    Setting("JOB_QUOTA_PER_CHAT", int, 2, 1, "задач на чат"),
+    Setting("BROWSER_POOL_SIZE", int, 3, 0, "размер пула браузеров (по умолчанию BROWSER_BUDGET), 0 — без пула"),
+    Setting("BROWSER_POOL_MIN_IDLE", int, 1, 0),
+    # Паузы и ограничение частоты
+    Setting("SCROLL_DELAY", float, 2.0, 0.0, "пауза прокрутки категории, с"),
+    Setting("RATE_LIMIT_RPS", float, 1.0, 0.01, "загрузок страниц в секунду"),
+    Setting("RATE_LIMIT_BURST", int, 3, 1),
+    Setting("RATE_LIMIT_JITTER", float, 0.5, 0.0),
+    # Таймауты, 0 в JOB_TIMEOUT/ITEM_TIMEOUT отключает ограничение
+    Setting("LOAD_TIMEOUT", int, 30, 1, "ожидание загрузки страницы, с"),
+    Setting("JOB_TIMEOUT", float, 0.0, 0.0, "бюджет задачи целиком, с (по умолчанию без ограничения)"),
+    Setting("ITEM_TIMEOUT", float, 180.0, 0.0),
+    # Браузер и прокси
+    Setting("BROWSER_POOL_HEADLESS", parse_bool, True),
+    Setting("SHARED_CHROMEDRIVER", parse_bool, False),
+    Setting("PROXIES", str, ""),
+    Setting("PROXY_FILE", str, ""),
+    Setting("PROXY_MAX_SESSIONS", int, 2, 1),
+    # Время жизни кэшей и простаивающих ресурсов
+    Setting("BROWSER_POOL_IDLE_TIMEOUT", int, 600, 0, "простой браузера в пуле, с"),
+    Setting("PROXY_EVICT_SECONDS", float, 300.0, 0.0, "исключение сбойного прокси, с"),
+    Setting("CONFIG_CHECK_SECONDS", float, 1.0, 0.0, "проверка изменений config.txt, с"),
+    # Парсинг категорий и выдача результатов
+    Setting("MAX_SELLERS", int, 50, 1),
+    Setting("STREAM_SUMMARY_SECONDS", float, 15.0, 0.0),
+    Setting("STREAM_EXPORT_EVERY", int, 50, 0),
+    Setting("STREAM_EXPORT_MINUTES", float, 15.0, 0.0),
+    # Фронтир ссылок: повторы и свежие результаты прошлых запусков не парсятся заново
+    Setting("FRONTIER_ENABLED", parse_bool, True),
+    Setting("FRONTIER_PATH", str, ""),
+    Setting("FRONTIER_FRESH_HOURS", float, 24.0, 0.0, "срок годности результата, ч"),
+    Setting("FRONTIER_RETRY_MINUTES", float, 10.0, 0.0, "пауза перед повтором неудачной ссылки, мин"),
+    Setting("FRONTIER_LEASE_SECONDS", float, 900.0, 30.0, "возврат ссылки упавшего воркера в очередь, с"),
+)
+
+
+class _Subscription:
+    __slots__ = ('callback', 'keys')
+
+    def __init__(self, callback, keys):
+        self.callback = callback
+        self.keys = frozenset(keys) if keys else None
+
+
+class ConfigService:
+    """Единая точка чтения config.txt.
+
+    Файл перечитывается, только когда меняется его mtime (проверка не чаще
+    CONFIG_CHECK_SECONDS). Типизированные значения берутся из SETTINGS,
+    некорректные заменяются значением по умолчанию с предупреждением.
+    Подписчики получают набор изменившихся ключей: так работающие задачи
+    подхватывают новые ограничения без перезапуска.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or get_config_path()
+        self._values = {}
+        self._overrides = {}
+        self._mtime = None
+        self._loaded = False
+        self._checked_at = 0.0
+        self._subscribers = []
+        self._warned = set()
+        self._lock = threading.RLock()
+        self._watcher = None
+        self._stop_watching = threading.Event()
+
+    def values(self):
+        """Копия всех значений файла"""
+        self._refresh()
+        with self._lock:
+            return {**self._values, **self._overrides}
+
+    def get(self, key, default=""):
+        self._refresh()
+        with self._lock:
+            if key in self._overrides:
+                return self._overrides[key]
+            return self._values.get(key, default)
+
+    def override(self, values):
+        """Значения поверх config.txt только для текущего процесса (например, флаги командной строки)"""
+        with self._lock:
+            self._overrides.update({key: str(value) for key, value in values.items()})
+
+    def typed(self, key, default=None):
+        """Значение известной настройки в ее типе"""
+        setting = SETTINGS[key]
+        fallback = setting.default if default is None else default
+        raw = self.get(key, "").strip()
+        if not raw:
+            return fallback
+        try:
+            return setting.parse(raw)
+        except (TypeError, ValueError) as e:
+            if (key, raw) not in self._warned:
+                self._warned.add((key, raw))
+                logger.warning(f"Некорректное значение {key}={raw} ({e}), используем {fallback}")
+            return fallback
+
+    def reload(self, force=False):
+        """Перечитывает файл, если он изменился. Возвращает набор изменившихся ключей"""
+        with self._lock:
+            self._checked_at = time.monotonic()
+            try:
+                mtime = os.path.getmtime(self.path)
+            except OSError:
+                mtime = None
+            if not force and mtime is not None and mtime == self._mtime:
+                return set()
+            # Если файла нет, load_config создаст шаблон
+            values = load_config(self.path)
+            if mtime is None:
+                try:
+                    mtime = os.path.getmtime(self.path)
+                except OSError:
+                    pass
+            changed = {
+                key for key in set(values) | set(self._values)
+                if values.get(key) != self._values.get(key)
+            }
+            first_load = not self._loaded
+            self._values = values
+            self._mtime = mtime
+            self._loaded = True
+            subscribers = list(self._subscribers)
+        if changed and not first_load:
+            logger.info(f"Конфигурация изменилась: {', '.join(sorted(changed))}")
+            self._notify(subscribers, changed)
+        return changed
+
+    def subscribe(self, callback, keys=None):
+        """callback(changed_keys) при изменении ключей keys (None — любых). Возвращает функцию отписки"""
+        subscription = _Subscription(callback, keys)
+        with self._lock:
+            self._subscribers.append(subscription)
+
+        def unsubscribe():
+            with self._lock:
+                if subscription in self._subscribers:
+                    self._subscribers.remove(subscription)
+        return unsubscribe
+
+    def update(self, values):
+        """Записывает значения в config.txt, сохраняя остальные строки и комментарии"""
+        values = {key: str(value) for key, value in values.items()}
+        with self._lock:
+            lines = []
+            if os.path.exists(self.path):
+                with open(self.path, "r", encoding="utf-8") as f:
+                    lines = f.read().splitlines()
+            written = set()
+            for index, line in enumerate(lines):
+                key = line.split("=", 1)[0].strip()
+                if "=" in line and not line.lstrip().startswith("#") and key in values:
+                    lines[index] = f"{key}={values[key]}"
+                    written.add(key)
+            lines.extend(f"{key}={value}" for key, value in values.items() if key not in written)
+            with open(self.path, "w", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+        return self.reload(force=True)
+
+    def start_watching(self):
+        """Фоновая проверка файла, чтобы подписчики узнавали об изменениях без обращений к настройкам"""
+        with self._lock:
+            if self._watcher is not None:
+                return
+            self._stop_watching.clear()
+            self._watcher = threading.Thread(target=self._watch, name="config-watcher", daemon=True)
+            self._watcher.start()
+
+    def stop_watching(self):
+        with self._lock:
+            watcher, self._watcher = self._watcher, None
+        if watcher is not None:
+            self._stop_watching.set()
+            watcher.join(timeout=5)
+
+    def _watch(self):
+        while not self._stop_watching.wait(max(self.typed("CONFIG_CHECK_SECONDS"), 0.5)):
+            try:
+                self.reload()
+            except Exception as e:
+                logger.error(f"Ошибка проверки config.txt: {str(e)}")
+
+    def _refresh(self):
+        interval = SETTINGS["CONFIG_CHECK_SECONDS"].default
+        with self._lock:
+            raw = self._values.get("CONFIG_CHECK_SECONDS", "")
+        try:
+            interval = float(raw) if raw.strip() else interval
+        except ValueError:
+            pass
+        if not self._loaded or time.monotonic() - self._checked_at >= interval:
+            self.reload()
+
+    def _notify(self, subscribers, changed):
+        for subscription in subscribers:
+            if subscription.keys is not None and not subscription.keys & changed:
+                continue
+            try:
+                subscription.callback(changed)
+            except Exception as e:
+                logger.error(f"Ошибка обработчика изменения конфигурации: {str(e)}")
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_config():
+    """Общий сервис конфигурации для config.txt в корне приложения"""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = ConfigService()
+        return _service
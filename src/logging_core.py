@@ -0,0 +1,219 @@
+import atexit
+import logging
+import logging.handlers
+import queue
+import random
+import threading
+import time
+
+from src.config_service import get_config
+
+logger = logging.getLogger('logging_core')
+
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# Ограничения по умолчанию для самых разговорчивых модулей (записей INFO и ниже в секунду)
+DEFAULT_RATE_LIMITS = {
+    'seller_info_parser': 20,
+    'src.parser.seller_details_parser': 20,
+    'product_parser': 20,
+    'product_extractor': 10,
+}
+
+# Значения, которые безопасно форматировать позже в фоновом потоке
+_IMMUTABLE_ARGS = (str, int, float, bool, type(None), bytes)
+
+_context_fields = {}
+
+
+def register_context_field(name, getter):
+    """Поле записи, которое снимается в потоке, где запись создана (например, канал задачи)"""
+    _context_fields[name] = getter
+
+
+class ContextQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler без форматирования в горячем пути.
+
+    В очередь уходит копия записи с полями контекста. Сообщение собирается
+    сразу, только если среди аргументов есть изменяемые объекты, иначе это
+    делает фоновый поток QueueListener.
+    """
+
+    def prepare(self, record):
+        record = logging.makeLogRecord(record.__dict__)
+        if record.args and not all(isinstance(arg, _IMMUTABLE_ARGS) for arg in _iter_args(record.args)):
+            record.msg = record.getMessage()
+            record.args = None
+        for name, getter in _context_fields.items():
+            try:
+                setattr(record, name, getter())
+            except Exception:
+                setattr(record, name, None)
+        return record
+
+
+def _iter_args(args):
+    return args.values() if isinstance(args, dict) else args
+
+
+class _Bucket:
+    __slots__ = ('rate', 'tokens', 'updated', 'dropped')
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+        self.dropped = 0
+
+
+class SamplingFilter(logging.Filter):
+    """Выборка и ограничение частоты по модулям для записей ниже WARNING.
+
+    rates: логгер -> записей в секунду, samples: логгер -> доля пропускаемых записей.
+    Правило логгера действует и на его дочерние логгеры. Предупреждения и
+    ошибки проходят всегда.
+    """
+
+    def __init__(self, rates=None, samples=None):
+        super().__init__()
+        self.rates = dict(rates or {})
+        self.samples = dict(samples or {})
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        sample = self._lookup(self.samples, record.name)
+        if sample is not None and random.random() >= sample:
+            return False
+        rate = self._lookup(self.rates, record.name)
+        if rate is None:
+            return True
+        with self._lock:
+            bucket = self._buckets.get(record.name)
+            if bucket is None:
+                bucket = self._buckets[record.name] = _Bucket(rate)
+            now = time.monotonic()
+            bucket.tokens = min(rate, bucket.tokens + (now - bucket.updated) * rate)
+            bucket.updated = now
+            if bucket.tokens < 1:
+                bucket.dropped += 1
+                return False
+            bucket.tokens -= 1
+            dropped, bucket.dropped = bucket.dropped, 0
+        if dropped:
+            # Следующая пропущенная запись сообщает, сколько было подавлено
+            record.msg = f"{record.msg} (подавлено похожих записей: {dropped})"
+        return True
+
+    def stats(self):
+        with self._lock:
+            return {name: bucket.dropped for name, bucket in self._buckets.items() if bucket.dropped}
+
+    @staticmethod
+    def _lookup(rules, name):
+        while name:
+            if name in rules:
+                return rules[name]
+            name = name.rpartition('.')[0]
+        return None
+
+
+class LogPipeline:
+    """Корневой логгер пишет в очередь, обработчики работают в фоновом потоке"""
+
+    def __init__(self):
+        self.queue = queue.SimpleQueue()
+        self.queue_handler = None
+        self.listener = None
+        self.handlers = []
+        self.sampling = None
+        self._lock = threading.Lock()
+
+    def configure(self, handlers, level=logging.INFO, rates=None, samples=None):
+        with self._lock:
+            self._stop_listener()
+            root = logging.getLogger()
+            root.setLevel(level)
+            for handler in root.handlers[:]:
+                root.removeHandler(handler)
+
+            self.handlers = list(handlers)
+            self.sampling = SamplingFilter(rates, samples)
+            self.queue_handler = ContextQueueHandler(self.queue)
+            self.queue_handler.addFilter(self.sampling)
+            root.addHandler(self.queue_handler)
+
+            self.listener = logging.handlers.QueueListener(
+                self.queue, *self.handlers, respect_handler_level=True
+            )
+            self.listener.start()
+
+    def add_handler(self, handler):
+        """Добавление обработчика в фоновый поток (повторное добавление игнорируется)"""
+        with self._lock:
+            if self.listener is None or handler in self.handlers:
+                return
+            self._stop_listener()
+            self.handlers.append(handler)
+            self.listener = logging.handlers.QueueListener(
+                self.queue, *self.handlers, respect_handler_level=True
+            )
+            self.listener.start()
+
+    def stop(self):
+        with self._lock:
+            self._stop_listener()
+
+    def _stop_listener(self):
+        if self.listener is not None:
+            # stop() дописывает все, что уже в очереди
+            self.listener.stop()
+            self.listener = None
+
+
+pipeline = LogPipeline()
+atexit.register(pipeline.stop)
+
+
+def _parse_rules(value, cast):
+    rules = {}
+    for item in value.split(","):
+        name, _, raw = item.partition("=")
+        name, raw = name.strip(), raw.strip().removesuffix("/s")
+        if not name or not raw:
+            continue
+        try:
+            rules[name] = cast(raw)
+        except ValueError:
+            logger.warning(f"Некорректное правило логирования: {item.strip()}")
+    return rules
+
+
+def setup_logging(handlers=None, level=logging.INFO):
+    """Настройка логирования приложения через очередь.
+
+    По умолчанию пишет в консоль. Правила из config.txt:
+    LOG_RATE_LIMITS=логгер=записей_в_секунду,... и LOG_SAMPLE=логгер=доля,...
+    """
+    if handlers is None:
+        console = logging.StreamHandler()
+        console.setFormatter(logging.Formatter(LOG_FORMAT))
+        handlers = [console]
+    config = get_config()
+    rates = dict(DEFAULT_RATE_LIMITS)
+    rates.update(_parse_rules(config.get("LOG_RATE_LIMITS", ""), float))
+    samples = _parse_rules(config.get("LOG_SAMPLE", ""), float)
+    pipeline.configure(handlers, level=level, rates=rates, samples=samples)
+    return pipeline
+
+
+def add_log_handler(handler):
+    """Обработчик, получающий записи в фоновом потоке; без setup_logging — напрямую к корневому логгеру"""
+    if pipeline.listener is None:
+        root = logging.getLogger()
+        if handler not in root.handlers:
+            root.addHandler(handler)
+        return
+    pipeline.add_handler(handler)
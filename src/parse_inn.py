@@ -3,29 +3,34 @@ import os
 import time
 import queue
 from datetime import datetime
-from src.parser.inn_parser import INNParser
+from src.parser.inn_parser import INNParser, seller_results_to_rows
 from src.parser.excel_writer import ExcelWriter
-
-# Настройка логирования
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
+from src.parser.timing import timing_report
+from src.parser.browser_pool import get_browser_pool
+from src.parser.cancellation import JobCancelled
+from src.parser.frontier import crawl
 
 logger = logging.getLogger(__name__)
 
-def run_inn_parser_from_list(urls, log_queue=None):
-    """Запуск парсера ИНН с передачей логов через очередь"""
+def run_inn_parser_from_list(urls, log_queue=None, on_result=None):
+    """Запуск парсера ИНН с передачей логов через очередь.
+
+    on_result(result) получает результат каждого продавца по мере готовности.
+    """
     parser = None
+    pool = get_browser_pool()
+    driver = None
     try:
         if log_queue:
             log_queue.put(f"🔄 Начинаем парсинг ИНН для {len(urls)} продавцов")
         
         # Создаем парсер
-        parser = INNParser(headless=True)
+        # Прогретый браузер из пула, если бот его запустил
+        driver = pool.acquire() if pool else None
+        parser = INNParser(headless=True, driver=driver, on_result=on_result)
         
-        # Парсим URL
-        parser.parse_url_list(urls)
+        # Парсим URL; повторы и свежие результаты прошлых запусков берутся из фронтира
+        parser.results = list(crawl(parser, urls, 'inn-sellers'))
         
         # Сохраняем результаты
         filepath = parser.save_to_excel()
@@ -35,6 +40,9 @@ def run_inn_parser_from_list(urls, log_queue=None):
                 log_queue.put(f"✅ Результаты сохранены в файл: {os.path.basename(filepath)}")
             return f"✅ Парсинг завершен! Результаты сохранены в:\n{os.path.basename(filepath)}", "", filepath
         return "❌ Ошибка при сохранении результатов", "", None
+    except JobCancelled:
+        # Браузер освобождается в finally, обработчик бота сообщит об отмене
+        raise
     except Exception as e:
         error_msg = f"❌ Ошибка при парсинге: {str(e)}"
         if log_queue:
@@ -42,4 +50,17 @@ def run_inn_parser_from_list(urls, log_queue=None):
         return error_msg, error_msg, None
     finally:
         if parser:
-            parser.close()
\ No newline at end of file
+            parser.close()
+        if driver:
+            # После смены сессии из-за антибота в аренде может быть уже другой браузер
+            leased = parser.driver if parser else driver
+            if pool.owns(leased):
+                pool.release(leased)
+        timing_report.log_report()
+
+
+def export_partial_results(results):
+    """Промежуточный Excel по уже обработанным продавцам. Возвращает путь или None"""
+    return ExcelWriter().save_sellers_to_excel(
+        seller_results_to_rows(results), f"sellers_inn_partial_{len(results)}"
+    )
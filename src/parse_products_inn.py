@@ -3,24 +3,29 @@ import os
 import time
 from src.parser.product_inn_parser import ProductINNParser
 from src.parser.excel_writer import ExcelWriter
-
-# Настройка логирования
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
+from src.parser.timing import timing_report
+from src.parser.browser_pool import get_browser_pool
+from src.parser.cancellation import JobCancelled
+from src.parser.frontier import crawl
 
 logger = logging.getLogger(__name__)
 
-def run_product_inn_parser_from_list(urls):
-    """Запуск парсера ИНН для товаров с возвратом результатов"""
+def run_product_inn_parser_from_list(urls, on_result=None):
+    """Запуск парсера ИНН для товаров с возвратом результатов.
+
+    on_result(result) получает результат каждого товара по мере готовности.
+    """
     parser = None
+    pool = get_browser_pool()
+    driver = None
     results = []  # Будем собирать результаты
     
     try:
-        parser = ProductINNParser(headless=True)
-        # Парсим URL
-        parser.parse_url_list(urls)
+        # Прогретый браузер из пула, если бот его запустил
+        driver = pool.acquire() if pool else None
+        parser = ProductINNParser(headless=True, driver=driver, on_result=on_result)
+        # Парсим URL; повторы и свежие результаты прошлых запусков берутся из фронтира
+        parser.results = list(crawl(parser, urls, 'inn-products'))
         results = parser.results  # Сохраняем результаты
         
         # Сохраняем результаты в Excel
@@ -29,9 +34,24 @@ def run_product_inn_parser_from_list(urls):
         if filepath:
             return f"✅ Парсинг завершен! Результаты сохранены в файле: {os.path.basename(filepath)}", "", filepath, results
         return "❌ Ошибка при сохранении результатов", "", None, results
+    except JobCancelled:
+        raise
     except Exception as e:
         error_msg = f"❌ Ошибка при парсинге: {str(e)}"
         return error_msg, error_msg, None, results
     finally:
         if parser:
-            parser.close()
\ No newline at end of file
+            parser.close()
+        if driver:
+            # После смены сессии из-за антибота в аренде может быть уже другой браузер
+            leased = parser.driver if parser else driver
+            if pool.owns(leased):
+                pool.release(leased)
+        timing_report.log_report()
+
+
+def export_partial_results(results):
+    """Промежуточный Excel по уже обработанным товарам. Возвращает путь или None"""
+    return ExcelWriter().save_sellers_from_products(
+        results, filename_prefix=f"sellers_from_products_partial_{len(results)}"
+    )
@@ -1,7 +1,9 @@
 import logging
 import asyncio
-from src.parser.ozon_parser import OzonSellerParser
-from src.parser.seller_products_parser import OzonProductParser
+from src.parser.seller_pipeline import SellerPipeline
+from src.parser.timing import timing_report
+from src.parser.browser_pool import lease_driver
+from src.parser.cancellation import JobCancelled
 
 logger = logging.getLogger('parse_seller_and_products')
 
@@ -9,14 +11,14 @@ logger = logging.getLogger('parse_seller_and_products')
 # Сохраняем старую синхронную функцию для совместимости
 def parse_seller_and_products(seller_url, headless=True):
     try:
-        # Парсинг информации о продавце
-        seller_parser = OzonSellerParser(headless=True)
-        seller_result = seller_parser.parse_seller(seller_url)
+        # Продавец и товары за одну загрузку страницы в одном браузере
+        with lease_driver() as driver:
+            result = SellerPipeline(headless=headless, driver=driver).run(seller_url)
         
-        
-        # Парсинг товаров
-        product_parser = OzonProductParser(headless=headless)
-        success, excel_path,seller_name = product_parser.parse_products(seller_url)
+        seller_result = result['seller']
+        success = result['success']
+        excel_path = result['excel_path']
+        seller_name = result['seller_name']
         
         print(success, 'success')
         print(excel_path, 'excel_path')
@@ -37,14 +39,18 @@ def parse_seller_and_products(seller_url, headless=True):
         
         return {
             'seller': {**seller_result,'seller_name':seller_name},
-            'products': product_parser.get_products(),
+            'products': result['products'],
             'excel_path': excel_path,
             'success': success,
             'seller_info': seller_info
         }
+    except JobCancelled:
+        raise
     except Exception as e:
         logger.error(f"Общая ошибка: {str(e)}")
         return {
             'success': False,
             'error': str(e)
-        }
\ No newline at end of file
+        }
+    finally:
+        timing_report.log_report()
\ No newline at end of file
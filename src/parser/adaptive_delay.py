@@ -0,0 +1,220 @@
+# parser/adaptive_delay.py
+import logging
+import threading
+from contextlib import contextmanager
+
+from .cancellation import cancellable_sleep, current_token
+from .timing import timing_report
+
+logger = logging.getLogger(__name__)
+
+# Шаг ожидания места воркера: между шагами проверяется отмена задачи
+SLOT_WAIT_STEP = 0.5
+
+
+class AdaptiveDelayController:
+    """AIMD-регулятор пауз, таймаутов загрузки и числа параллельных воркеров.
+
+    Успешные загрузки и тултипы понемногу ускоряют работу (аддитивно уменьшают
+    множитель пауз и увеличивают параллелизм), признаки антибота резко
+    замедляют (множитель удваивается, параллелизм делится пополам).
+
+    Регулятор общий для процесса: антибот и время загрузки относятся к выходному
+    IP, а не к задаче, поэтому замедление после проверки действует на все
+    идущие задачи. Собственный предел воркеров у каждой задачи свой — его
+    задает job_slots, и задачи не меняют настройки друг друга.
+    """
+
+    def __init__(self, min_factor=0.3, max_factor=4.0, step=0.05, max_concurrency=5,
+                 success_streak=10, ewma_alpha=0.2):
+        self.min_factor = min_factor
+        self.max_factor = max_factor
+        self.step = step
+        self.max_concurrency = max_concurrency
+        self.success_streak = success_streak
+        self.ewma_alpha = ewma_alpha
+
+        self.factor = 1.0
+        self.concurrency = max_concurrency
+        self._streak = 0
+        self._load_times = {}
+        self._tooltips = {'ok': 0, 'failed': 0}
+        self._challenges = 0
+        self._default_concurrency = max_concurrency
+        self._jobs = []
+        self._cond = threading.Condition()
+        self._publish()
+
+    def job_slots(self, max_concurrency):
+        """Предел воркеров одной задачи, например из MAX_PARSE_WORKERS. Закрывается через close()"""
+        slots = JobSlots(self, max_concurrency)
+        with self._cond:
+            self._jobs.append(slots)
+            self._update_ceiling()
+        return slots
+
+    def _update_ceiling(self):
+        """Верхняя граница общего параллелизма — наибольший предел среди идущих задач"""
+        ceiling = max((job.max_concurrency for job in self._jobs), default=self._default_concurrency)
+        self.max_concurrency = ceiling
+        self.concurrency = min(self.concurrency, ceiling) if self._challenges else ceiling
+        self._publish()
+        self._cond.notify_all()
+
+    # --- сигналы ---
+
+    def record_load(self, page_type, seconds):
+        """Время загрузки страницы заданного типа (seller, product, category)"""
+        with self._cond:
+            previous = self._load_times.get(page_type)
+            if previous is None:
+                self._load_times[page_type] = seconds
+            else:
+                self._load_times[page_type] = previous + self.ewma_alpha * (seconds - previous)
+            self._on_success()
+
+    def record_tooltip(self, success):
+        with self._cond:
+            if success:
+                self._tooltips['ok'] += 1
+                self._on_success()
+            else:
+                # Тултип не появился: скорее всего не успел отрисоваться, замедляемся мягко
+                self._tooltips['failed'] += 1
+                self._streak = 0
+                self.factor = min(self.max_factor, self.factor + self.step * 2)
+                self._publish()
+
+    def record_challenge(self):
+        with self._cond:
+            self._challenges += 1
+            self._streak = 0
+            self.factor = min(self.max_factor, self.factor * 2)
+            self.concurrency = max(1, self.concurrency // 2)
+            self._publish()
+            self._cond.notify_all()
+        logger.warning(
+            f"Антибот: множитель пауз {self.factor:.2f}, параллельных воркеров {self.concurrency}"
+        )
+
+    # --- применение ---
+
+    def delay(self, base):
+        return base * self.factor
+
+    def sleep(self, base, deadline=None):
+        """Пауза base секунд с учетом текущего множителя, прерываемая отменой задачи и deadline"""
+        cancellable_sleep(self.delay(base), deadline)
+
+    def load_timeout(self, page_type, default):
+        """Таймаут ожидания загрузки: втрое больше среднего времени, но не больше 2×default"""
+        average = self._load_times.get(page_type)
+        if average is None:
+            return default
+        return int(min(default * 2, max(10, average * 3 + 5)))
+
+    def snapshot(self):
+        with self._cond:
+            return {
+                'delay_factor': round(self.factor, 2),
+                'concurrency': self.concurrency,
+                'load_times': {k: round(v, 2) for k, v in self._load_times.items()},
+                'tooltips': dict(self._tooltips),
+                'challenges': self._challenges,
+            }
+
+    def _on_success(self):
+        self.factor = max(self.min_factor, self.factor - self.step)
+        self._streak += 1
+        if self._streak >= self.success_streak and self.concurrency < self.max_concurrency:
+            self.concurrency += 1
+            self._streak = 0
+            self._cond.notify_all()
+        self._publish()
+
+    def _publish(self):
+        timing_report.set_gauge('adaptive_delay_factor', round(self.factor, 2))
+        timing_report.set_gauge('adaptive_concurrency', self.concurrency)
+        for page_type, seconds in self._load_times.items():
+            timing_report.set_gauge(f'adaptive_load_{page_type}', round(seconds, 2))
+        total = self._tooltips['ok'] + self._tooltips['failed']
+        if total:
+            timing_report.set_gauge('adaptive_tooltip_success', f"{self._tooltips['ok']}/{total}")
+        timing_report.set_gauge('adaptive_challenges', self._challenges)
+
+
+class JobSlots:
+    """Места воркеров одной задачи.
+
+    Задача запускает не больше своих max_concurrency воркеров и не больше
+    текущего общего параллелизма регулятора.
+    """
+
+    def __init__(self, controller, max_concurrency):
+        self.controller = controller
+        self.max_concurrency = max(1, max_concurrency)
+        self._active = 0
+
+    def close(self):
+        """Задача завершена: ее предел больше не влияет на общий параллелизм"""
+        with self.controller._cond:
+            if self in self.controller._jobs:
+                self.controller._jobs.remove(self)
+            self.controller._update_ceiling()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def limit(self):
+        return max(1, min(self.max_concurrency, self.controller.concurrency))
+
+    def configure(self, max_concurrency):
+        """Новый предел воркеров задачи (MAX_PARSE_WORKERS на лету)"""
+        with self.controller._cond:
+            self.max_concurrency = max(1, max_concurrency)
+            self.controller._update_ceiling()
+
+    def acquire(self, deadline=None):
+        """Место воркера задачи. Ожидание прерывает отмена задачи (JobCancelled) и исчерпание deadline"""
+        cond = self.controller._cond
+        token = current_token()
+        with cond:
+            while self._active >= self.limit:
+                if deadline is not None:
+                    deadline.check("ожидание места воркера")
+                elif token is not None:
+                    token.check()
+                cond.wait(SLOT_WAIT_STEP)
+            self._active += 1
+
+    def release(self):
+        with self.controller._cond:
+            self._active -= 1
+            self.controller._cond.notify_all()
+
+    @contextmanager
+    def worker_slot(self, deadline=None):
+        """Ограничение числа одновременно работающих воркеров задачи"""
+        self.acquire(deadline)
+        try:
+            yield
+        finally:
+            self.release()
+
+
+def page_type_for_url(url):
+    """Тип страницы Ozon по URL для раздельной статистики загрузок"""
+    if '/product/' in url:
+        return 'product'
+    if '/seller/' in url:
+        return 'seller'
+    if '/category/' in url:
+        return 'category'
+    return 'other'
+
+
+delay_controller = AdaptiveDelayController()
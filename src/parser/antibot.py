@@ -0,0 +1,82 @@
+# parser/antibot.py
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Сколько раз URL возвращается в очередь после проверки антибота
+MAX_CHALLENGE_REQUEUES = 2
+
+# Один скрипт на проверку: заголовок, короткий фрагмент текста и характерная разметка
+CHALLENGE_SCRIPT = r"""
+// У обычных страниц есть основной макет; страница проверки отдается без него.
+// Заголовок и текст обычной страницы (названия товаров, отзывы) могут содержать
+// те же фразы, поэтому все признаки проверяются только без макета
+if (document.querySelector('#layoutPage')) return null;
+
+const title = (document.title || '').toLowerCase();
+const titleMarkers = ['доступ ограничен', 'access denied', 'attention required', 'just a moment', 'captcha', 'antibot'];
+for (const marker of titleMarkers) {
+    if (title.includes(marker)) return 'title: ' + marker;
+}
+
+const body = document.body;
+const text = body ? (body.innerText || '').slice(0, 2000).toLowerCase() : '';
+const textMarkers = [
+    'подтвердите, что вы не робот', 'вы не робот', 'доступ ограничен',
+    'слишком много запросов', 'too many requests', 'access denied', 'verify you are human'
+];
+for (const marker of textMarkers) {
+    if (text.includes(marker)) return 'text: ' + marker;
+}
+
+// Только разметка самих страниц проверки: блоки с "captcha" в классе и data-sitekey
+// встречаются и в обычной верстке Ozon (формы входа, отзывы)
+const selectors = [
+    'form#challenge-form', '#challenge-running', '#cf-challenge-running',
+    'iframe[src*="challenges.cloudflare.com"]', 'iframe[src*="hcaptcha.com"]', 'iframe[src*="/recaptcha/"]'
+];
+for (const selector of selectors) {
+    if (document.querySelector(selector)) return 'markup: ' + selector;
+}
+return null;
+"""
+
+
+class ChallengeDetectedError(Exception):
+    """Ozon показал страницу проверки антибота вместо контента"""
+
+    def __init__(self, url, reason):
+        super().__init__(f"Обнаружена проверка антибота ({reason}): {url}")
+        self.url = url
+        self.reason = reason
+
+
+class ChallengeDetector:
+    """Быстрое распознавание страниц проверки и блокировки после навигации"""
+
+    def detect(self, driver):
+        """Причина срабатывания или None, если страница обычная"""
+        try:
+            return driver.execute_script(CHALLENGE_SCRIPT)
+        except Exception as e:
+            logger.debug(f"Не удалось проверить страницу на антибот: {str(e)}")
+            return None
+
+    def check(self, driver, url=None):
+        """Проверка страницы: при срабатывании помечает сессию и бросает ChallengeDetectedError"""
+        reason = self.detect(driver)
+        if not reason:
+            return
+        if url is None:
+            try:
+                url = driver.current_url
+            except Exception:
+                url = "?"
+        # Сессия с проверкой больше не используется: пул закроет ее при возврате
+        driver.challenge_detected_at = time.monotonic()
+        logger.warning(f"Антибот на {url}: {reason}")
+        raise ChallengeDetectedError(url, reason)
+
+
+challenge_detector = ChallengeDetector()
@@ -0,0 +1,380 @@
+# parser/browser_pool.py
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from src.config_service import get_config
+from .stealth_driver import create_stealth_driver
+from .cancellation import CancellationToken, JobCancelled, current_token, use_token
+from .proxy_pool import ProxyUnavailableError, get_proxy_pool, proxy_wait_limit
+from .timing import timing_report
+
+logger = logging.getLogger(__name__)
+
+# Шаг ожидания свободного браузера: между шагами проверяется отмена задачи
+ACQUIRE_WAIT_STEP = 0.5
+# Сколько прогрев ждет свободный прокси, прежде чем отложить запуск до следующего круга
+WARM_UP_PROXY_WAIT = 10
+# Сколько shutdown ждет завершения фоновых потоков (запуск Chrome может идти долго)
+SHUTDOWN_JOIN_TIMEOUT = 60
+
+
+class PooledBrowser:
+    """Браузер в пуле и его статистика использования"""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.leases = 0
+
+
+class BrowserPool:
+    """Пул прогретых stealth браузеров, которые живут между задачами бота.
+
+    Браузеры выдаются в аренду через lease()/acquire() и возвращаются через release().
+    Фоновый поток проверяет живость простаивающих браузеров и закрывает лишние
+    после idle_timeout. Отдельный поток держит наготове min_idle экземпляров:
+    долгий запуск Chrome или ожидание прокси не останавливают обслуживание.
+    """
+
+    def __init__(self, max_size=2, min_idle=1, idle_timeout=600, headless=True,
+                 max_leases=50, check_interval=30, factory=None):
+        self.max_size = max_size
+        self.min_idle = min(min_idle, max_size)
+        self.idle_timeout = idle_timeout
+        self.headless = headless
+        self.max_leases = max_leases
+        self.check_interval = check_interval
+        self.factory = factory or (lambda: create_stealth_driver(headless=self.headless))
+
+        self._cond = threading.Condition()
+        self._idle = []
+        self._leased = {}
+        self._total = 0
+        self._closed = False
+        self._stop_event = threading.Event()
+        # Отменяется при остановке пула и прерывает ожидание прокси в прогреве
+        self._stop_token = CancellationToken()
+        self._threads = []
+
+    def start(self):
+        """Запуск фонового обслуживания и прогрев min_idle браузеров"""
+        self._threads = [
+            threading.Thread(target=self._maintenance_loop, name="browser-pool", daemon=True),
+            threading.Thread(target=self._warm_up_loop, name="browser-pool-warmup", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        logger.info(f"Пул браузеров запущен: до {self.max_size}, прогретых {self.min_idle}")
+
+    def acquire(self, timeout=None, spawn=True):
+        """Аренда браузера. Возвращает None, если за timeout свободный не появился.
+
+        Ожидание прерывается отменой текущей задачи (JobCancelled). spawn=False
+        выдает только уже запущенный простаивающий браузер, не создавая новый.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        token = current_token()
+        with timing_report.measure('browser_lease_wait'):
+            while True:
+                if token is not None:
+                    token.check()
+                entry = None
+                with self._cond:
+                    if self._closed:
+                        raise RuntimeError("Пул браузеров остановлен")
+                    if self._idle:
+                        entry = self._idle.pop()
+                    elif spawn and self._total < self.max_size:
+                        self._total += 1
+                    else:
+                        remaining = None if deadline is None else deadline - time.monotonic()
+                        if remaining is not None and remaining <= 0:
+                            return None
+                        step = ACQUIRE_WAIT_STEP if remaining is None else min(remaining, ACQUIRE_WAIT_STEP)
+                        self._cond.wait(step)
+                        continue
+
+                if entry is None:
+                    entry = self._create_entry()
+                elif not self.is_healthy(entry.driver):
+                    logger.warning("Браузер из пула не отвечает, заменяем")
+                    self._discard(entry)
+                    continue
+
+                with self._cond:
+                    entry.leases += 1
+                    self._leased[id(entry.driver)] = entry
+                    self._update_gauges()
+                return entry.driver
+
+    def release(self, driver, broken=False):
+        """Возврат браузера в пул; сломанные и изношенные браузеры закрываются"""
+        with self._cond:
+            entry = self._leased.pop(id(driver), None)
+        if entry is None:
+            logger.warning("Попытка вернуть в пул чужой браузер")
+            return
+
+        # Сессию, получившую проверку антибота, не возвращаем в оборот
+        flagged = getattr(driver, 'challenge_detected_at', None) is not None
+        if broken or flagged or self._closed or entry.leases >= self.max_leases or not self._reset(driver):
+            self._discard(entry)
+            return
+
+        with self._cond:
+            entry.last_used = time.monotonic()
+            self._idle.append(entry)
+            self._update_gauges()
+            self._cond.notify()
+
+    def owns(self, driver):
+        """Арендован ли этот браузер из пула"""
+        with self._cond:
+            return id(driver) in self._leased
+
+    def rotate(self, driver, timeout=None):
+        """Замена арендованного браузера другим: старый закрывается, выдается новый"""
+        self.release(driver, broken=True)
+        return self.acquire(timeout)
+
+    @contextmanager
+    def lease(self, timeout=None):
+        """Контекстный менеджер аренды браузера"""
+        driver = self.acquire(timeout)
+        if driver is None:
+            raise TimeoutError("Нет свободного браузера в пуле")
+        broken = False
+        try:
+            yield driver
+        except Exception:
+            broken = not self.is_healthy(driver)
+            raise
+        finally:
+            self.release(driver, broken=broken)
+
+    def is_healthy(self, driver):
+        try:
+            driver.execute_script("return 1")
+            return bool(driver.window_handles)
+        except Exception:
+            return False
+
+    def stats(self):
+        with self._cond:
+            return {'total': self._total, 'idle': len(self._idle), 'leased': len(self._leased)}
+
+    def shutdown(self):
+        """Остановка пула и закрытие всех браузеров.
+
+        Браузер, запуск которого завершится уже после остановки, закрывается
+        сразу (см. _create_entry).
+        """
+        self._stop_event.set()
+        self._stop_token.cancel("пул браузеров остановлен")
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join(SHUTDOWN_JOIN_TIMEOUT)
+        with self._cond:
+            entries = self._idle + list(self._leased.values())
+            self._idle = []
+            self._leased = {}
+            self._cond.notify_all()
+        for entry in entries:
+            self._quit(entry.driver)
+        with self._cond:
+            self._total = 0
+            self._update_gauges()
+        logger.info(f"Пул браузеров остановлен, закрыто {len(entries)} браузеров")
+
+    def _create_entry(self):
+        try:
+            with timing_report.measure('browser_pool_spawn'):
+                driver = self.factory()
+        except Exception:
+            with self._cond:
+                self._total = max(0, self._total - 1)
+                self._cond.notify()
+            raise
+        with self._cond:
+            closed = self._closed
+            if closed:
+                self._total = max(0, self._total - 1)
+        if closed:
+            # Пул остановили, пока браузер запускался: он никому не достанется
+            self._quit(driver)
+            raise RuntimeError("Пул браузеров остановлен")
+        logger.info("Новый браузер добавлен в пул")
+        return PooledBrowser(driver)
+
+    def _reset(self, driver):
+        """Подготовка браузера к следующей задаче: одна вкладка на about:blank.
+
+        Cookies и localStorage сохраняются, чтобы браузер оставался прогретым.
+        """
+        try:
+            handles = driver.window_handles
+            for handle in handles[1:]:
+                driver.switch_to.window(handle)
+                driver.close()
+            driver.switch_to.window(handles[0])
+            driver.get("about:blank")
+            return True
+        except Exception as e:
+            logger.warning(f"Не удалось подготовить браузер к повторному использованию: {str(e)}")
+            return False
+
+    def _discard(self, entry):
+        self._quit(entry.driver)
+        with self._cond:
+            self._total = max(0, self._total - 1)
+            self._update_gauges()
+            self._cond.notify()
+
+    def _quit(self, driver):
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.debug(f"Ошибка при закрытии браузера пула: {str(e)}")
+
+    def _maintenance_loop(self):
+        while not self._stop_event.is_set():
+            try:
+                self._evict_idle()
+                self._check_idle_health()
+            except Exception as e:
+                logger.error(f"Ошибка обслуживания пула браузеров: {str(e)}")
+            self._stop_event.wait(self.check_interval)
+
+    def _warm_up_loop(self):
+        # Остановка пула отменяет токен и прерывает ожидание прокси внутри фабрики
+        with use_token(self._stop_token), proxy_wait_limit(WARM_UP_PROXY_WAIT):
+            while not self._stop_event.is_set():
+                try:
+                    self._warm_up()
+                except (JobCancelled, ProxyUnavailableError) as e:
+                    logger.debug(f"Прогрев пула браузеров отложен: {str(e)}")
+                except Exception as e:
+                    if not self._closed:
+                        logger.error(f"Ошибка прогрева пула браузеров: {str(e)}")
+                self._stop_event.wait(self.check_interval)
+
+    def _evict_idle(self):
+        now = time.monotonic()
+        evicted = []
+        with self._cond:
+            # Старые браузеры в начале списка, выдаются последними
+            while len(self._idle) > self.min_idle and now - self._idle[0].last_used > self.idle_timeout:
+                evicted.append(self._idle.pop(0))
+        for entry in evicted:
+            logger.info("Закрываем простаивающий браузер пула")
+            self._discard(entry)
+
+    def _check_idle_health(self):
+        with self._cond:
+            entries = self._idle
+            self._idle = []
+        alive = []
+        for entry in entries:
+            if self.is_healthy(entry.driver):
+                alive.append(entry)
+            else:
+                logger.warning("Браузер пула не прошел проверку, закрываем")
+                self._discard(entry)
+        with self._cond:
+            self._idle = alive + self._idle
+            self._update_gauges()
+            self._cond.notify_all()
+
+    def _warm_up(self):
+        while not self._stop_event.is_set():
+            with self._cond:
+                if len(self._idle) >= self.min_idle or self._total >= self.max_size:
+                    return
+                self._total += 1
+            entry = self._create_entry()
+            with self._cond:
+                closed = self._closed
+                if not closed:
+                    self._idle.append(entry)
+                    self._update_gauges()
+                    self._cond.notify()
+            if closed:
+                self._quit(entry.driver)
+                return
+
+    def _update_gauges(self):
+        timing_report.set_gauge('browser_pool_total', self._total)
+        timing_report.set_gauge('browser_pool_idle', len(self._idle))
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def start_browser_pool(config=None, max_size=None, headless=None):
+    """Запуск общего пула по настройкам BROWSER_POOL_* из config.txt.
+
+    BROWSER_POOL_SIZE=0 отключает пул, тогда парсеры создают браузеры сами. Без
+    BROWSER_POOL_SIZE размер пула равен BROWSER_BUDGET: каждой допущенной
+    планировщиком задаче достается браузер. max_size и headless заменяют
+    настройки только для этого пула, не меняя общий конфиг.
+    """
+    global _pool
+    config = config if config is not None else get_config()
+    with _pool_lock:
+        if _pool is not None:
+            return _pool
+        try:
+            if max_size is None:
+                max_size = config.typed("BROWSER_POOL_SIZE", default=config.typed("BROWSER_BUDGET"))
+            if headless is None:
+                headless = config.typed("BROWSER_POOL_HEADLESS")
+            if max_size <= 0:
+                logger.info("Пул браузеров отключен настройкой BROWSER_POOL_SIZE")
+                return None
+            min_idle = config.typed("BROWSER_POOL_MIN_IDLE")
+            proxy_pool = get_proxy_pool()
+            if proxy_pool and proxy_pool.capacity < max_size:
+                # Браузер держит прокси, пока жив: больше браузеров, чем мест на прокси, не запустить
+                logger.info(f"Размер пула браузеров ограничен емкостью пула прокси: {proxy_pool.capacity}")
+                max_size = proxy_pool.capacity
+            _pool = BrowserPool(
+                max_size=max_size,
+                min_idle=min(min_idle, max_size),
+                idle_timeout=config.typed("BROWSER_POOL_IDLE_TIMEOUT"),
+                headless=headless,
+            )
+            _pool.start()
+        except Exception as e:
+            logger.error(f"Не удалось запустить пул браузеров: {str(e)}")
+            _pool = None
+        return _pool
+
+
+def get_browser_pool():
+    return _pool
+
+
+def stop_browser_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
+
+
+@contextmanager
+def lease_driver(timeout=None):
+    """Аренда браузера из общего пула; если пул не запущен, возвращает None"""
+    pool = get_browser_pool()
+    if pool is None:
+        yield None
+        return
+    with pool.lease(timeout) as driver:
+        yield driver
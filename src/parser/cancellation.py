@@ -0,0 +1,76 @@
+# parser/cancellation.py
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+from .deadline import DeadlineExceeded
+
+
+class JobCancelled(DeadlineExceeded):
+    """Задачу отменили: пользователь нажал «Отмена» или бот останавливается.
+
+    Наследуется от DeadlineExceeded, поэтому проходит через все места, где
+    парсеры уже пропускают исчерпание бюджета времени наверх.
+    """
+
+
+class CancellationToken:
+    """Флаг отмены задачи, который парсеры проверяют в циклах и ожиданиях"""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self.reason = None
+
+    def cancel(self, reason="отменено"):
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def check(self):
+        """Бросает JobCancelled, если задачу отменили"""
+        if self._event.is_set():
+            raise JobCancelled(f"Задача отменена: {self.reason}")
+
+    def wait(self, timeout):
+        """Пауза до timeout секунд, прерываемая отменой. True, если отменили"""
+        return self._event.wait(timeout)
+
+
+_current_token = contextvars.ContextVar('cancellation_token', default=None)
+
+
+def current_token():
+    """Токен текущей задачи. asyncio.to_thread переносит его в поток парсера"""
+    return _current_token.get()
+
+
+def cancellable_sleep(seconds, deadline=None):
+    """Пауза, которую прерывает отмена текущей задачи (JobCancelled).
+
+    С deadline пауза обрезается по остатку бюджета, а его исчерпание
+    прерывает работу DeadlineExceeded.
+    """
+    if deadline is not None:
+        deadline.sleep(seconds)
+        return
+    token = current_token()
+    if token is None:
+        time.sleep(seconds)
+        return
+    token.check()
+    token.wait(seconds)
+    token.check()
+
+
+@contextmanager
+def use_token(token):
+    reset = _current_token.set(token)
+    try:
+        yield token
+    finally:
+        _current_token.reset(reset)
@@ -3,9 +3,13 @@ import time
 import os
 import tempfile
 import threading
-from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 import selenium_stealth
+from ..driver_resolver import create_chrome_driver
+from ..chrome_service import find_free_port
+from ..browser_pool import get_browser_pool
+from ..adaptive_delay import delay_controller
+from ..proxy_pool import assign_proxy, bind_proxy, release_proxy
 
 logger = logging.getLogger('parser.category_inn_parser.driver_manager')
 
@@ -22,74 +26,16 @@ class DriverManager:
             self._driver_counter += 1
             driver_id = self._driver_counter
         
-        options = Options()
-
-        # Создаем уникальную папку для пользовательских данных
-        temp_dir = tempfile.mkdtemp(prefix=f"chrome_profile_{driver_id}_")
-        options.add_argument(f'--user-data-dir={temp_dir}')
-        
-        # Уникальный порт для отладки
-        debug_port = 9222 + driver_id
-        options.add_argument(f'--remote-debugging-port={debug_port}')
-
-        # options.add_argument('--headless')  
-        options.add_argument('--no-sandbox')
-        options.add_argument('--disable-dev-shm-usage')
-        options.add_argument('--disable-gpu')
-        options.add_argument('--window-size=1920,1080')
-        options.add_argument('--start-maximized')
-        options.add_argument('--disable-features=VizDisplayCompositor')
-        
-        options.add_argument('--disable-blink-features=AutomationControlled')
-        options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        options.add_experimental_option('useAutomationExtension', False)
-        
-        # Увеличиваем лимиты для множественных вкладок
-        options.add_argument('--max_old_space_size=4096')
-        options.add_argument('--disable-background-timer-throttling')
-        options.add_argument('--disable-backgrounding-occluded-windows')
-        options.add_argument('--disable-renderer-backgrounding')
-        
-        # Дополнительные опции для стабильности при множественных процессах
-        options.add_argument('--no-first-run')
-        options.add_argument('--disable-default-apps')
-        options.add_argument('--disable-infobars')
-        options.add_argument('--disable-web-security')
-        options.add_argument('--allow-running-insecure-content')
-        
-        options.add_argument(
-            '--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
-            'AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-        )
-        
-        try:
-            driver = webdriver.Chrome(options=options)
-            logger.info(f"Драйвер {driver_id} создан с профилем: {temp_dir}")
-        except Exception as e:
-            logger.error(f"Ошибка создания драйвера {driver_id}: {str(e)}")
-            # Пытаемся очистить временную папку при ошибке
-            try:
-                import shutil
-                shutil.rmtree(temp_dir, ignore_errors=True)
-            except:
-                pass
-            raise
-        
-        selenium_stealth.stealth(
-            driver,
-            languages=["ru-RU", "ru"],
-            vendor="Google Inc.",
-            platform="Win32",
-            webgl_vendor="Intel Inc.",
-            renderer="Intel Iris OpenGL Engine",
-            fix_hairline=True,
-        )
-        
-        driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-        driver.execute_cdp_cmd('Network.setUserAgentOverride', {
-            "userAgent": 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
-                         'AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-        })
+        # Сначала пробуем взять уже запущенный свободный браузер из пула, не дожидаясь его.
+        # Новый браузер пул не создает: его настройки задает _create_driver
+        pool = get_browser_pool()
+        driver = pool.acquire(timeout=0, spawn=False) if pool else None
+        if driver:
+            driver._browser_pool = pool
+            driver._temp_profile_dir = None
+            logger.info(f"Драйвер {driver_id} взят из пула браузеров")
+        else:
+            driver = self._create_driver(driver_id)
 
         # Функция для проверки и очистки вкладок
         def validate_tabs():
@@ -155,8 +101,6 @@ class DriverManager:
             except:
                 return 0
 
-        # Сохраняем путь к временной папке для последующей очистки
-        driver._temp_profile_dir = temp_dir
         driver._driver_id = driver_id
         
         # Прикрепляем функции к драйверу
@@ -166,12 +110,91 @@ class DriverManager:
 
         return driver
 
+    def _create_driver(self, driver_id):
+        """Запуск нового Chrome с отдельным профилем"""
+        options = Options()
+
+        # Создаем уникальную папку для пользовательских данных
+        temp_dir = tempfile.mkdtemp(prefix=f"chrome_profile_{driver_id}_")
+        options.add_argument(f'--user-data-dir={temp_dir}')
+        
+        # Порт для отладки: 9222+id, если он свободен, иначе любой свободный
+        debug_port = find_free_port(9222 + driver_id)
+        options.add_argument(f'--remote-debugging-port={debug_port}')
+
+        # options.add_argument('--headless')  
+        options.add_argument('--no-sandbox')
+        options.add_argument('--disable-dev-shm-usage')
+        options.add_argument('--disable-gpu')
+        options.add_argument('--window-size=1920,1080')
+        options.add_argument('--start-maximized')
+        options.add_argument('--disable-features=VizDisplayCompositor')
+        
+        options.add_argument('--disable-blink-features=AutomationControlled')
+        options.add_experimental_option("excludeSwitches", ["enable-automation"])
+        options.add_experimental_option('useAutomationExtension', False)
+        
+        # Увеличиваем лимиты для множественных вкладок
+        options.add_argument('--max_old_space_size=4096')
+        options.add_argument('--disable-background-timer-throttling')
+        options.add_argument('--disable-backgrounding-occluded-windows')
+        options.add_argument('--disable-renderer-backgrounding')
+        
+        # Дополнительные опции для стабильности при множественных процессах
+        options.add_argument('--no-first-run')
+        options.add_argument('--disable-default-apps')
+        options.add_argument('--disable-infobars')
+        options.add_argument('--disable-web-security')
+        options.add_argument('--allow-running-insecure-content')
+        
+        options.add_argument(
+            '--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
+            'AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+        )
+        
+        proxy = None
+        try:
+            proxy = assign_proxy(options)
+            driver = create_chrome_driver(options)
+            bind_proxy(driver, proxy)
+            logger.info(f"Драйвер {driver_id} создан с профилем: {temp_dir}")
+        except Exception as e:
+            release_proxy(proxy)
+            logger.error(f"Ошибка создания драйвера {driver_id}: {str(e)}")
+            # Пытаемся очистить временную папку при ошибке
+            try:
+                import shutil
+                shutil.rmtree(temp_dir, ignore_errors=True)
+            except:
+                pass
+            raise
+        
+        selenium_stealth.stealth(
+            driver,
+            languages=["ru-RU", "ru"],
+            vendor="Google Inc.",
+            platform="Win32",
+            webgl_vendor="Intel Inc.",
+            renderer="Intel Iris OpenGL Engine",
+            fix_hairline=True,
+        )
+        
+        driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+        driver.execute_cdp_cmd('Network.setUserAgentOverride', {
+            "userAgent": 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
+                         'AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+        })
+
+        # Сохраняем путь к временной папке для последующей очистки
+        driver._temp_profile_dir = temp_dir
+        return driver
+
     def simulate_human_behavior(self, driver):
         """Имитация человеческого поведения для обхода детекции"""
         try:
             # Случайный скролл
             driver.execute_script("window.scrollTo(0, Math.floor(Math.random() * 500));")
-            time.sleep(0.5)  # Уменьшаем задержку для ускорения
+            delay_controller.sleep(0.5)
             
             # Движение мыши (имитация через JavaScript)
             driver.execute_script("""
@@ -184,7 +207,7 @@ class DriverManager:
                 });
                 document.dispatchEvent(event);
             """)
-            time.sleep(0.3)  # Уменьшаем задержку
+            delay_controller.sleep(0.3)
             
         except Exception as e:
             logger.debug(f"Ошибка при имитации поведения: {str(e)}")
@@ -195,6 +218,12 @@ class DriverManager:
             temp_dir = None
             driver_id = "unknown"
             
+            pool = getattr(driver, '_browser_pool', None)
+            if pool:
+                pool.release(driver)
+                logger.info(f"Драйвер {getattr(driver, '_driver_id', 'unknown')} возвращен в пул")
+                return
+
             try:
                 # Получаем информацию о драйвере
                 temp_dir = getattr(driver, '_temp_profile_dir', None)
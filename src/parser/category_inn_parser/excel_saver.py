@@ -9,11 +9,8 @@ logger = logging.getLogger('parser.excel_saver')
 
 class ExcelSaver:
     def __init__(self, output_dir="output"):
+        # Папка создается при первом сохранении
         self.output_dir = output_dir
-        
-        # Создаем папку output если её нет
-        if not os.path.exists(self.output_dir):
-            os.makedirs(self.output_dir)
     
     def _get_border(self):
         """Создание границ для ячеек Excel"""
@@ -129,6 +126,7 @@ class ExcelSaver:
             self._create_stats_sheet(wb, sellers_data, category_name)
             
             # Сохраняем файл
+            os.makedirs(self.output_dir, exist_ok=True)
             wb.save(filepath)
             logger.info(f"Excel файл успешно сохранен: {filepath}")
             
@@ -1,17 +1,13 @@
 import logging
 import os
 from datetime import datetime
-from aiogram.types import FSInputFile
 
 logger = logging.getLogger('parser.file_manager')
 
 class FileManager:
     def __init__(self, output_dir="output"):
+        # Папка создается при первом сохранении
         self.output_dir = output_dir
-        
-        # Создаем папку output если её нет
-        if not os.path.exists(self.output_dir):
-            os.makedirs(self.output_dir)
 
     def save_links_to_file(self, links, category_name):
         """Сохранение ссылок в файл"""
@@ -19,6 +15,7 @@ class FileManager:
             filename = f"links_{category_name}.txt"
             filepath = os.path.join(self.output_dir, filename)
             
+            os.makedirs(self.output_dir, exist_ok=True)
             with open(filepath, "w", encoding="utf-8") as f:
                 f.write("\n".join(links))
             
@@ -47,6 +44,7 @@ class FileManager:
                     inn_list.append(inn)
             
             # Сохраняем в файл
+            os.makedirs(self.output_dir, exist_ok=True)
             with open(filepath, 'w', encoding='utf-8') as f:
                 f.write('\n'.join(inn_list))
             
@@ -59,6 +57,8 @@ class FileManager:
 
     async def send_file_to_user(self, bot, chat_id, filepath, caption):
         """Отправка файла пользователю"""
+        # aiogram нужен только боту: парсер категорий работает и без него
+        from aiogram.types import FSInputFile
         try:
             if os.path.exists(filepath):
                 file = FSInputFile(filepath)
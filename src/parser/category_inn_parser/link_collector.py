@@ -1,105 +1,232 @@
+import contextvars
 import logging
 import time
-import threading
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException
 from selenium.webdriver.common.action_chains import ActionChains
+from ..utils import open_page, is_session_alive, PRODUCT_PAGE_READY
+from ..adaptive_delay import delay_controller
+from ..antibot import ChallengeDetectedError, MAX_CHALLENGE_REQUEUES
+from ..proxy_pool import get_proxy_pool
+from ..deadline import DeadlineExceeded, job_deadline, item_deadline
+from ..cancellation import JobCancelled, current_token
+from ..retry import RetryPolicy, TransientError, SessionDeadError, classify_error, DRIVER_DEAD
 
 logger = logging.getLogger('parser.category_inn_parser.link_collector')
 
+SELECT_SELLER_RETRY = RetryPolicy('select_seller', max_attempts=3, base_delay=1.0, max_delay=4.0)
+
+
+class SellerNotFoundError(TransientError):
+    """Продавца нет в раскрытом списке фильтра"""
+
+
 class LinkCollector:
     def __init__(self, config, driver_manager):
         self.config = config
         self.driver_manager = driver_manager
-        self.max_sellers = int(config.get("MAX_SELLERS", "50"))
-        self.scroll_delay = float(config.get("SCROLL_DELAY", "2.0"))
-        self.load_timeout = int(config.get("LOAD_TIMEOUT", "30"))
-        self.max_workers = int(config.get("MAX_PARSE_WORKERS", "5"))
+        self.max_sellers = config.typed("MAX_SELLERS")
+        self.max_workers = config.typed("MAX_PARSE_WORKERS")
+        proxy_pool = get_proxy_pool()
+        if proxy_pool and proxy_pool.capacity < self.max_workers:
+            # Больше воркеров, чем мест на прокси, только увеличит нагрузку на каждый IP
+            logger.info(f"Число воркеров ограничено емкостью пула прокси: {proxy_pool.capacity}")
+            self.max_workers = proxy_pool.capacity
+        self.seller_data = {}
+        self.on_result = None
+
+    @property
+    def scroll_delay(self):
+        # Паузы и таймауты читаются на каждом шаге: изменения config.txt действуют на идущую задачу
+        return self.config.typed("SCROLL_DELAY")
+
+    @property
+    def load_timeout(self):
+        return self.config.typed("LOAD_TIMEOUT")
+
+    def _apply_workers_setting(self, slots):
+        """MAX_PARSE_WORKERS на лету: не больше потоков уже созданного пула"""
+        def apply(_changed):
+            workers = min(self.config.typed("MAX_PARSE_WORKERS"), self.max_workers)
+            slots.configure(workers)
+            logger.info(f"Параллелизм воркеров изменен: {workers}")
+        return apply
+
+    def collect_product_links(self, category_url, seller_parser, on_result=None):
+        """Сбор данных продавцов категории в self.seller_data.
+
+        on_result(seller_name, seller_data) вызывается из потоков воркеров по мере готовности продавцов.
+        """
         self.seller_data = {}
-        self.lock = threading.Lock()
+        for seller_name, seller_data in self.iter_seller_data(category_url, seller_parser, on_result):
+            self.seller_data[seller_name] = seller_data
+        return self.seller_data
+
+    def iter_seller_data(self, category_url, seller_parser, on_result=None):
+        """Пары (seller_name, seller_data) по мере завершения воркеров.
 
-    def collect_product_links(self, category_url, seller_parser):
+        Готовые продавцы отдаются между шагами обхода фильтра, остальные — после
+        него. Данные не накапливаются, если их не собирает вызывающий.
+        """
         logger.info(f"Начинаем сбор ссылок по продавцам из категории: {category_url}")
+        self.on_result = on_result
+        # Фактический параллелизм и паузы подстраиваются по ходу работы; предел воркеров — свой у задачи
+        slots = delay_controller.job_slots(self.max_workers)
+        unsubscribe = self.config.subscribe(self._apply_workers_setting(slots), ("MAX_PARSE_WORKERS",))
         
         driver = None
+        # Замены браузера сбора ссылок после проверок антибота
+        challenges = 0
         try:
-            driver = self.driver_manager.setup_driver()
-            driver.get(category_url)
-            
-            try:
-                WebDriverWait(driver, self.load_timeout).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, ".tile-root")))
-            except TimeoutException:
-                logger.error("Не удалось дождаться загрузки товаров")
-                return {}
-            
-            sellers = self._initialize_sellers_filter(driver)
+            driver, sellers, challenges = self._start_collector(driver, category_url, challenges)
             if not sellers:
-                logger.error("Не удалось получить список продавцов")
-                return {}
+                return
             
             sellers_to_process = sellers[:self.max_sellers]
+            job = job_deadline(current_token())
             
             with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-                futures = []
-                
-                for i, seller in enumerate(sellers_to_process, 1):
-                    logger.info(f"Обработка продавца {i}/{len(sellers_to_process)}: {seller['name']}")
-                    
-                    if self._process_single_seller(driver, seller, category_url):
-                        product_link = self._get_first_product_link(driver)
-                        if product_link:
-                            future = executor.submit(
-                                self._parse_seller,
-                                seller_parser,
-                                seller['name'],
-                                product_link
-                            )
-                            futures.append(future)
-                        else:
-                            logger.warning("Не удалось получить ссылку на товар")
-                    else:
-                        logger.warning(f"Не удалось обработать продавца {seller['name']}")
+                # Воркер -> имя продавца, пока его результат не отдан
+                pending = {}
+                try:
+                    for i, seller in enumerate(sellers_to_process, 1):
+                        # Отмена прерывает обход; воркеры в очереди снимаются в finally
+                        job.check_cancelled()
+                        if job.expired():
+                            logger.warning(f"Время задачи истекло, обработано продавцов: {i - 1}/{len(sellers_to_process)}")
+                            break
+                        if not is_session_alive(driver):
+                            # Без браузера сбора ссылок все оставшиеся продавцы провалились бы мгновенно
+                            logger.warning("Браузер сбора ссылок перестал отвечать, перезапускаем")
+                            self.driver_manager.close_driver(driver)
+                            driver = None
+                            driver, restored, challenges = self._start_collector(driver, category_url, challenges)
+                            if not restored:
+                                logger.error(f"Не удалось восстановить сбор ссылок, обработано продавцов: {i - 1}")
+                                break
+                        logger.info(f"Обработка продавца {i}/{len(sellers_to_process)}: {seller['name']}")
+                        
+                        try:
+                            if self._process_single_seller(driver, seller, category_url, item_deadline(job)):
+                                product_link = self._get_first_product_link(driver)
+                                if product_link:
+                                    # Контекст задачи (каналы логов бота) переходит в поток воркера
+                                    future = executor.submit(
+                                        contextvars.copy_context().run,
+                                        self._parse_seller,
+                                        slots,
+                                        seller_parser,
+                                        seller['name'],
+                                        product_link,
+                                        job
+                                    )
+                                    pending[future] = seller['name']
+                                else:
+                                    logger.warning("Не удалось получить ссылку на товар")
+                            else:
+                                logger.warning(f"Не удалось обработать продавца {seller['name']}")
+                            
+                            self._reset_filters_and_prepare_next(driver, category_url)
+                        except ChallengeDetectedError as e:
+                            # Помеченный браузер заменяется новым с заново открытой категорией
+                            logger.warning(f"Проверка антибота в браузере сбора ссылок: {str(e)}")
+                            self.driver_manager.close_driver(driver)
+                            driver = None
+                            if challenges >= MAX_CHALLENGE_REQUEUES:
+                                logger.error(f"Сбор ссылок остановлен после {challenges} замен браузера, обработано продавцов: {i - 1}")
+                                break
+                            challenges += 1
+                            driver, restored, challenges = self._start_collector(driver, category_url, challenges)
+                            if not restored:
+                                logger.error(f"Не удалось восстановить сбор ссылок, обработано продавцов: {i - 1}")
+                                break
+                        
+                        yield from self._finished(pending)
                     
-                    self._reset_filters_and_prepare_next(driver, category_url)
-                
-                for future in futures:
-                    future.result()
-            
-            return self.seller_data
-            
+                    yield from self._finished(pending, wait=True)
+                finally:
+                    # Воркеры еще в очереди не запускаются, запущенные прервутся на своих проверках
+                    for future in pending:
+                        future.cancel()
+            
+        except JobCancelled:
+            raise
         except Exception as e:
             logger.error(f"Критическая ошибка: {str(e)}")
-            return {}
         finally:
+            unsubscribe()
+            slots.close()
             if driver:
                 self.driver_manager.close_driver(driver)
 
-    def _parse_seller(self, seller_parser, seller_name, product_link):
+    def _finished(self, pending, wait=False):
+        """Результаты завершившихся воркеров; с wait=True — дожидаясь всех"""
+        futures = as_completed(list(pending)) if wait else [future for future in pending if future.done()]
+        for future in futures:
+            seller_name = pending.pop(future)
+            seller_data = future.result()
+            if seller_data is not None:
+                yield seller_name, seller_data
+
+    def _parse_seller(self, slots, seller_parser, seller_name, product_link, job=None):
+        # Число одновременно работающих воркеров задает адаптивный регулятор
+        try:
+            slots.acquire(job)
+        except JobCancelled:
+            raise
+        except DeadlineExceeded:
+            logger.warning(f"Время задачи истекло, продавец {seller_name} не обработан")
+            return None
+        try:
+            # Бюджет продавца отсчитывается с момента начала работы, а не постановки в очередь
+            deadline = item_deadline(job)
+            try:
+                return self._parse_seller_page(seller_parser, seller_name, product_link, deadline)
+            except (ChallengeDetectedError, SessionDeadError) as e:
+                # Помеченный или упавший браузер уже закрыт, одна повторная попытка в новой сессии
+                logger.warning(f"Сбой сессии при парсинге продавца {seller_name} ({str(e)}), повтор в новом браузере")
+            try:
+                return self._parse_seller_page(seller_parser, seller_name, product_link, deadline)
+            except (ChallengeDetectedError, SessionDeadError) as e:
+                logger.error(f"Повторный сбой сессии для продавца {seller_name}: {str(e)}")
+                return None
+        finally:
+            slots.release()
+
+    def _parse_seller_page(self, seller_parser, seller_name, product_link, deadline=None):
         driver = None
         try:
             driver = self.driver_manager.setup_driver()
             logger.info(f"Парсинг продавца: {seller_name}")
             
-            driver.get(product_link)
-            time.sleep(2)
+            open_page(driver, product_link, wait_for=PRODUCT_PAGE_READY, deadline=deadline)
             
             seller_data = seller_parser.parse_single_seller(
                 driver, 
                 seller_name, 
-                product_link
+                product_link,
+                deadline
             )
+            if not is_session_alive(driver):
+                raise SessionDeadError("Браузер упал во время парсинга продавца")
             
-            with self.lock:
-                self.seller_data[seller_name] = seller_data
+            if self.on_result:
+                try:
+                    self.on_result(seller_name, seller_data)
+                except Exception as e:
+                    logger.warning(f"Ошибка передачи промежуточного результата: {str(e)}")
             
             logger.info(f"Данные продавца {seller_name} успешно получены")
             return seller_data
             
+        except (ChallengeDetectedError, SessionDeadError, JobCancelled):
+            raise
         except Exception as e:
+            if classify_error(e) == DRIVER_DEAD:
+                raise SessionDeadError(str(e))
             logger.error(f"Ошибка парсинга продавца {seller_name}: {str(e)}")
             return None
         finally:
@@ -107,6 +234,44 @@ class LinkCollector:
                 self.driver_manager.close_driver(driver)
 
     # =============== ВСПОМОГАТЕЛЬНЫЕ МЕТОДЫ ===============
+
+    def _start_collector(self, driver, category_url, challenges):
+        """Браузер сбора ссылок с открытой категорией: (driver, sellers, challenges).
+
+        После проверки антибота браузер закрывается и заменяется новым, всего
+        не больше MAX_CHALLENGE_REQUEUES замен за задачу. challenges — сколько
+        замен уже было.
+        """
+        while True:
+            if driver is None:
+                driver = self.driver_manager.setup_driver()
+            try:
+                return driver, self._open_category(driver, category_url), challenges
+            except ChallengeDetectedError as e:
+                self.driver_manager.close_driver(driver)
+                driver = None
+                if challenges >= MAX_CHALLENGE_REQUEUES:
+                    logger.error(f"Категория недоступна после {challenges} замен браузера: {str(e)}")
+                    return None, [], challenges
+                challenges += 1
+                logger.warning(f"Проверка антибота на категории, новый браузер ({challenges}/{MAX_CHALLENGE_REQUEUES})")
+
+    def _open_category(self, driver, category_url):
+        """Открытие категории и фильтра продавцов. Возвращает список продавцов или []"""
+        open_page(driver, category_url)
+        
+        try:
+            WebDriverWait(driver, delay_controller.load_timeout('category', self.load_timeout)).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, ".tile-root")))
+        except TimeoutException:
+            logger.error("Не удалось дождаться загрузки товаров")
+            return []
+        
+        sellers = self._initialize_sellers_filter(driver)
+        if not sellers:
+            logger.error("Не удалось получить список продавцов")
+            return []
+        return sellers
     def _initialize_sellers_filter(self, driver):
         try:
             if not self._scroll_to_seller_filter(driver):
@@ -120,48 +285,49 @@ class LinkCollector:
                 
             return sellers
             
+        except ChallengeDetectedError:
+            raise
         except Exception as e:
             logger.error(f"Ошибка инициализации фильтра продавцов: {str(e)}")
             return []
 
-    def _process_single_seller(self, driver, seller, category_url):
-        max_attempts = 3
-        
-        for attempt in range(max_attempts):
-            try:
-                current_seller = self._find_seller_by_name(driver, seller['name'])
-                if not current_seller:
-                    logger.warning(f"Попытка {attempt + 1}: Продавец '{seller['name']}' не найден")
-                    if attempt < max_attempts - 1:
-                        self._reinitialize_seller_filter(driver)
-                        continue
-                    else:
-                        return False
-                
-                if self._select_seller(driver, current_seller):
-                    if self._wait_for_products_update(driver):
-                        return True
-                    else:
-                        logger.warning(f"Попытка {attempt + 1}: Товары не обновились")
-                else:
-                    logger.warning(f"Попытка {attempt + 1}: Не удалось выбрать продавца")
-                
-                if attempt < max_attempts - 1:
-                    self._reset_filters_and_prepare_next(driver, category_url)
-                    
-            except Exception as e:
-                logger.error(f"Попытка {attempt + 1} - Ошибка: {str(e)}")
-                if attempt < max_attempts - 1:
-                    self._reset_filters_and_prepare_next(driver, category_url)
-                    
-        return False
+    def _process_single_seller(self, driver, seller, category_url, deadline=None):
+        def recover(attempt, exc):
+            # Продавец пропал из списка — заново раскрываем фильтр, иначе сбрасываем фильтры
+            if isinstance(exc, SellerNotFoundError):
+                self._reinitialize_seller_filter(driver)
+            else:
+                self._reset_filters_and_prepare_next(driver, category_url)
+
+        try:
+            return SELECT_SELLER_RETRY.call(
+                self._select_seller_once, driver, seller, deadline=deadline, on_retry=recover
+            )
+        except (JobCancelled, ChallengeDetectedError):
+            raise
+        except DeadlineExceeded:
+            logger.warning(f"Время на продавца '{seller['name']}' истекло")
+            return False
+        except Exception as e:
+            logger.error(f"Не удалось выбрать продавца '{seller['name']}': {str(e)}")
+            return False
+
+    def _select_seller_once(self, driver, seller):
+        current_seller = self._find_seller_by_name(driver, seller['name'])
+        if not current_seller:
+            raise SellerNotFoundError(f"Продавец '{seller['name']}' не найден")
+        if not self._select_seller(driver, current_seller):
+            raise TransientError("Не удалось выбрать продавца")
+        if not self._wait_for_products_update(driver):
+            raise TransientError("Товары не обновились")
+        return True
 
     def _reinitialize_seller_filter(self, driver):
         try:
             logger.info("Переинициализация фильтра продавцов...")
             if self._scroll_to_seller_filter(driver):
                 self._expand_seller_filter(driver)
-                time.sleep(2)
+                delay_controller.sleep(2)
                 return True
             return False
         except Exception as e:
@@ -187,10 +353,10 @@ class LinkCollector:
                     show_all_button = seller_container.find_element(By.XPATH, xpath)
                     if show_all_button.is_displayed() and show_all_button.is_enabled():
                         driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", show_all_button)
-                        time.sleep(1)
+                        delay_controller.sleep(1)
                         driver.execute_script("arguments[0].click();", show_all_button)
                         logger.info("Кнопка 'Посмотреть все' нажата")
-                        time.sleep(3)
+                        delay_controller.sleep(3)
                         return True
                 except Exception:
                     continue
@@ -209,12 +375,13 @@ class LinkCollector:
                 self._reinitialize_seller_filter(driver)
             else:
                 logger.info("Выполняем жесткий сброс через перезагрузку")
-                driver.get(category_url)
-                time.sleep(3)
-                WebDriverWait(driver, self.load_timeout).until(
+                open_page(driver, category_url)
+                WebDriverWait(driver, delay_controller.load_timeout('category', self.load_timeout)).until(
                     EC.presence_of_element_located((By.CSS_SELECTOR, ".tile-root")))
                 self._reinitialize_seller_filter(driver)
                 
+        except ChallengeDetectedError:
+            raise
         except Exception as e:
             logger.error(f"Ошибка сброса фильтров: {str(e)}")
 
@@ -233,7 +400,7 @@ class LinkCollector:
                         EC.element_to_be_clickable((By.XPATH, xpath))
                     )
                     driver.execute_script("arguments[0].click();", reset_button)
-                    time.sleep(2)
+                    delay_controller.sleep(2)
                     logger.info(f"Фильтр сброшен: {xpath}")
                     return True
                 except:
@@ -244,7 +411,7 @@ class LinkCollector:
                     By.XPATH, "//input[@type='checkbox' and @checked]/parent::label"
                 )
                 driver.execute_script("arguments[0].click();", selected_checkbox)
-                time.sleep(2)
+                delay_controller.sleep(2)
                 logger.info("Фильтр сброшен через чекбокс")
                 return True
             except:
@@ -252,7 +419,7 @@ class LinkCollector:
                 
             return False
         except Exception as e:
-            logger.debug(f"Мягкий сброс не удался: {str(e)}")
+            logger.debug("Мягкий сброс не удался: %s", e)
             return False
 
     def _find_seller_by_name(self, driver, seller_name):
@@ -299,7 +466,7 @@ class LinkCollector:
                 except Exception:
                     continue
                     
-            logger.debug(f"Продавец '{seller_name}' не найден")
+            logger.debug("Продавец '%s' не найден", seller_name)
             return None
         except Exception as e:
             logger.error(f"Ошибка поиска продавца: {str(e)}")
@@ -310,7 +477,7 @@ class LinkCollector:
             driver.execute_script(
                 "arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", 
                 seller['element'])
-            time.sleep(1.5)
+            delay_controller.sleep(self.scroll_delay * 0.75)
             
             is_checked = False
             if 'input' in seller:
@@ -332,7 +499,7 @@ class LinkCollector:
             except:
                 driver.execute_script("arguments[0].click();", seller['element'])
             
-            time.sleep(3)
+            delay_controller.sleep(3)
             return True
         except Exception as e:
             logger.error(f"Ошибка при выборе продавца: {str(e)}")
@@ -367,7 +534,7 @@ class LinkCollector:
                 "arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", 
                 seller_filter
             )
-            time.sleep(2)
+            delay_controller.sleep(self.scroll_delay)
             return True
         except Exception as e:
             logger.error(f"Ошибка скролла: {str(e)}")
@@ -403,7 +570,7 @@ class LinkCollector:
                         logger.info(f"Найдено {len(containers)} контейнеров")
                         break
                 except Exception as e:
-                    logger.debug(f"Ошибка поиска: {e}")
+                    logger.debug("Ошибка поиска: %s", e)
                     continue
             
             if not seller_containers:
@@ -440,7 +607,7 @@ class LinkCollector:
                         checkbox = container.find_element(By.XPATH, ".//label[contains(@class, 'b420-a')]")
                         checkbox_input = checkbox.find_element(By.XPATH, ".//input[@type='checkbox']")
                     except Exception as e:
-                        logger.debug(f"Не удалось найти чекбокс: {e}")
+                        logger.debug("Не удалось найти чекбокс: %s", e)
                         checkbox = None
                         checkbox_input = None
                     
@@ -452,7 +619,7 @@ class LinkCollector:
                         })
                     
                 except Exception as e:
-                    logger.debug(f"Ошибка обработки: {e}")
+                    logger.debug("Ошибка обработки: %s", e)
                     continue
             
             logger.info(f"Всего найдено продавцов: {len(sellers)}")
@@ -464,7 +631,7 @@ class LinkCollector:
     def _wait_for_products_update(self, driver):
         try:
             logger.info("Ожидание обновления товаров...")
-            time.sleep(3)
+            delay_controller.sleep(3)
             
             container_selector = '[data-widget="infiniteVirtualPaginator"]'
             
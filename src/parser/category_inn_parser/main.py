@@ -1,5 +1,4 @@
 import logging
-import os
 
 from .driver_manager import DriverManager
 from .link_collector import LinkCollector
@@ -7,18 +6,17 @@ from .seller_parser import SellerParser
 from .excel_saver import ExcelSaver
 from .file_manager import FileManager
 from .url_utils import UrlUtils
-from src.utils import load_config
+from src.config_service import get_config
+from src.parser.timing import timing_report
+from src.parser.cancellation import JobCancelled
 
 logger = logging.getLogger('parser.category_inn_parser')
 
 class CategoryParser:
     def __init__(self):
-        self.config = load_config("config.txt")
+        self.config = get_config()
         self.output_dir = "output"
         
-        if not os.path.exists(self.output_dir):
-            os.makedirs(self.output_dir)
-        
         self.driver_manager = DriverManager()
         # Исправлено: передаем только config и driver_manager
         self.link_collector = LinkCollector(
@@ -30,7 +28,13 @@ class CategoryParser:
         self.file_manager = FileManager(self.output_dir)
         self.url_utils = UrlUtils()
 
-    def parse_category(self, category_url):
+    def export_partial(self, sellers_data, category_url):
+        """Промежуточный Excel по уже обработанным продавцам. Возвращает путь или None"""
+        category_name = self.url_utils.get_category_name(category_url)
+        return self.excel_saver.save_to_excel(dict(sellers_data), f"{category_name}_partial_{len(sellers_data)}")
+
+    def parse_category(self, category_url, on_result=None):
+        """Полный парсинг категории. on_result(seller_name, seller_data) — промежуточные результаты"""
         logger.info(f"Начинаем полный парсинг категории: {category_url}")
         
         try:
@@ -46,7 +50,8 @@ class CategoryParser:
             logger.info("=== ЭТАП 1: Сбор ссылок и парсинг продавцов ===")
             sellers_data = self.link_collector.collect_product_links(
                 category_url,
-                self.seller_parser  # Передаем парсер как аргумент
+                self.seller_parser,  # Передаем парсер как аргумент
+                on_result=on_result
             )
             
             if not sellers_data:
@@ -72,6 +77,10 @@ class CategoryParser:
             
             return sellers_data
             
+        except JobCancelled:
+            raise
         except Exception as e:
             logger.error(f"Критическая ошибка при парсинге категории: {str(e)}")
-            return {}
\ No newline at end of file
+            return {}
+        finally:
+            timing_report.log_report()
\ No newline at end of file
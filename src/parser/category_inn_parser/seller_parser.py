@@ -3,6 +3,7 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from src.parser.seller_info_parser import SellerInfoParser
+from src.parser.cancellation import JobCancelled
 
 logger = logging.getLogger('parser.category_inn_parser.seller_parser')
 
@@ -11,10 +12,10 @@ class SellerParser:
         self.driver_manager = driver_manager
         self.seller_info_parser = SellerInfoParser()
 
-    def parse_single_seller(self, driver, seller_name, product_link):
+    def parse_single_seller(self, driver, seller_name, product_link, deadline=None):
         try:
             parsed_name = self.seller_info_parser.get_seller_name(driver)
-            seller_info = self.seller_info_parser.get_seller_details(driver)
+            seller_info = self.seller_info_parser.get_seller_details(driver, deadline=deadline)
             product_title = self._get_product_title(driver)
             
             return {
@@ -30,6 +31,8 @@ class SellerParser:
                 'filter_name': seller_name,
                 'parsed_company_name': seller_info.get('company_name', 'Не найдено')
             }
+        except JobCancelled:
+            raise
         except Exception as e:
             logger.error(f"Ошибка парсинга: {str(e)}")
             return {
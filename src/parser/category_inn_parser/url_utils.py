@@ -109,8 +109,8 @@ class UrlUtils:
             if not url:
                 return None
             
-            # Паттерн для извлечения ID товара
-            pattern = r'/product/[^/]*?-(\d+)/?'
+            # ID — последнее число пути: в названии товара тоже бывают числа
+            pattern = r'/product/(?:[^/?#]*-)?(\d+)(?=[/?#]|$)'
             match = re.search(pattern, url)
             
             if match:
@@ -121,6 +121,34 @@ class UrlUtils:
             logger.warning(f"Ошибка извлечения ID товара: {str(e)}")
             return None
 
+    def extract_seller_id(self, url):
+        """Извлечение ID продавца из URL магазина"""
+        try:
+            if not url:
+                return None
+            
+            # /seller/<slug>-<id>/ или /seller/<id>/, в мини-приложении — ?miniapp=seller_<id>
+            for pattern in (r'/seller/(?:[^/?#]*-)?(\d+)(?=[/?#]|$)', r'[?&]miniapp=seller_(\d+)'):
+                match = re.search(pattern, url)
+                if match:
+                    return match.group(1)
+            
+            return None
+        except Exception as e:
+            logger.warning(f"Ошибка извлечения ID продавца: {str(e)}")
+            return None
+
+    def canonical_key(self, url):
+        """Ключ для отсева повторов: product:<id>, seller:<id> или нормализованный URL"""
+        product_id = self.extract_product_id(url)
+        if product_id:
+            return f"product:{product_id}"
+        seller_id = self.extract_seller_id(url)
+        if seller_id:
+            return f"seller:{seller_id}"
+        normalized = self.normalize_url(url)
+        return f"url:{normalized}" if normalized else None
+
     def build_product_url(self, product_id, product_slug=""):
         """Построение URL товара по ID"""
         try:
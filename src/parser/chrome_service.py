@@ -0,0 +1,92 @@
+# parser/chrome_service.py
+import atexit
+import logging
+import socket
+import threading
+
+from selenium.webdriver.chrome.service import Service
+
+logger = logging.getLogger(__name__)
+
+
+def is_port_free(port, host="127.0.0.1"):
+    """Проверка, что порт действительно свободен для прослушивания"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        try:
+            sock.bind((host, port))
+            return True
+        except OSError:
+            return False
+
+
+def find_free_port(preferred=None, host="127.0.0.1"):
+    """Свободный порт: preferred, если он не занят, иначе выданный системой"""
+    if preferred and is_port_free(preferred, host):
+        return preferred
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+
+
+class SharedChromeService(Service):
+    """Один долгоживущий процесс chromedriver, обслуживающий много сессий.
+
+    webdriver.Chrome вызывает start() при создании и stop() при quit(), поэтому
+    здесь start() запускает процесс только один раз, а stop() ничего не делает.
+    Процесс останавливается через shutdown() или при выходе из приложения.
+    """
+
+    def __init__(self, executable_path=None, port=0, **kwargs):
+        super().__init__(executable_path=executable_path, port=port or find_free_port(), **kwargs)
+        self.requested_path = executable_path
+        self._start_lock = threading.Lock()
+        self.sessions_started = 0
+
+    def start(self):
+        with self._start_lock:
+            self.sessions_started += 1
+            if self.is_running():
+                return
+            logger.info(f"Запуск общего chromedriver на порту {self.port}")
+            super().start()
+
+    def stop(self):
+        pass
+
+    def is_running(self):
+        process = getattr(self, "process", None)
+        return process is not None and process.poll() is None and self.is_connectable()
+
+    def shutdown(self):
+        with self._start_lock:
+            if getattr(self, "process", None) is None:
+                return
+            logger.info(f"Остановка общего chromedriver (сессий: {self.sessions_started})")
+            try:
+                super().stop()
+            except Exception as e:
+                logger.warning(f"Ошибка остановки chromedriver: {str(e)}")
+
+
+_shared_service = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_service(driver_path):
+    """Общий сервис chromedriver для процесса, создается при первом обращении"""
+    global _shared_service
+    with _shared_lock:
+        if _shared_service is None or _shared_service.requested_path != driver_path:
+            if _shared_service is not None:
+                _shared_service.shutdown()
+            _shared_service = SharedChromeService(executable_path=driver_path)
+            atexit.register(_shared_service.shutdown)
+        return _shared_service
+
+
+def shutdown_shared_service():
+    global _shared_service
+    with _shared_lock:
+        if _shared_service is not None:
+            _shared_service.shutdown()
+            _shared_service = None
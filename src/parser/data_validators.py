@@ -1,33 +1,28 @@
 # parser/data_validators.py
 import logging
+from .legal_info import classifier
 
 logger = logging.getLogger(__name__)
 
 class DataValidators:
+    """Совместимая обертка над общим классификатором строк (см. legal_info)"""
+
     @staticmethod
     def is_company_name(text):
         """Проверяет, является ли текст названием компании"""
-        company_indicators = ['ИП', 'ООО', 'АО', 'ЗАО', 'ПАО', 'Ltd', 'LLC', 'Inc']
-        return any(indicator in text for indicator in company_indicators)
+        return classifier.is_company_name(text)
 
     @staticmethod
     def is_inn(text):
-        """Проверяет, является ли текст ИНН/ОГРН"""
-        # Более гибкая проверка ИНН/ОГРН
-        digits_only = ''.join(filter(str.isdigit, text))
-        return 10 <= len(digits_only) <= 15
+        """Проверяет, является ли текст ИНН/ОГРН с корректной контрольной суммой"""
+        return classifier.is_inn(text)
 
     @staticmethod
     def is_address(text):
         """Проверяет, является ли текст адресом"""
-        address_indicators = [
-            'г.', 'город', 'ул.', 'улица', 'пр.', 'проспект', 
-            'д.', 'дом', 'обл.', 'область', 'кв.', 'квартира'
-        ]
-        return any(indicator in text.lower() for indicator in address_indicators)
+        return classifier.is_address(text)
 
     @staticmethod
     def is_working_hours(text):
         """Проверяет, является ли текст режимом работы"""
-        working_hours_indicators = ['режим работы', 'работает', 'часы работы']
-        return any(indicator in text.lower() for indicator in working_hours_indicators)
\ No newline at end of file
+        return classifier.is_working_hours(text)
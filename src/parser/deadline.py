@@ -0,0 +1,93 @@
+# parser/deadline.py
+import logging
+import math
+import time
+
+from src.config_service import get_config
+
+logger = logging.getLogger(__name__)
+
+
+class DeadlineExceeded(Exception):
+    """Бюджет времени задачи или элемента исчерпан"""
+
+
+class Deadline:
+    """Бюджет времени, передаваемый вниз по вложенным циклам повторов.
+
+    Дочерний бюджет никогда не переживает родительский: remaining() берет
+    минимум по всей цепочке. Все ожидания и паузы обрезаются по остатку,
+    check() прерывает работу исключением DeadlineExceeded.
+
+    К бюджету можно привязать токен отмены задачи (parser.cancellation):
+    дочерние бюджеты наследуют его, check() и sleep() реагируют на отмену.
+    """
+
+    def __init__(self, seconds=None, parent=None, name="задача", token=None):
+        self.name = name
+        self.parent = parent
+        self.token = token if token is not None or parent is None else parent.token
+        self.expires_at = None if seconds is None else time.monotonic() + seconds
+
+    @classmethod
+    def unbounded(cls, token=None):
+        return cls(None, name="без ограничения", token=token)
+
+    def remaining(self):
+        own = math.inf if self.expires_at is None else self.expires_at - time.monotonic()
+        if self.parent is not None:
+            own = min(own, self.parent.remaining())
+        return max(0.0, own)
+
+    def expired(self):
+        return self.remaining() <= 0
+
+    def check_cancelled(self):
+        """Бросает JobCancelled, если задачу отменили"""
+        if self.token is not None:
+            self.token.check()
+
+    def check(self, what=None):
+        """Бросает DeadlineExceeded, если время вышло, или JobCancelled при отмене"""
+        self.check_cancelled()
+        if self.expired():
+            message = f"Истекло время: {self.name}"
+            if what:
+                message += f" ({what})"
+            raise DeadlineExceeded(message)
+
+    def clip(self, seconds):
+        """Таймаут не больше остатка бюджета"""
+        return min(seconds, self.remaining())
+
+    def child(self, seconds=None, name="шаг"):
+        """Вложенный бюджет, ограниченный и своим сроком, и сроком родителя"""
+        return Deadline(seconds, parent=self, name=name)
+
+    def sleep(self, seconds):
+        """Пауза, обрезанная по остатку и прерываемая отменой; после нее проверка срока"""
+        self.check()
+        if self.token is not None:
+            self.token.wait(self.clip(seconds))
+        else:
+            time.sleep(self.clip(seconds))
+        self.check()
+
+
+def _config_seconds(key):
+    # 0 отключает ограничение
+    seconds = get_config().typed(key)
+    return seconds if seconds > 0 else None
+
+
+def job_deadline(token=None):
+    """Бюджет задачи целиком, JOB_TIMEOUT секунд из config.txt (по умолчанию без ограничения)"""
+    return Deadline(_config_seconds("JOB_TIMEOUT"), name="задача", token=token)
+
+
+def item_deadline(parent=None):
+    """Бюджет одного продавца или товара, ITEM_TIMEOUT секунд (по умолчанию 3 минуты)"""
+    seconds = _config_seconds("ITEM_TIMEOUT")
+    if parent is None:
+        return Deadline(seconds, name="элемент")
+    return parent.child(seconds, name="элемент")
@@ -0,0 +1,252 @@
+# parser/driver_resolver.py
+import json
+import logging
+import os
+import re
+import shutil
+import subprocess
+import threading
+
+from selenium import webdriver
+from selenium.common.exceptions import SessionNotCreatedException
+from selenium.webdriver.chrome.service import Service
+
+from src.utils import get_app_dir
+from src.config_service import get_config
+from .chrome_service import SharedChromeService, get_shared_service
+from .timing import timing_report
+
+logger = logging.getLogger(__name__)
+
+CACHE_FILE_NAME = "chromedriver_cache.json"
+
+DEFAULT_DRIVER_PATHS = [
+    r"C:\chromedriver-win64\chromedriver.exe",
+    r"C:\Program Files\chromedriver\chromedriver.exe",
+    r"C:\chromedriver\chromedriver.exe",
+    "./chromedriver.exe",
+    "./drivers/chromedriver.exe",
+    "/usr/local/bin/chromedriver",
+    "/usr/bin/chromedriver",
+]
+
+DEFAULT_BROWSER_PATHS = [
+    r"C:\Program Files\Google\Chrome\Application\chrome.exe",
+    r"C:\Program Files (x86)\Google\Chrome\Application\chrome.exe",
+    os.path.expandvars(r"%LOCALAPPDATA%\Google\Chrome\Application\chrome.exe"),
+    "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome",
+    "/usr/bin/google-chrome",
+    "/usr/bin/google-chrome-stable",
+    "/usr/bin/chromium",
+    "/usr/bin/chromium-browser",
+]
+
+VERSION_RE = re.compile(r'(\d+)\.\d+\.\d+(?:\.\d+)?')
+
+
+def _read_version(path):
+    """Версия бинарника по выводу --version, на Windows — по папке версии рядом с chrome.exe"""
+    try:
+        output = subprocess.run(
+            [path, "--version"], capture_output=True, text=True, timeout=10
+        ).stdout
+        match = VERSION_RE.search(output or "")
+        if match:
+            return match.group(0)
+    except Exception as e:
+        logger.debug(f"Не удалось получить версию {path}: {str(e)}")
+
+    # chrome.exe на Windows не печатает версию в консоль
+    try:
+        folder = os.path.dirname(path)
+        versions = [name for name in os.listdir(folder) if VERSION_RE.fullmatch(name)]
+        if versions:
+            return max(versions, key=lambda v: [int(part) for part in v.split('.')])
+    except Exception:
+        pass
+    return None
+
+
+def _major(version):
+    return version.split('.')[0] if version else None
+
+
+class DriverResolver:
+    """Поиск пары chromedriver/Chrome один раз на процесс с кэшем на диске"""
+
+    def __init__(self, cache_path=None):
+        self.cache_path = cache_path or os.path.join(get_app_dir(), CACHE_FILE_NAME)
+        self._lock = threading.Lock()
+        self._resolved = None
+
+    def resolve(self):
+        """Возвращает словарь с driver_path и browser_path (browser_path может быть None)"""
+        with self._lock:
+            if self._resolved is None:
+                self._resolved = self._load_cache() or self._discover()
+            return self._resolved
+
+    def get_service(self, shared=None):
+        """Service на закэшированный chromedriver.
+
+        По умолчанию для каждого драйвера создается свой Service: driver.quit()
+        останавливает его процесс. При SHARED_CHROMEDRIVER=true все сессии
+        открываются через один долгоживущий процесс chromedriver.
+        """
+        resolved = self.resolve()
+        if not resolved.get('driver_path'):
+            return None
+        if shared is None:
+            shared = self.shared_service_enabled()
+        if shared:
+            return get_shared_service(resolved['driver_path'])
+        return Service(executable_path=resolved['driver_path'])
+
+    def shared_service_enabled(self):
+        return get_config().typed('SHARED_CHROMEDRIVER')
+
+    def apply(self, options):
+        """Указывает найденный бинарник Chrome в опциях, если он не задан явно"""
+        browser_path = self.resolve().get('browser_path')
+        if browser_path and not options.binary_location:
+            options.binary_location = browser_path
+
+    def invalidate(self):
+        """Сброс кэша, например после ошибки несовпадения версий"""
+        with self._lock:
+            self._resolved = None
+            try:
+                if os.path.exists(self.cache_path):
+                    os.remove(self.cache_path)
+                    logger.info(f"Кэш chromedriver удален: {self.cache_path}")
+            except Exception as e:
+                logger.warning(f"Не удалось удалить кэш chromedriver: {str(e)}")
+
+    def _load_cache(self):
+        if not os.path.exists(self.cache_path):
+            return None
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+            driver_path = cached.get('driver_path')
+            browser_path = cached.get('browser_path')
+            if not driver_path or not os.path.exists(driver_path):
+                return None
+            if browser_path and not os.path.exists(browser_path):
+                return None
+            if cached.get('driver_mtime') != os.path.getmtime(driver_path):
+                logger.info("chromedriver изменился с момента кэширования, повторный поиск")
+                return None
+            logger.info(f"Используем закэшированный chromedriver: {driver_path}")
+            return cached
+        except Exception as e:
+            logger.warning(f"Ошибка чтения кэша chromedriver: {str(e)}")
+            return None
+
+    def _discover(self):
+        with timing_report.measure('driver_discovery'):
+            config = get_config().values()
+            driver_path = self._find_driver(config)
+            browser_path = self._find_browser(config)
+
+            if not driver_path:
+                driver_path, browser_path = self._selenium_manager_paths(browser_path)
+
+            if not driver_path:
+                logger.warning("chromedriver не найден, запуск через Selenium Manager по умолчанию")
+                return {'driver_path': None, 'browser_path': browser_path}
+
+            driver_version = _read_version(driver_path)
+            browser_version = _read_version(browser_path) if browser_path else None
+            if driver_version and browser_version and _major(driver_version) != _major(browser_version):
+                logger.warning(
+                    f"Версии не совпадают: chromedriver {driver_version}, Chrome {browser_version}. "
+                    f"Запрашиваем подходящий драйвер у Selenium Manager"
+                )
+                driver_path, browser_path = self._selenium_manager_paths(browser_path)
+                if not driver_path:
+                    return {'driver_path': None, 'browser_path': browser_path}
+                driver_version = _read_version(driver_path)
+
+            resolved = {
+                'driver_path': driver_path,
+                'browser_path': browser_path,
+                'driver_version': driver_version,
+                'browser_version': browser_version,
+                'driver_mtime': os.path.getmtime(driver_path),
+            }
+            logger.info(
+                f"Найден chromedriver {driver_version or '?'}: {driver_path}; "
+                f"Chrome {browser_version or '?'}: {browser_path or 'по умолчанию'}"
+            )
+            self._save_cache(resolved)
+            return resolved
+
+    def _find_driver(self, config):
+        configured = os.environ.get('CHROMEDRIVER_PATH') or config.get('CHROMEDRIVER_PATH')
+        if configured and os.path.exists(configured):
+            return configured
+        found = shutil.which('chromedriver')
+        if found:
+            return found
+        for path in DEFAULT_DRIVER_PATHS:
+            if os.path.exists(path):
+                return os.path.abspath(path)
+        return None
+
+    def _find_browser(self, config):
+        configured = os.environ.get('CHROME_BINARY') or config.get('CHROME_BINARY')
+        if configured and os.path.exists(configured):
+            return configured
+        for name in ('google-chrome', 'google-chrome-stable', 'chromium', 'chromium-browser', 'chrome'):
+            found = shutil.which(name)
+            if found:
+                return found
+        for path in DEFAULT_BROWSER_PATHS:
+            if os.path.exists(path):
+                return path
+        return None
+
+    def _selenium_manager_paths(self, browser_path):
+        """Однократный вызов Selenium Manager для получения путей"""
+        try:
+            from selenium.webdriver.common.selenium_manager import SeleniumManager
+            args = ['--browser', 'chrome']
+            if browser_path:
+                args += ['--browser-path', browser_path]
+            paths = SeleniumManager().binary_paths(args)
+            return paths.get('driver_path'), paths.get('browser_path') or browser_path
+        except Exception as e:
+            logger.warning(f"Selenium Manager не смог найти chromedriver: {str(e)}")
+            return None, browser_path
+
+    def _save_cache(self, resolved):
+        try:
+            with open(self.cache_path, "w", encoding="utf-8") as f:
+                json.dump(resolved, f, ensure_ascii=False, indent=2)
+        except Exception as e:
+            logger.warning(f"Не удалось сохранить кэш chromedriver: {str(e)}")
+
+
+driver_resolver = DriverResolver()
+
+
+def create_chrome_driver(options):
+    """Создание webdriver.Chrome с закэшированным chromedriver и замером времени запуска"""
+    with timing_report.measure('driver_resolve'):
+        service = driver_resolver.get_service()
+        driver_resolver.apply(options)
+
+    if service is None:
+        with timing_report.measure('driver_start_selenium_manager'):
+            return webdriver.Chrome(options=options)
+
+    metric = 'driver_start_shared' if isinstance(service, SharedChromeService) else 'driver_start'
+    try:
+        with timing_report.measure(metric):
+            return webdriver.Chrome(service=service, options=options)
+    except SessionNotCreatedException as e:
+        logger.warning(f"Закэшированный chromedriver не подошел: {str(e).splitlines()[0]}")
+        driver_resolver.invalidate()
+        with timing_report.measure('driver_start_selenium_manager'):
+            return webdriver.Chrome(options=options)
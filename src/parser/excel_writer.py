@@ -8,11 +8,8 @@ from openpyxl.utils import get_column_letter
 class ExcelWriter:
     def __init__(self):
         self.logger = logging.getLogger('excel_writer')
+        # Папка создается при первом сохранении, а не при создании объекта
         self.output_dir = "output"
-        
-        # Создаем папку output если её нет
-        if not os.path.exists(self.output_dir):
-            os.makedirs(self.output_dir)
     
     def save_to_excel(self, products, seller_name):
         """Сохранение товаров в Excel файл"""
@@ -93,6 +90,7 @@ class ExcelWriter:
             ws.freeze_panes = "A2"
             
             # Сохраняем файл
+            os.makedirs(self.output_dir, exist_ok=True)
             wb.save(filepath)
             self.logger.info(f"Excel файл сохранен: {filepath}")
             
@@ -170,6 +168,7 @@ class ExcelWriter:
             ws.freeze_panes = "A2"
             
             # Сохраняем файл
+            os.makedirs(self.output_dir, exist_ok=True)
             wb.save(filepath)
             self.logger.info(f"Excel файл с данными продавцов сохранен: {filepath}")
             
@@ -237,6 +236,7 @@ class ExcelWriter:
             ws.auto_filter.ref = f"A1:D{len(sellers_data) + 1}"
             ws.freeze_panes = "A2"
             
+            os.makedirs(self.output_dir, exist_ok=True)
             wb.save(filepath)
             self.logger.info(f"Файл продавцов сохранен: {filepath}")
             return filepath
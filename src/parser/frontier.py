@@ -0,0 +1,374 @@
+# parser/frontier.py
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from src.utils import get_app_dir
+from src.config_service import get_config
+from .cancellation import current_token
+from .category_inn_parser.url_utils import UrlUtils
+
+logger = logging.getLogger(__name__)
+
+# Очереди фронтира: поле результата со ссылкой и признаки неудачной обработки
+QUEUES = {
+    'inn-sellers': 'seller_url',
+    'inn-products': 'product_url',
+}
+FAILED_MARKERS = ('Ошибка', 'Ошибка парсинга')
+# Таймаут говорит об исчерпанном бюджете задачи, а не о самой ссылке
+TIMEOUT_MARKER = 'Таймаут'
+# Причина в результате для ссылки, повтор которой после неудачи еще не наступил
+DEFERRED_MARKER = 'Повтор отложен'
+# Как часто задача проверяет ссылки, которые обрабатывает другая задача
+SHARED_POLL_SECONDS = 2.0
+
+QUEUED = 'queued'
+LEASED = 'leased'
+DONE = 'done'
+FAILED = 'failed'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS frontier (
+    queue TEXT NOT NULL,
+    key TEXT NOT NULL,
+    url TEXT NOT NULL,
+    batch TEXT,
+    state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    leased_at REAL,
+    done_at REAL,
+    not_before REAL,
+    result TEXT,
+    PRIMARY KEY (queue, key)
+);
+CREATE TABLE IF NOT EXISTS batch_items (
+    batch TEXT NOT NULL,
+    queue TEXT NOT NULL,
+    key TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    delivered INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (batch, key)
+);
+CREATE INDEX IF NOT EXISTS batch_items_pending ON batch_items (batch, delivered, seq);
+"""
+
+# Строки фронтира, связанные с задачей и еще не выданные ей
+_PENDING = (
+    "FROM batch_items b JOIN frontier f ON f.queue = b.queue AND f.key = b.key "
+    "WHERE b.batch = ? AND b.delivered = 0"
+)
+
+
+class FrontierBatch:
+    """Ссылки одной задачи во фронтире"""
+    __slots__ = ('id', 'queue', 'total', 'cached', 'deferred', 'duplicates')
+
+    def __init__(self, queue):
+        self.id = uuid.uuid4().hex
+        self.queue = queue
+        self.total = 0
+        # Свежие результаты прошлых запусков, парсить заново не нужно
+        self.cached = []
+        # Ссылки с недавней неудачей: до конца паузы не парсятся
+        self.deferred = []
+        self.duplicates = 0
+
+    @property
+    def to_crawl(self):
+        return self.total - len(self.cached) - len(self.deferred)
+
+
+class CrawlFrontier:
+    """Учет обработанных ссылок в SQLite между запусками.
+
+    Ссылки приводятся к ID товара или продавца, повторы внутри задачи
+    отбрасываются, а для ссылок со свежим результатом (моложе fresh_hours)
+    отдается сохраненный результат. Остальные ссылки воркеры берут по одной
+    через iter_leases, новые раньше давно обработанных. Ссылку, которая уже
+    в очереди у другой задачи, задачи делят: парсит ее та, что возьмет первой,
+    результат получают обе. Неудачная ссылка не парсится повторно до истечения
+    паузы, которая удваивается с каждой неудачей, но не превышает fresh_hours.
+    Частоту загрузок страниц по-прежнему ограничивает общий RateLimiter.
+    """
+
+    def __init__(self, path, fresh_hours=24.0, retry_minutes=10.0, lease_seconds=900.0):
+        self.path = path
+        self.fresh_hours = fresh_hours
+        self.retry_minutes = retry_minutes
+        self.lease_seconds = lease_seconds
+        self.url_utils = UrlUtils()
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+        count, = self._db.execute("SELECT COUNT(*) FROM frontier").fetchone()
+        logger.info(f"Фронтир ссылок: {path}, записей {count}")
+
+    def canonicalize(self, url):
+        """(ключ, ссылка для парсинга) или (None, None) для пустой строки"""
+        url = (url or '').strip()
+        if not url:
+            return None, None
+        key = self.url_utils.canonical_key(url)
+        normalized = self.url_utils.normalize_url(url) or url
+        if key.startswith('product:') or (key.startswith('seller:') and '/seller/' in normalized):
+            # Параметры запроса у товаров и магазинов не меняют страницу
+            normalized = normalized.split('?')[0] + '/'
+        return key, normalized
+
+    def retry_delay(self, attempts):
+        """Пауза перед повтором после attempts неудач подряд, не больше fresh_hours"""
+        delay = self.retry_minutes * 60 * 2 ** min(attempts - 1, 20)
+        return min(delay, self.fresh_hours * 3600)
+
+    def plan(self, urls, queue, refresh=False):
+        """Постановка ссылок задачи в очередь. refresh=True игнорирует сохраненные результаты"""
+        batch = FrontierBatch(queue)
+        now = time.time()
+        fresh_after = now - self.fresh_hours * 3600
+        seen = set()
+        with self._lock, self._db:
+            for url in urls:
+                key, canonical_url = self.canonicalize(url)
+                if key is None:
+                    continue
+                if key in seen:
+                    batch.duplicates += 1
+                    continue
+                seen.add(key)
+                batch.total += 1
+                # Базу делят несколько процессов: строка создается, только если ее еще нет
+                self._db.execute(
+                    "INSERT INTO frontier (queue, key, url, state) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (queue, key) DO NOTHING",
+                    (queue, key, canonical_url, QUEUED),
+                )
+                state, done_at, not_before, result = self._db.execute(
+                    "SELECT state, done_at, not_before, result FROM frontier WHERE queue=? AND key=?",
+                    (queue, key),
+                ).fetchone()
+                if not refresh and state == DONE and done_at >= fresh_after:
+                    batch.cached.append(json.loads(result))
+                    continue
+                if not refresh and state == FAILED and not_before is not None and not_before > now:
+                    # Сохраненная неудача не выдается как результат: ссылка ждет своей паузы
+                    batch.deferred.append(canonical_url)
+                    continue
+                if state in (DONE, FAILED):
+                    self._db.execute(
+                        "UPDATE frontier SET url=?, batch=NULL, state=?, leased_at=NULL WHERE queue=? AND key=?",
+                        (canonical_url, QUEUED, queue, key),
+                    )
+                # Ссылку в очереди или в работе у другой задачи не перехватываем, а связываем и с этой
+                self._db.execute(
+                    "INSERT INTO batch_items (batch, queue, key, seq) VALUES (?, ?, ?, ?)",
+                    (batch.id, queue, key, batch.total),
+                )
+        logger.info(
+            f"Фронтир {queue}: {batch.total} ссылок, из сохраненных результатов {len(batch.cached)}, "
+            f"отложено после неудач {len(batch.deferred)}, повторов отброшено {batch.duplicates}"
+        )
+        return batch
+
+    def lease(self, batch):
+        """Следующая ссылка задачи для воркера или None, если свободных не осталось"""
+        now = time.time()
+        stale = now - self.lease_seconds
+        with self._lock, self._db:
+            while True:
+                # Ссылки воркера, который упал, не вернув результат, выдаются повторно
+                row = self._db.execute(
+                    f"SELECT f.key, f.url {_PENDING} AND (f.state=? OR (f.state=? AND f.leased_at < ?)) "
+                    "ORDER BY f.done_at IS NOT NULL, f.done_at, b.seq LIMIT 1",
+                    (batch.id, QUEUED, LEASED, stale),
+                ).fetchone()
+                if row is None:
+                    return None
+                key, url = row
+                # Другой процесс мог забрать ту же ссылку между выборкой и обновлением
+                claimed = self._db.execute(
+                    "UPDATE frontier SET state=?, batch=?, leased_at=? WHERE queue=? AND key=? "
+                    "AND (state=? OR (state=? AND leased_at < ?))",
+                    (LEASED, batch.id, now, batch.queue, key, QUEUED, LEASED, stale),
+                ).rowcount
+                if claimed:
+                    return url
+
+    def iter_leases(self, batch):
+        """Ссылки задачи по одной, пока очередь не опустеет. Каждый воркер берет свой итератор.
+
+        Пока ссылки задачи парсит другая задача, итератор ждет: если та упадет,
+        ее ссылки вернутся в очередь по истечении аренды.
+        """
+        token = current_token()
+        while True:
+            url = self.lease(batch)
+            if url is not None:
+                yield url
+                continue
+            if not self._leased_elsewhere(batch):
+                return
+            if token is not None:
+                token.check()
+                token.wait(SHARED_POLL_SECONDS)
+            else:
+                time.sleep(SHARED_POLL_SECONDS)
+
+    def _leased_elsewhere(self, batch):
+        with self._lock:
+            row = self._db.execute(
+                f"SELECT 1 {_PENDING} AND f.state=? AND f.batch IS NOT ? AND f.leased_at >= ? LIMIT 1",
+                (batch.id, LEASED, batch.id, time.time() - self.lease_seconds),
+            ).fetchone()
+        return row is not None
+
+    def record(self, batch, result):
+        """Результат обработки ссылки. Неудачная ссылка откладывается с удвоением паузы"""
+        key, _ = self.canonicalize(result.get(QUEUES[batch.queue]))
+        if key is None:
+            return
+        now = time.time()
+        inn = result.get('inn')
+        payload = json.dumps(result, ensure_ascii=False)
+        with self._lock, self._db:
+            if inn == TIMEOUT_MARKER:
+                # Ссылка не виновата в исчерпании бюджета: возвращается в очередь без штрафа
+                self._db.execute(
+                    "UPDATE frontier SET state=?, batch=NULL, leased_at=NULL "
+                    "WHERE queue=? AND key=? AND state=? AND batch=?",
+                    (QUEUED, batch.queue, key, LEASED, batch.id),
+                )
+            elif inn in FAILED_MARKERS:
+                row = self._db.execute(
+                    "SELECT attempts FROM frontier WHERE queue=? AND key=?", (batch.queue, key)
+                ).fetchone()
+                attempts = (row[0] if row else 0) + 1
+                self._db.execute(
+                    "UPDATE frontier SET state=?, batch=NULL, attempts=?, not_before=?, result=?, leased_at=NULL "
+                    "WHERE queue=? AND key=?",
+                    (FAILED, attempts, now + self.retry_delay(attempts), payload, batch.queue, key),
+                )
+            else:
+                self._db.execute(
+                    "UPDATE frontier SET state=?, batch=NULL, done_at=?, attempts=0, not_before=NULL, result=?, "
+                    "leased_at=NULL WHERE queue=? AND key=?",
+                    (DONE, now, payload, batch.queue, key),
+                )
+            self._db.execute(
+                "UPDATE batch_items SET delivered=1 WHERE batch=? AND key=?", (batch.id, key)
+            )
+
+    def shared_results(self, batch):
+        """Результаты ссылок задачи, которые за это время обработала другая задача.
+
+        Ссылки, на которых другая задача потерпела неудачу, попадают в batch.deferred.
+        """
+        with self._lock, self._db:
+            rows = self._db.execute(
+                f"SELECT f.key, f.url, f.state, f.result {_PENDING} AND f.state IN (?, ?) ORDER BY b.seq",
+                (batch.id, DONE, FAILED),
+            ).fetchall()
+            self._db.executemany(
+                "UPDATE batch_items SET delivered=1 WHERE batch=? AND key=?",
+                [(batch.id, key) for key, _, _, _ in rows],
+            )
+        results = []
+        for _, url, state, result in rows:
+            if state == DONE:
+                results.append(json.loads(result))
+            else:
+                batch.deferred.append(url)
+        return results
+
+    def unfinished(self, batch):
+        """Ссылки задачи, по которым так и не записан результат"""
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT f.url {_PENDING} AND f.state IN (?, ?) ORDER BY b.seq",
+                (batch.id, QUEUED, LEASED),
+            ).fetchall()
+        return [url for url, in rows]
+
+    def finish(self, batch):
+        """Завершение задачи: ее недообработанные ссылки возвращаются в очередь для других задач"""
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE frontier SET state=?, batch=NULL, leased_at=NULL WHERE state=? AND batch=?",
+                (QUEUED, LEASED, batch.id),
+            )
+            self._db.execute("DELETE FROM batch_items WHERE batch=?", (batch.id,))
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def crawl(parser, urls, queue, refresh=False):
+    """Результаты parser.iter_url_list(urls) через фронтир: сначала сохраненные, затем новые.
+
+    Ссылки, отложенные после недавней неудачи, выдаются с причиной
+    DEFERRED_MARKER. Без фронтира (FRONTIER_ENABLED=false или база
+    недоступна) ссылки обрабатываются как есть.
+    """
+    frontier = get_frontier()
+    if frontier is None:
+        yield from parser.iter_url_list(urls)
+        return
+    batch = frontier.plan(urls, queue, refresh=refresh)
+    try:
+        for result in batch.cached:
+            yield parser._emit(result)
+        if batch.to_crawl:
+            for result in parser.iter_url_list(frontier.iter_leases(batch)):
+                frontier.record(batch, result)
+                yield result
+            for result in frontier.shared_results(batch):
+                yield parser._emit(result)
+        for url in batch.deferred:
+            yield parser._emit(parser._error_result(url, DEFERRED_MARKER))
+    finally:
+        frontier.finish(batch)
+
+
+_frontier = None
+_frontier_loaded = False
+_frontier_lock = threading.Lock()
+
+
+def get_frontier():
+    """Общий фронтир ссылок или None, если он выключен.
+
+    Настройки config.txt: FRONTIER_ENABLED, FRONTIER_PATH (по умолчанию
+    frontier.sqlite3 рядом с config.txt), FRONTIER_FRESH_HOURS,
+    FRONTIER_RETRY_MINUTES и FRONTIER_LEASE_SECONDS.
+    """
+    global _frontier, _frontier_loaded
+    with _frontier_lock:
+        if not _frontier_loaded:
+            _frontier = _create_frontier()
+            _frontier_loaded = True
+        return _frontier
+
+
+def _create_frontier():
+    config = get_config()
+    if not config.typed("FRONTIER_ENABLED"):
+        return None
+    path = config.typed("FRONTIER_PATH").strip() or "frontier.sqlite3"
+    if not os.path.isabs(path):
+        path = os.path.join(get_app_dir(), path)
+    try:
+        return CrawlFrontier(
+            path,
+            fresh_hours=config.typed("FRONTIER_FRESH_HOURS"),
+            retry_minutes=config.typed("FRONTIER_RETRY_MINUTES"),
+            lease_seconds=config.typed("FRONTIER_LEASE_SECONDS"),
+        )
+    except Exception as e:
+        logger.error(f"Фронтир ссылок недоступен, ссылки обрабатываются без учета прошлых запусков: {str(e)}")
+        return None
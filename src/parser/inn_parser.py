@@ -1,7 +1,7 @@
 # parser_inn.py
 import logging
 import os
-import time
+from collections import deque
 from datetime import datetime
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
@@ -10,23 +10,47 @@ from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from src.parser.ozon_parser import OzonSellerParser
 from src.parser.product_parser import ProductParser
 from src.parser.excel_writer import ExcelWriter
-
-# Настройка логирования
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
+from src.parser.utils import open_page, is_session_alive, SELLER_PAGE_READY, PRODUCT_PAGE_READY
+from src.parser.timing import timing_report
+from src.parser.antibot import ChallengeDetectedError, MAX_CHALLENGE_REQUEUES
+from src.parser.deadline import Deadline, DeadlineExceeded, job_deadline, item_deadline
+from src.parser.cancellation import JobCancelled, current_token
+from src.parser.retry import classify_error, driver_breaker, DRIVER_DEAD, SessionDeadError, MAX_RESPAWN_REQUEUES
 
 logger = logging.getLogger(__name__)
 
+
+def seller_results_to_rows(results):
+    """Результаты INNParser в строки для ExcelWriter.save_sellers_to_excel"""
+    return [
+        {
+            'name': result['seller_name'],
+            'price_with_discount': result['company_name'],
+            'price_without_discount': result['inn'],
+            'discount_percent': '',
+            'rating': '',
+            'reviews_count': '',
+            'url': result['seller_url']
+        }
+        for result in results
+    ]
+
+
 class INNParser:
-    def __init__(self, headless=False):
-        """Инициализация парсера ИНН"""
-        self.seller_parser = OzonSellerParser(headless=headless)
+    def __init__(self, headless=False, driver=None, on_result=None):
+        """Инициализация парсера ИНН.
+
+        on_result(result) вызывается для каждого обработанного продавца сразу по готовности.
+        """
+        self.seller_parser = OzonSellerParser(headless=headless, driver=driver)
         self.driver = self.seller_parser.driver
         self.product_parser = ProductParser()
         self.excel_writer = ExcelWriter()
         self.results = []
+        self.processed = 0
+        self.on_result = on_result
+        # Бюджет времени текущего продавца, задается в parse_url_list
+        self.deadline = Deadline.unbounded()
         
     def load_seller_urls(self, file_path="sellers.txt"):
         """Загрузка ссылок продавцов из файла"""
@@ -46,24 +70,57 @@ class INNParser:
             return []
         
     def parse_url_list(self, urls):
-        """Парсинг списка URL продавцов"""
+        """Парсинг списка URL продавцов, все результаты собираются в self.results"""
         self.results = []  # очищаем предыдущие результаты
         
         if not urls:
             logger.error("Нет ссылок для парсинга!")
             return False
         
-        logger.info(f"Начинаем парсинг {len(urls)} продавцов")
+        # Отмена задачи прерывает обработку; уже собранные результаты остаются в self.results
+        for result in self.iter_url_list(urls):
+            self.results.append(result)
+        return True
+
+    def iter_url_list(self, urls):
+        """Результаты по списку URL продавцов по мере обработки.
+
+        urls может быть любым итерируемым объектом: ссылки берутся по одной,
+        а результаты не накапливаются, поэтому память не растет с размером списка.
+        """
+        total = len(urls) if hasattr(urls, '__len__') else '?'
+        logger.info(f"Начинаем парсинг {total} продавцов")
         
-        for i, seller_url in enumerate(urls, 1):
+        # URL, на которых сработал антибот, обрабатываются повторно после остальных
+        source = enumerate(urls, 1)
+        retry = deque()
+        self.processed = 0
+        job = job_deadline(current_token())
+        while True:
+            job.check_cancelled()
+            item = next(source, None)
+            if item is not None:
+                (i, seller_url), requeues = item, 0
+            elif retry:
+                i, seller_url, requeues = retry.popleft()
+            else:
+                break
+            if job.expired():
+                logger.error(f"✗ Время задачи истекло, продавец {i} не обработан")
+                yield self._emit(self._error_result(seller_url, 'Таймаут'))
+                continue
+            self.deadline = item_deadline(job)
             logger.info(f"\n{'='*60}")
-            logger.info(f"Парсинг продавца {i}/{len(urls)}: {seller_url}")
+            logger.info(f"Парсинг продавца {i}/{total}: {seller_url}")
             logger.info(f"{'='*60}")
             
             try:
                 seller_data = self.parse_single_seller(seller_url)
+                # Ошибки внутри обработки перехватываются, поэтому падение браузера проверяем отдельно
+                if not is_session_alive(self.driver):
+                    raise SessionDeadError("Сессия браузера завершилась во время обработки")
                 
-                # Добавляем результат в список
+                # Результат по продавцу
                 result = {
                     'seller_url': seller_url,
                     'seller_name': seller_data.get('seller_name', 'Не найдено'),
@@ -71,93 +128,54 @@ class INNParser:
                     'inn': seller_data.get('inn', 'Не найдено')
                 }
                 
-                self.results.append(result)
+                driver_breaker.record_success(id(self.driver))
                 logger.info(f"✓ Продавец {i} обработан. ИНН: {result['inn']}")
+                yield self._emit(result)
                 
-                # Небольшая пауза между продавцами
-                time.sleep(2)
-                
+            except ChallengeDetectedError as e:
+                logger.warning(f"⚠ Антибот на продавце {i}, меняем браузер: {e.reason}")
+                self._rotate_driver()
+                if requeues < MAX_CHALLENGE_REQUEUES:
+                    retry.append((i, seller_url, requeues + 1))
+                    continue
+                yield self._emit(self._error_result(seller_url))
+            except JobCancelled:
+                raise
+            except DeadlineExceeded as e:
+                logger.error(f"✗ Продавец {i} не уложился во время: {str(e)}")
+                yield self._emit(self._error_result(seller_url, 'Таймаут'))
             except Exception as e:
+                if classify_error(e) == DRIVER_DEAD:
+                    logger.warning(f"⚠ Браузер упал на продавце {i}, перезапускаем: {str(e)}")
+                    if not self._respawn_driver():
+                        logger.error("✗ Не удалось перезапустить браузер, оставшиеся ссылки не обработаны")
+                        yield self._emit(self._error_result(seller_url))
+                        for _, rest_url in source:
+                            yield self._emit(self._error_result(rest_url))
+                        for _, rest_url, _ in retry:
+                            yield self._emit(self._error_result(rest_url))
+                        break
+                    if requeues < MAX_RESPAWN_REQUEUES:
+                        retry.append((i, seller_url, requeues + 1))
+                    else:
+                        yield self._emit(self._error_result(seller_url))
+                    continue
+
                 logger.error(f"✗ Ошибка при парсинге продавца {i}: {str(e)}")
                 
                 # Добавляем результат с ошибкой
-                error_result = {
-                    'seller_url': seller_url,
-                    'seller_name': 'Ошибка',
-                    'company_name': 'Ошибка',
-                    'inn': 'Ошибка'
-                }
-                self.results.append(error_result)
+                yield self._emit(self._error_result(seller_url))
                 
-                # Пытаемся восстановить драйвер при критической ошибке
-                try:
-                    self.driver.get("about:blank")
-                    time.sleep(1)
-                except:
-                    logger.warning("Проблемы с драйвером, продолжаем...")
+                # Восстановление драйвера по классу ошибки
+                self._recover_driver(e)
         
         logger.info(f"\n{'='*60}")
-        logger.info(f"Парсинг завершен! Обработано {len(self.results)} продавцов")
+        logger.info(f"Парсинг завершен! Обработано {self.processed} продавцов")
         logger.info(f"{'='*60}")
-        
-        return True
     
     def parse_all_sellers(self):
         """Парсинг всех продавцов из файла sellers.txt"""
-        seller_urls = self.load_seller_urls()
-        
-        if not seller_urls:
-            logger.error("Нет ссылок для парсинга!")
-            return False
-        
-        logger.info(f"Начинаем парсинг {len(seller_urls)} продавцов")
-        
-        for i, seller_url in enumerate(seller_urls, 1):
-            logger.info(f"\n{'='*60}")
-            logger.info(f"Парсинг продавца {i}/{len(seller_urls)}: {seller_url}")
-            logger.info(f"{'='*60}")
-            
-            try:
-                seller_data = self.parse_single_seller(seller_url)
-                
-                # Добавляем результат в список
-                result = {
-                    'seller_url': seller_url,
-                    'seller_name': seller_data.get('seller_name', 'Не найдено'),
-                    'company_name': seller_data.get('company_name', 'Не найдено'),
-                    'inn': seller_data.get('inn', 'Не найдено')
-                }
-                
-                self.results.append(result)
-                logger.info(f"✓ Продавец {i} обработан. ИНН: {result['inn']}")
-                
-                # Небольшая пауза между продавцами
-                time.sleep(2)
-                
-            except Exception as e:
-                logger.error(f"✗ Ошибка при парсинге продавца {i}: {str(e)}")
-                
-                # Добавляем результат с ошибкой
-                error_result = {
-                    'seller_url': seller_url,
-                    'seller_name': 'Ошибка',
-                    'company_name': 'Ошибка',
-                    'inn': 'Ошибка'
-                }
-                self.results.append(error_result)
-                
-                # Пытаемся восстановить драйвер при критической ошибке
-                try:
-                    self.driver.get("about:blank")
-                    time.sleep(1)
-                except:
-                    logger.warning("Проблемы с драйвером, продолжаем...")
-        
-        logger.info(f"\n{'='*60}")
-        logger.info(f"Парсинг завершен! Обработано {len(self.results)} продавцов")
-        logger.info(f"{'='*60}")
-        
-        return True
+        return self.parse_url_list(self.load_seller_urls())
     
     def parse_single_seller(self, seller_url):
         """Парсинг одного продавца"""
@@ -170,8 +188,7 @@ class INNParser:
         try:
             # Переходим на страницу продавца
             logger.info(f"Открываем страницу продавца: {seller_url}")
-            self.driver.get(seller_url)
-            time.sleep(3)
+            open_page(self.driver, seller_url, wait_for=SELLER_PAGE_READY, deadline=self.deadline)
             
             # Получаем название продавца используя ProductParser
             seller_data['seller_name'] = self._get_seller_name()
@@ -193,8 +210,7 @@ class INNParser:
                 
                 try:
                     # Переходим к товару
-                    self.driver.get(product_url)
-                    time.sleep(2)
+                    open_page(self.driver, product_url, wait_for=PRODUCT_PAGE_READY, deadline=self.deadline)
                     
                     # Если не получили название продавца на странице магазина,
                     # пытаемся получить его со страницы товара
@@ -215,6 +231,8 @@ class INNParser:
                     else:
                         logger.info(f"ИНН не найден на товаре {i}, пробуем следующий...")
                         
+                except (ChallengeDetectedError, DeadlineExceeded):
+                    raise
                 except Exception as e:
                     logger.warning(f"Ошибка при обработке товара {i}: {str(e)}")
                     continue
@@ -222,6 +240,8 @@ class INNParser:
             if seller_data['inn'] == 'Не найдено':
                 logger.warning("ИНН не найден ни на одном товаре продавца")
             
+        except (ChallengeDetectedError, DeadlineExceeded):
+            raise
         except Exception as e:
             logger.error(f"Критическая ошибка при парсинге продавца: {str(e)}")
             
@@ -263,9 +283,6 @@ class INNParser:
         product_links = []
         
         try:
-            # Ждем загрузки товаров
-            time.sleep(2)
-            
             # Различные селекторы для ссылок на товары
             product_selectors = [
                 'a[href*="/product/"]',
@@ -277,7 +294,7 @@ class INNParser:
             
             for selector in product_selectors:
                 try:
-                    elements = WebDriverWait(self.driver, 5).until(
+                    elements = WebDriverWait(self.driver, self.deadline.clip(5)).until(
                         EC.presence_of_all_elements_located((By.CSS_SELECTOR, selector))
                     )
                     
@@ -314,7 +331,9 @@ class INNParser:
         
         try:
             # Используем существующий парсер деталей продавца
-            seller_details = self.seller_parser.seller_details_parser.parse_seller_details(self.driver)
+            seller_details = self.seller_parser.seller_details_parser.parse_seller_details(
+                self.driver, deadline=self.deadline
+            )
             
             if seller_details:
                 # Оставляем только нужные поля
@@ -327,6 +346,8 @@ class INNParser:
             
             return inn_data
             
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.error(f"Ошибка при извлечении ИНН: {str(e)}")
             return inn_data
@@ -338,23 +359,11 @@ class INNParser:
                 logger.warning("Нет данных для сохранения")
                 return None
             
-            # Преобразуем данные в формат для ExcelWriter
-            products_data = []
-            for result in self.results:
-                product_data = {
-                    'name': result['seller_name'],
-                    'price_with_discount': result['company_name'],
-                    'price_without_discount': result['inn'],
-                    'discount_percent': '',
-                    'rating': '',
-                    'reviews_count': '',
-                    'url': result['seller_url']
-                }
-                products_data.append(product_data)
-            
             # Используем ExcelWriter для сохранения
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filepath = self.excel_writer.save_sellers_to_excel(products_data, f"sellers_inn_{timestamp}")
+            filepath = self.excel_writer.save_sellers_to_excel(
+                seller_results_to_rows(self.results), f"sellers_inn_{timestamp}"
+            )
             
             if filepath:
                 logger.info(f"✓ Результаты сохранены в файл: {filepath}")
@@ -373,6 +382,56 @@ class INNParser:
             logger.error(f"Ошибка при сохранении в Excel: {str(e)}")
             return None
     
+    def _emit(self, result):
+        """Результат сразу подписчику on_result; возвращается для выдачи из iter_url_list"""
+        self.processed += 1
+        if self.on_result:
+            try:
+                self.on_result(result)
+            except Exception as e:
+                logger.warning(f"Ошибка передачи промежуточного результата: {str(e)}")
+        return result
+
+    def _error_result(self, seller_url, reason='Ошибка'):
+        return {
+            'seller_url': seller_url,
+            'seller_name': reason,
+            'company_name': reason,
+            'inn': reason
+        }
+
+    def _recover_driver(self, exc):
+        """Восстановление после ошибки: мертвую сессию заменяем, живую сбрасываем на about:blank"""
+        kind = classify_error(exc)
+        tripped = driver_breaker.record_failure(id(self.driver), kind)
+        if kind == DRIVER_DEAD or tripped:
+            logger.warning(f"Сессия браузера неработоспособна ({kind}), заменяем")
+            driver_breaker.forget(id(self.driver))
+            self._rotate_driver()
+            return
+        try:
+            self.driver.get("about:blank")
+        except Exception as e:
+            logger.warning(f"Проблемы с драйвером, заменяем: {str(e)}")
+            self._rotate_driver()
+
+    def _respawn_driver(self):
+        """Новый браузер вместо упавшего. False, если запустить его не удалось"""
+        driver_breaker.forget(id(self.driver))
+        with timing_report.measure('driver_respawn'):
+            if not self._rotate_driver():
+                return False
+        return is_session_alive(self.driver)
+
+    def _rotate_driver(self):
+        """Новая сессия браузера вместо помеченной антиботом или упавшей"""
+        try:
+            self.driver = self.seller_parser.rotate_driver()
+            return True
+        except Exception as e:
+            logger.error(f"Не удалось заменить браузер: {str(e)}")
+            return False
+
     def close(self):
         """Закрытие парсера"""
         try:
@@ -0,0 +1,202 @@
+# parser/legal_info.py
+import re
+
+# Все шаблоны компилируются один раз при импорте модуля
+COMPANY_ABBRS = ('ИП', 'ООО', 'ОАО', 'ЗАО', 'ПАО', 'НАО', 'АО', 'Ltd', 'LLC', 'Inc')
+COMPANY_FULL_NAMES = (
+    'индивидуальный предприниматель',
+    'общество с ограниченной ответственностью',
+    'акционерное общество',
+)
+WORKING_HOURS_WORDS = (
+    'режим работы', 'график', 'часы работы', 'время работы',
+    'работаем', 'working hours', 'schedule',
+)
+ADDRESS_WORDS = (
+    'город', 'улица', 'проспект', 'область', 'квартира', 'офис', 'помещение',
+    'набережная', 'переулок', 'бульвар', 'край', 'район',
+    'ул.', 'обл.', 'наб.', 'пер.', 'бул.', 'корп.', 'стр.', 'пом.', 'кв.',
+)
+
+
+def _any_of(words):
+    return '|'.join(re.escape(word) for word in words)
+
+
+# Аббревиатуры форм собственности регистрозависимы и должны стоять отдельным словом.
+# Остальные шаблоны применяются к строке, один раз приведенной к нижнему регистру:
+# поиск по ней быстрее, чем регулярные выражения с IGNORECASE или перебор слов.
+# Граница слова слева проверяется в Python: шаблон, начинающийся с литералов, движок
+# ищет заметно быстрее, чем шаблон с \b в начале
+COMPANY_ABBR_RE = re.compile(rf'(?:{_any_of(COMPANY_ABBRS)})(?!\w)')
+COMPANY_NAME_RE = re.compile(_any_of(COMPANY_FULL_NAMES))
+WORKING_HOURS_RE = re.compile(_any_of(WORKING_HOURS_WORDS))
+# Короткие сокращения ("г.", "д.", "пр.") — только отдельным словом; шесть цифр — почтовый индекс
+ADDRESS_RE = re.compile(rf'{_any_of(ADDRESS_WORDS)}|(?:^|[\s,])(?:г|д|пр|дом)[.\s]|(?<!\d)\d{{6}}(?!\d)')
+NUMBER_RE = re.compile(r'(?<!\d)\d{10,15}(?!\d)')
+LONG_NUMBER_RE = re.compile(r'\d{10,}')
+DIGITS_RE = re.compile(r'\d')
+
+# Слова, по которым текст элемента страницы похож на блок с данными продавца.
+# Как и раньше, ищутся подстрокой без учета регистра
+SELLER_INFO_WORDS = ('ИП', 'ООО', 'АО', 'ЗАО', 'ПАО', 'Ltd', 'LLC', 'Inc', 'ОАО')
+SELLER_DETAILS_WORDS = SELLER_INFO_WORDS + (
+    'режим работы', 'working hours', 'график работы',
+    'адрес', 'address', 'г.', 'город', 'ул.', 'улица',
+)
+SELLER_INFO_RE = re.compile(_any_of(word.lower() for word in SELLER_INFO_WORDS))
+SELLER_DETAILS_RE = re.compile(_any_of(word.lower() for word in SELLER_DETAILS_WORDS))
+
+INN10_WEIGHTS = (2, 4, 10, 3, 5, 9, 4, 6, 8)
+INN12_WEIGHTS_1 = (7, 2, 4, 10, 3, 5, 9, 4, 6, 8)
+INN12_WEIGHTS_2 = (3, 7, 2, 4, 10, 3, 5, 9, 4, 6, 8)
+
+# Метки строк тултипа в порядке приоритета проверки
+LABEL_COMPANY = 'company_name'
+LABEL_INN = 'inn'
+LABEL_WORKING_HOURS = 'working_hours'
+LABEL_ADDRESS = 'address'
+
+
+def _inn_checksum(digits, weights):
+    return sum(int(d) * w for d, w in zip(digits, weights)) % 11 % 10
+
+
+def is_valid_inn(number):
+    """Проверка контрольной суммы ИНН (10 цифр — юрлицо, 12 — физлицо/ИП)"""
+    if not number or not number.isdigit():
+        return False
+    if len(number) == 10:
+        return _inn_checksum(number, INN10_WEIGHTS) == int(number[9])
+    if len(number) == 12:
+        return (_inn_checksum(number, INN12_WEIGHTS_1) == int(number[10])
+                and _inn_checksum(number, INN12_WEIGHTS_2) == int(number[11]))
+    return False
+
+
+def is_valid_ogrn(number):
+    """Проверка контрольной суммы ОГРН (13 цифр) и ОГРНИП (15 цифр)"""
+    if not number or not number.isdigit():
+        return False
+    if len(number) == 13:
+        return int(number[:12]) % 11 % 10 == int(number[12])
+    if len(number) == 15:
+        return int(number[:14]) % 13 % 10 == int(number[14])
+    return False
+
+
+def identifier_kind(number):
+    """Тип идентификатора по длине и контрольной сумме: inn, ogrn, ogrnip или None"""
+    if len(number) in (10, 12):
+        return 'inn' if is_valid_inn(number) else None
+    if len(number) == 13:
+        return 'ogrn' if is_valid_ogrn(number) else None
+    if len(number) == 15:
+        return 'ogrnip' if is_valid_ogrn(number) else None
+    return None
+
+
+class LegalInfoClassifier:
+    """Классификатор строк тултипа с юридической информацией продавца"""
+
+    def find_identifier(self, text):
+        """Возвращает первый ИНН/ОГРН с корректной контрольной суммой или None"""
+        for match in NUMBER_RE.finditer(text):
+            number = match.group()
+            if identifier_kind(number):
+                return number
+        return None
+
+    def is_company_name(self, text):
+        return self._is_company_name(text, text.lower())
+
+    def is_inn(self, text):
+        """Строка состоит преимущественно из ИНН/ОГРН с корректной контрольной суммой"""
+        return self._inn_in_line(text) is not None
+
+    def is_working_hours(self, text):
+        return WORKING_HOURS_RE.search(text.lower()) is not None
+
+    def is_address(self, text):
+        return ADDRESS_RE.search(text.lower()) is not None
+
+    def _is_company_name(self, text, lower):
+        for match in COMPANY_ABBR_RE.finditer(text):
+            start = match.start()
+            if start == 0 or not (text[start - 1].isalnum() or text[start - 1] == '_'):
+                return True
+        return COMPANY_NAME_RE.search(lower) is not None
+
+    def _inn_in_line(self, text):
+        number = self.find_identifier(text)
+        if number and len(number) / len(text.strip()) > 0.5:
+            return number
+        return None
+
+    def looks_like_seller_info(self, text, details=False):
+        """Быстрая проверка, похож ли текст на блок с данными продавца.
+
+        details=True добавляет слова режима работы и адреса и не отбрасывает
+        короткие строки (как в SellerDetailsParser).
+        """
+        if not text:
+            return False
+        if not details and len(text.strip()) < 5:
+            return False
+        pattern = SELLER_DETAILS_RE if details else SELLER_INFO_RE
+        return self._has_long_number(text) or pattern.search(text.lower()) is not None
+
+    def _has_long_number(self, text):
+        """Слово, в котором не меньше 10 цифр (ИНН/ОГРН, в том числе с разделителями)"""
+        if LONG_NUMBER_RE.search(text):
+            return True
+        if len(DIGITS_RE.findall(text)) < 10:
+            return False
+        return any(len(DIGITS_RE.findall(word)) >= 10 for word in text.split())
+
+    def classify(self, line):
+        """Метка одной строки: company_name, inn, working_hours, address или None"""
+        return self._classify(line)[0]
+
+    def _classify(self, line):
+        """Метка строки и найденный идентификатор (для ИНН/ОГРН) за один проход"""
+        if line.isdigit():
+            # Строка из одних цифр: ИНН/ОГРН или почтовый индекс, остальные проверки не нужны
+            if identifier_kind(line):
+                return LABEL_INN, line
+            return (LABEL_ADDRESS if len(line) == 6 else None), None
+        lower = line.lower()
+        if self._is_company_name(line, lower):
+            return LABEL_COMPANY, None
+        # Идентификатор длиной до 15 цифр занимает больше половины строки только в строке короче 30
+        number = self._inn_in_line(line) if len(line) < 30 else None
+        if number:
+            return LABEL_INN, number
+        if WORKING_HOURS_RE.search(lower):
+            return LABEL_WORKING_HOURS, None
+        if ADDRESS_RE.search(lower):
+            return LABEL_ADDRESS, None
+        return None, None
+
+    def classify_lines(self, lines, first=False):
+        """Разметка всех строк тултипа за один проход.
+
+        Возвращает словарь в формате парсеров: company_name, inn, working_hours,
+        address и other_info для прочих строк. Значение — строка целиком, как
+        в прежних парсерах; из нескольких строк одного типа остается последняя,
+        с first=True — первая.
+        """
+        details = {}
+        for raw_line in lines:
+            line = raw_line.strip()
+            if not line:
+                continue
+            label = self._classify(line)[0]
+            if label is None:
+                details.setdefault('other_info', []).append(line)
+            elif not first or label not in details:
+                details[label] = line
+        return details
+
+
+classifier = LegalInfoClassifier()
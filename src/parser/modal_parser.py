@@ -4,79 +4,58 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.keys import Keys
 from .utils import wait_for_element
+from .antibot import challenge_detector, ChallengeDetectedError
+from .deadline import DeadlineExceeded
+from .retry import RetryPolicy
 import logging
 import re
-import time
 
 logger = logging.getLogger(__name__)
 
+SHOP_MODAL_RETRY = RetryPolicy('shop_modal', max_attempts=3, base_delay=1.5, max_delay=4.0)
+
 class ModalParser:
-    def open_shop_modal(self, driver):
-        """Открытие модального окна магазина с повторными попытками"""
-        max_attempts = 3
-        attempt_delay = 3  # секунды
+    def open_shop_modal(self, driver, deadline=None):
+        """Открытие модального окна магазина с повторами в пределах deadline"""
+        try:
+            return SHOP_MODAL_RETRY.call(self._try_open_shop_modal, driver, deadline, deadline=deadline)
+        except (ChallengeDetectedError, DeadlineExceeded):
+            raise
+        except Exception as e:
+            logger.error("Все попытки открыть модальное окно исчерпаны")
+            raise Exception(f"Не удалось открыть модальное окно: {str(e)}")
+
+    def _try_open_shop_modal(self, driver, deadline):
+        # На странице проверки виджета не будет: не ждем 20 секунд впустую
+        challenge_detector.check(driver)
         
-        for attempt in range(max_attempts):
-            try:
-                logger.info(f"Попытка {attempt + 1} из {max_attempts} открыть модальное окно")
-                
-                # Ожидаем появления виджета sellerTransparency
-                transparency_widget = wait_for_element(
-                    driver,
-                    (By.CSS_SELECTOR, 'div[data-widget="sellerTransparency"]'),
-                    timeout=20
-                )
-                
-                # Ищем кнопку "Магазин" по точному тексту
-                shop_button = transparency_widget.find_element(
-                    By.XPATH, 
-                    './/div[contains(@class, "b20-b") and .//div[text()="Магазин"]]'
-                )
-                
-                # Используем JavaScript для клика, чтобы обойти проблему с перекрытием
-                driver.execute_script("arguments[0].click();", shop_button)
-                logger.info("Клик по кнопке 'Магазин' выполнен с помощью JavaScript")
-                
-                # Ждем появления модального окна
-                time.sleep(1)
-                
-                # Проверяем, появилось ли модальное окно
-                try:
-                    modal = wait_for_element(
-                        driver,
-                        (By.CSS_SELECTOR, 'div[data-widget="modalLayout"]'),
-                        timeout=5
-                    )
-                    logger.info("Модальное окно успешно открыто")
-                    return True  # Успешно открыли модальное окно
-                    
-                except Exception as e:
-                    logger.warning(f"Модальное окно не появилось на попытке {attempt + 1}: {str(e)}")
-                    
-                    # Если это не последняя попытка, ждем перед следующей
-                    if attempt < max_attempts - 1:
-                        logger.info(f"Ожидание {attempt_delay} секунд перед следующей попыткой")
-                        time.sleep(attempt_delay)
-                        continue
-                    else:
-                        # Последняя попытка неудачна
-                        logger.error("Все попытки открыть модальное окно исчерпаны")
-                        raise Exception("Не удалось открыть модальное окно после всех попыток")
-                        
-            except Exception as e:
-                logger.error(f"Ошибка на попытке {attempt + 1}: {str(e)}")
-                
-                # Если это не последняя попытка, ждем и пробуем снова
-                if attempt < max_attempts - 1:
-                    logger.info(f"Ожидание {attempt_delay} секунд перед следующей попыткой")
-                    time.sleep(attempt_delay)
-                    continue
-                else:
-                    # Последняя попытка неудачна
-                    logger.error("Все попытки открыть модальное окно исчерпаны")
-                    raise Exception(f"Не удалось открыть модальное окно: {str(e)}")
+        # Ожидаем появления виджета sellerTransparency
+        transparency_widget = wait_for_element(
+            driver,
+            (By.CSS_SELECTOR, 'div[data-widget="sellerTransparency"]'),
+            timeout=20,
+            deadline=deadline
+        )
+        
+        # Ищем кнопку "Магазин" по точному тексту
+        shop_button = transparency_widget.find_element(
+            By.XPATH, 
+            './/div[contains(@class, "b20-b") and .//div[text()="Магазин"]]'
+        )
         
-        return False
+        # Используем JavaScript для клика, чтобы обойти проблему с перекрытием
+        driver.execute_script("arguments[0].click();", shop_button)
+        logger.info("Клик по кнопке 'Магазин' выполнен с помощью JavaScript")
+        
+        # Ждем появления модального окна
+        wait_for_element(
+            driver,
+            (By.CSS_SELECTOR, 'div[data-widget="modalLayout"]'),
+            timeout=6,
+            deadline=deadline
+        )
+        logger.info("Модальное окно успешно открыто")
+        return True
 
     def parse_modal_data(self, driver):
         """Парсинг данных из модального окна"""
@@ -134,17 +113,24 @@ class ModalParser:
             # Ищем кнопку закрытия модального окна
             close_button = driver.find_element(By.CSS_SELECTOR, 'button[aria-label="Закрыть"]')
             close_button.click()
-            time.sleep(1)
-        except:
+        except Exception:
             # Если кнопка не найдена, кликаем по overlay для закрытия
             try:
                 overlay = driver.find_element(By.CSS_SELECTOR, 'div[data-widget="modalLayout"]')
                 driver.execute_script("arguments[0].click();", overlay)
-                time.sleep(1)
-            except:
+            except Exception:
                 # Если ничего не получилось, нажимаем Escape
                 driver.find_element(By.TAG_NAME, 'body').send_keys(Keys.ESCAPE)
-                time.sleep(1)
+        self._wait_modal_closed(driver)
+
+    def _wait_modal_closed(self, driver, timeout=2):
+        """Ожидание, пока окно исчезнет, вместо фиксированной паузы"""
+        try:
+            WebDriverWait(driver, timeout, poll_frequency=0.2).until(
+                EC.invisibility_of_element_located((By.CSS_SELECTOR, 'div[data-widget="modalLayout"]'))
+            )
+        except Exception:
+            logger.debug("Модальное окно не закрылось за отведенное время")
 
     def _parse_number(self, value):
         """Преобразует строку с числами в целое число"""
@@ -1,16 +1,17 @@
 # parser/ozon_parser.py
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-import selenium_stealth
-from .utils import wait_for_element
+from .utils import wait_for_element, open_page, SELLER_PAGE_READY, PRODUCT_PAGE_READY
 from .product_parser import ProductParser
 from .seller_details_parser import SellerDetailsParser
 from .modal_parser import ModalParser
+from .stealth_driver import create_stealth_driver
+from .browser_pool import get_browser_pool
+from .adaptive_delay import delay_controller
+from .deadline import Deadline
+from .cancellation import current_token
 import logging
 import os
 import time
@@ -18,79 +19,21 @@ import time
 logger = logging.getLogger(__name__)
 
 class OzonSellerParser:
-    def __init__(self, headless=True, driver_path=None):
-        """Инициализация парсера с stealth режимом"""
-        self.options = Options()
-        
-        # Базовые настройки Chrome
-        if headless:
-            self.options.add_argument("--headless")
-            
-        self.options.add_argument("--window-size=1920,1080")
-        # self.options.add_argument("--headless")
-        self.options.add_argument("--start-maximized")
-        self.options.add_argument("--no-sandbox")
-        self.options.add_argument("--disable-dev-shm-usage")
-        self.options.add_argument("--disable-gpu")
-        self.options.add_argument("--disable-features=VizDisplayCompositor")
-        
-        # Дополнительные настройки для обхода детекции
-        self.options.add_argument("--disable-blink-features=AutomationControlled")
-        self.options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        self.options.add_experimental_option('useAutomationExtension', False)
-        
-        # Настройки User-Agent
-        self.options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
-        
-        # Поиск пути к драйверу
-        # self.driver_path = driver_path or self._find_default_driver()
-        
-        # Создание сервиса
-        # if self.driver_path:
-        #     service = Service(self.driver_path)
-        #     self.driver = webdriver.Chrome(service=service, options=self.options)
-        # else:
-            # Попытка использовать системный ChromeDriver
-        self.driver = webdriver.Chrome(options=self.options)
-        
-        # Применение stealth настроек
-        selenium_stealth.stealth(
-            self.driver,
-            languages=["ru-RU", "ru"],
-            vendor="Google Inc.",
-            platform="Win32",
-            webgl_vendor="Intel Inc.",
-            renderer="Intel Iris OpenGL Engine",
-            fix_hairline=True,
-        )
-        
-        # Дополнительные скрипты для маскировки
-        self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-        self.driver.execute_cdp_cmd('Network.setUserAgentOverride', {
-            "userAgent": 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-        })
+    def __init__(self, headless=True, driver_path=None, driver=None):
+        """Инициализация парсера с stealth режимом.
+
+        Если передан driver (например, арендованный из пула), парсер использует его
+        и не закрывает по окончании работы.
+        """
+        self.headless = headless
+        self.owns_driver = driver is None
+        self.driver = driver or create_stealth_driver(headless=headless)
         
         # Инициализация парсеров
         self.product_parser = ProductParser()
         self.seller_details_parser = SellerDetailsParser()
         self.modal_parser = ModalParser()
 
-    def _find_default_driver(self):
-        """Поиск драйвера по умолчанию"""
-        paths = [
-            r"C:\chromedriver-win64\chromedriver.exe",
-            r"C:\Program Files\chromedriver\chromedriver.exe",
-            r"C:\chromedriver\chromedriver.exe",
-            "/usr/local/bin/chromedriver",
-            "/usr/bin/chromedriver"
-        ]
-        for path in paths:
-            if os.path.exists(path):
-                logger.info(f"Найден драйвер: {path}")
-                return path
-        logger.warning("ChromeDriver не найден в стандартных путях")
-        return None
-
     def _check_out_of_stock(self, driver, result):
         """Проверка наличия товара"""
         try:
@@ -129,35 +72,30 @@ class OzonSellerParser:
         except TimeoutException:
             return False
 
-    def parse_seller(self, url):
+    def parse_seller(self, url, deadline=None):
         """Парсинг информации о продавце с переходом на первый товар"""
+        deadline = deadline or Deadline.unbounded(current_token())
         try:
             logger.info(f"Открываем URL продавца: {url}")
-            self.driver.get(url)
-            time.sleep(5)  # Увеличенная пауза для stealth
+            open_page(self.driver, url, wait_for=SELLER_PAGE_READY, deadline=deadline)
             
             # Имитируем человеческое поведение
             self._simulate_human_behavior()
             
             # Парсинг основной информации из модального окна
-            self.modal_parser.open_shop_modal(self.driver)
-                        
-            seller_data = self.modal_parser.parse_modal_data(self.driver)
-            self.modal_parser.close_modal(self.driver)
+            seller_data = self.read_shop_modal(deadline)
             
             # Переходим на первый товар для парсинга доп. информации
             first_product_link = self._get_first_product_link()
             if first_product_link:
                 logger.info(f"Переходим на первый товар: {first_product_link}")
-                self.driver.get(first_product_link)
-                time.sleep(4)
+                open_page(self.driver, first_product_link, wait_for=PRODUCT_PAGE_READY, deadline=deadline)
 
                 # Дополнительная имитация поведения
                 self._simulate_human_behavior()
                 
                 # Парсинг дополнительной информации о продавце
-                additional_details = self.seller_details_parser.parse_seller_details(self.driver)
-                seller_data.update(additional_details)
+                seller_data.update(self.read_seller_details(deadline))
             
             return seller_data
         except Exception as e:
@@ -166,14 +104,26 @@ class OzonSellerParser:
             logger.error("Скриншот ошибки сохранён как error_screenshot.png")
             raise
         finally:
-            self.driver.quit()
+            if self.owns_driver:
+                self.driver.quit()
+
+    def read_shop_modal(self, deadline=None):
+        """Чтение модального окна магазина на открытой странице продавца"""
+        self.modal_parser.open_shop_modal(self.driver, deadline=deadline)
+        seller_data = self.modal_parser.parse_modal_data(self.driver)
+        self.modal_parser.close_modal(self.driver)
+        return seller_data
+
+    def read_seller_details(self, deadline=None):
+        """Юридические данные продавца с открытой страницы товара"""
+        return self.seller_details_parser.parse_seller_details(self.driver, deadline=deadline)
 
     def _simulate_human_behavior(self):
         """Имитация человеческого поведения для обхода детекции"""
         try:
             # Случайный скролл
             self.driver.execute_script("window.scrollTo(0, Math.floor(Math.random() * 500));")
-            time.sleep(1)
+            delay_controller.sleep(1)
             
             # Движение мыши (имитация через JavaScript)
             self.driver.execute_script("""
@@ -186,7 +136,7 @@ class OzonSellerParser:
                 });
                 document.dispatchEvent(event);
             """)
-            time.sleep(0.5)
+            delay_controller.sleep(0.5)
             
         except Exception as e:
             logger.debug(f"Ошибка при имитации поведения: {str(e)}")
@@ -194,10 +144,10 @@ class OzonSellerParser:
     def _get_first_product_link(self):
         """Получение ссылки на первый товар продавца"""
         try:
-            # Ждем загрузки товаров
-            time.sleep(3)
-            
-            # Ищем первую ссылку на товар
+            # Ждем появления первой ссылки на товар
+            WebDriverWait(self.driver, 5).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, 'a[href*="/product/"]'))
+            )
             product_links = self.driver.find_elements(By.CSS_SELECTOR, 'a[href*="/product/"]')
             if product_links:
                 first_link = product_links[0].get_attribute('href')
@@ -207,10 +157,27 @@ class OzonSellerParser:
             logger.error(f"Ошибка при поиске ссылки на товар: {str(e)}")
             return None
 
+    def rotate_driver(self):
+        """Замена сессии браузера, например после проверки антибота. Возвращает новый драйвер"""
+        old_driver = self.driver
+        pool = get_browser_pool()
+        if not self.owns_driver and pool and pool.owns(old_driver):
+            self.driver = pool.rotate(old_driver)
+        else:
+            if self.owns_driver:
+                try:
+                    old_driver.quit()
+                except Exception as e:
+                    logger.debug(f"Ошибка при закрытии старого драйвера: {str(e)}")
+            self.driver = create_stealth_driver(headless=self.headless)
+            self.owns_driver = True
+        logger.info("Сессия браузера заменена")
+        return self.driver
+
     def close(self):
         """Закрытие драйвера"""
         try:
-            if hasattr(self, 'driver') and self.driver:
+            if hasattr(self, 'driver') and self.driver and self.owns_driver:
                 self.driver.quit()
                 logger.info("Драйвер успешно закрыт")
         except Exception as e:
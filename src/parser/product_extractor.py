@@ -23,11 +23,11 @@ class ProductExtractor:
             if product_data['name'] and product_data['url']:
                 return product_data
             else:
-                self.logger.debug(f"Недостаточно данных: {product_data}")
+                self.logger.debug("Недостаточно данных: %s", product_data)
                 return None
                 
         except Exception as e:
-            self.logger.debug(f"Ошибка извлечения данных товара: {str(e)}")
+            self.logger.debug("Ошибка извлечения данных товара: %s", e)
             return None
     
     def _extract_name(self, card):
@@ -56,7 +56,7 @@ class ProductExtractor:
             return ""  # Пустая строка вместо дефолтного текста
             
         except Exception as e:
-            self.logger.debug(f"Ошибка извлечения названия: {str(e)}")
+            self.logger.debug("Ошибка извлечения названия: %s", e)
             return ""
     
     def _extract_price_with_discount(self, card):
@@ -84,7 +84,7 @@ class ProductExtractor:
             return "0"
             
         except Exception as e:
-            self.logger.debug(f"Ошибка извлечения цены со скидкой: {str(e)}")
+            self.logger.debug("Ошибка извлечения цены со скидкой: %s", e)
             return "0"
     
     def _extract_price_without_discount(self, card):
@@ -116,7 +116,7 @@ class ProductExtractor:
             return self._extract_price_with_discount(card)
             
         except Exception as e:
-            self.logger.debug(f"Ошибка извлечения цены без скидки: {str(e)}")
+            self.logger.debug("Ошибка извлечения цены без скидки: %s", e)
             return self._extract_price_with_discount(card)
     
     def _extract_discount_percent(self, card):
@@ -153,7 +153,7 @@ class ProductExtractor:
             return "0%"
             
         except Exception as e:
-            self.logger.debug(f"Ошибка извлечения скидки: {str(e)}")
+            self.logger.debug("Ошибка извлечения скидки: %s", e)
             return "0%"
     
     def _extract_rating(self, card):
@@ -177,7 +177,7 @@ class ProductExtractor:
             
             return "Нет рейтинга"
         except Exception as e:
-            self.logger.debug(f"Ошибка извлечения рейтинга: {str(e)}")
+            self.logger.debug("Ошибка извлечения рейтинга: %s", e)
             return "Нет рейтинга"
     
     def _extract_reviews_count(self, card):
@@ -220,7 +220,7 @@ class ProductExtractor:
             
             return "0"
         except Exception as e:
-            self.logger.debug(f"Ошибка извлечения количества отзывов: {str(e)}")
+            self.logger.debug("Ошибка извлечения количества отзывов: %s", e)
             return "0"
     
     def _extract_url(self, card):
@@ -246,7 +246,7 @@ class ProductExtractor:
             return ""
             
         except Exception as e:
-            self.logger.debug(f"Ошибка извлечения URL: {str(e)}")
+            self.logger.debug("Ошибка извлечения URL: %s", e)
             return ""
     
     def _parse_price(self, price_text):
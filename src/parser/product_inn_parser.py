@@ -1,7 +1,7 @@
 # pproduct_inn_parser.py
 import logging
 import os
-import time
+from collections import deque
 from datetime import datetime
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
@@ -9,22 +9,29 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from src.parser.ozon_parser import OzonSellerParser
 from src.parser.excel_writer import ExcelWriter
-
-# Настройка логирования
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
+from src.parser.utils import open_page, is_session_alive, PRODUCT_PAGE_READY
+from src.parser.timing import timing_report
+from src.parser.antibot import ChallengeDetectedError, MAX_CHALLENGE_REQUEUES
+from src.parser.deadline import Deadline, DeadlineExceeded, job_deadline, item_deadline
+from src.parser.cancellation import JobCancelled, current_token
+from src.parser.retry import classify_error, driver_breaker, DRIVER_DEAD, SessionDeadError, MAX_RESPAWN_REQUEUES
 
 logger = logging.getLogger(__name__)
 
 class ProductINNParser:
-    def __init__(self, headless=True):
-        """Инициализация парсера ИНН для товаров"""
-        self.seller_parser = OzonSellerParser(headless=headless)
+    def __init__(self, headless=True, driver=None, on_result=None):
+        """Инициализация парсера ИНН для товаров.
+
+        on_result(result) вызывается для каждого обработанного товара сразу по готовности.
+        """
+        self.seller_parser = OzonSellerParser(headless=headless, driver=driver)
         self.driver = self.seller_parser.driver
         self.excel_writer = ExcelWriter()
         self.results = []
+        self.processed = 0
+        self.on_result = on_result
+        # Бюджет времени текущего товара, задается в parse_url_list
+        self.deadline = Deadline.unbounded()
         
     def load_product_urls(self, file_path="products.txt"):
         """Загрузка ссылок на товары из файла"""
@@ -44,24 +51,57 @@ class ProductINNParser:
             return []
     
     def parse_url_list(self, urls):
-        """Парсинг списка URL товаров"""
+        """Парсинг списка URL товаров, все результаты собираются в self.results"""
         self.results = []  # очищаем предыдущие результаты
         
         if not urls:
             logger.error("Нет ссылок для парсинга!")
             return False
         
-        logger.info(f"Начинаем парсинг {len(urls)} товаров")
+        # Отмена задачи прерывает обработку; уже собранные результаты остаются в self.results
+        for result in self.iter_url_list(urls):
+            self.results.append(result)
+        return True
+
+    def iter_url_list(self, urls):
+        """Результаты по списку URL товаров по мере обработки.
+
+        urls может быть любым итерируемым объектом: ссылки берутся по одной,
+        а результаты не накапливаются, поэтому память не растет с размером списка.
+        """
+        total = len(urls) if hasattr(urls, '__len__') else '?'
+        logger.info(f"Начинаем парсинг {total} товаров")
         
-        for i, product_url in enumerate(urls, 1):
+        # URL, на которых сработал антибот, обрабатываются повторно после остальных
+        source = enumerate(urls, 1)
+        retry = deque()
+        self.processed = 0
+        job = job_deadline(current_token())
+        while True:
+            job.check_cancelled()
+            item = next(source, None)
+            if item is not None:
+                (i, product_url), requeues = item, 0
+            elif retry:
+                i, product_url, requeues = retry.popleft()
+            else:
+                break
+            if job.expired():
+                logger.error(f"✗ Время задачи истекло, товар {i} не обработан")
+                yield self._emit(self._error_result(product_url, 'Таймаут'))
+                continue
+            self.deadline = item_deadline(job)
             logger.info(f"\n{'='*60}")
-            logger.info(f"Парсинг товара {i}/{len(urls)}: {product_url}")
+            logger.info(f"Парсинг товара {i}/{total}: {product_url}")
             logger.info(f"{'='*60}")
             
             try:
                 product_data = self.parse_single_product(product_url)
+                # Ошибки внутри обработки перехватываются, поэтому падение браузера проверяем отдельно
+                if not is_session_alive(self.driver):
+                    raise SessionDeadError("Сессия браузера завершилась во время обработки")
                 
-                # Добавляем результат в список (только нужные поля)
+                # Результат только с нужными полями
                 result = {
                     'seller_name': product_data.get('seller_name', 'Не найдено'),
                     'company_name': product_data.get('company_name', 'Не найдено'),
@@ -69,99 +109,57 @@ class ProductINNParser:
                     'product_url': product_url
                 }
                 
-                self.results.append(result)
+                driver_breaker.record_success(id(self.driver))
                 logger.info(f"✓ Товар {i} обработан:")
                 logger.info(f"  Продавец: {result['seller_name']}")
                 logger.info(f"  Компания: {result['company_name']}")
                 logger.info(f"  ИНН: {result['inn']}")
+                yield self._emit(result)
                 
-                # Пауза между товарами
-                time.sleep(2)
-                
+            except ChallengeDetectedError as e:
+                logger.warning(f"⚠ Антибот на товаре {i}, меняем браузер: {e.reason}")
+                self._rotate_driver()
+                if requeues < MAX_CHALLENGE_REQUEUES:
+                    retry.append((i, product_url, requeues + 1))
+                    continue
+                yield self._emit(self._error_result(product_url))
+            except JobCancelled:
+                raise
+            except DeadlineExceeded as e:
+                logger.error(f"✗ Товар {i} не уложился во время: {str(e)}")
+                yield self._emit(self._error_result(product_url, 'Таймаут'))
             except Exception as e:
+                if classify_error(e) == DRIVER_DEAD:
+                    logger.warning(f"⚠ Браузер упал на товаре {i}, перезапускаем: {str(e)}")
+                    if not self._respawn_driver():
+                        logger.error("✗ Не удалось перезапустить браузер, оставшиеся ссылки не обработаны")
+                        yield self._emit(self._error_result(product_url))
+                        for _, rest_url in source:
+                            yield self._emit(self._error_result(rest_url))
+                        for _, rest_url, _ in retry:
+                            yield self._emit(self._error_result(rest_url))
+                        break
+                    if requeues < MAX_RESPAWN_REQUEUES:
+                        retry.append((i, product_url, requeues + 1))
+                    else:
+                        yield self._emit(self._error_result(product_url))
+                    continue
+
                 logger.error(f"✗ Ошибка при парсинге товара {i}: {str(e)}")
                 
                 # Добавляем результат с ошибкой
-                error_result = {
-                    'seller_name': 'Ошибка',
-                    'company_name': 'Ошибка',
-                    'inn': 'Ошибка',
-                    'product_url': product_url
-                }
-                self.results.append(error_result)
+                yield self._emit(self._error_result(product_url))
                 
-                # Восстановление драйвера при ошибке
-                try:
-                    self.driver.get("about:blank")
-                    time.sleep(1)
-                except:
-                    logger.warning("Проблемы с драйвером, продолжаем...")
+                # Восстановление драйвера по классу ошибки
+                self._recover_driver(e)
         
         logger.info(f"\n{'='*60}")
-        logger.info(f"Парсинг завершен! Обработано {len(self.results)} товаров")
+        logger.info(f"Парсинг завершен! Обработано {self.processed} товаров")
         logger.info(f"{'='*60}")
-        
-        return True
     
     def parse_all_products(self):
         """Парсинг всех товаров из файла products.txt"""
-        product_urls = self.load_product_urls()
-        
-        if not product_urls:
-            logger.error("Нет ссылок для парсинга!")
-            return False
-        
-        logger.info(f"Начинаем парсинг {len(product_urls)} товаров")
-        
-        for i, product_url in enumerate(product_urls, 1):
-            logger.info(f"\n{'='*60}")
-            logger.info(f"Парсинг товара {i}/{len(product_urls)}: {product_url}")
-            logger.info(f"{'='*60}")
-            
-            try:
-                product_data = self.parse_single_product(product_url)
-                
-                # Добавляем результат в список (только нужные поля)
-                result = {
-                    'seller_name': product_data.get('seller_name', 'Не найдено'),
-                    'company_name': product_data.get('company_name', 'Не найдено'),
-                    'inn': product_data.get('inn', 'Не найдено'),
-                    'product_url': product_url
-                }
-                
-                self.results.append(result)
-                logger.info(f"✓ Товар {i} обработан:")
-                logger.info(f"  Продавец: {result['seller_name']}")
-                logger.info(f"  Компания: {result['company_name']}")
-                logger.info(f"  ИНН: {result['inn']}")
-                
-                # Пауза между товарами
-                time.sleep(2)
-                
-            except Exception as e:
-                logger.error(f"✗ Ошибка при парсинге товара {i}: {str(e)}")
-                
-                # Добавляем результат с ошибкой
-                error_result = {
-                    'seller_name': 'Ошибка',
-                    'company_name': 'Ошибка',
-                    'inn': 'Ошибка',
-                    'product_url': product_url
-                }
-                self.results.append(error_result)
-                
-                # Восстановление драйвера при ошибке
-                try:
-                    self.driver.get("about:blank")
-                    time.sleep(1)
-                except:
-                    logger.warning("Проблемы с драйвером, продолжаем...")
-        
-        logger.info(f"\n{'='*60}")
-        logger.info(f"Парсинг завершен! Обработано {len(self.results)} товаров")
-        logger.info(f"{'='*60}")
-        
-        return True
+        return self.parse_url_list(self.load_product_urls())
     
     def parse_single_product(self, product_url):
         """Парсинг одного товара - только данные продавца"""
@@ -174,8 +172,7 @@ class ProductINNParser:
         try:
             # Переходим на страницу товара
             logger.info(f"Открываем страницу товара...")
-            self.driver.get(product_url)
-            time.sleep(3)
+            open_page(self.driver, product_url, wait_for=PRODUCT_PAGE_READY, deadline=self.deadline)
             
             # Получаем название продавца
             product_data['seller_name'] = self._get_seller_name_from_product()
@@ -184,6 +181,8 @@ class ProductINNParser:
             seller_data = self._extract_seller_data_from_product()
             product_data.update(seller_data)
             
+        except (ChallengeDetectedError, DeadlineExceeded):
+            raise
         except Exception as e:
             logger.error(f"Ошибка при парсинге товара: {str(e)}")
             
@@ -250,7 +249,9 @@ class ProductINNParser:
         
         try:
             # Используем существующий парсер деталей продавца
-            seller_details = self.seller_parser.seller_details_parser.parse_seller_details(self.driver)
+            seller_details = self.seller_parser.seller_details_parser.parse_seller_details(
+                self.driver, deadline=self.deadline
+            )
             
             if seller_details:
                 # Обновляем данные продавца
@@ -266,6 +267,8 @@ class ProductINNParser:
             
             return seller_data
             
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.error(f"Ошибка при извлечении данных продавца: {str(e)}")
             return seller_data
@@ -292,6 +295,56 @@ class ProductINNParser:
             logger.error(f"Ошибка сохранения: {str(e)}")
             return None
     
+    def _emit(self, result):
+        """Результат сразу подписчику on_result; возвращается для выдачи из iter_url_list"""
+        self.processed += 1
+        if self.on_result:
+            try:
+                self.on_result(result)
+            except Exception as e:
+                logger.warning(f"Ошибка передачи промежуточного результата: {str(e)}")
+        return result
+
+    def _error_result(self, product_url, reason='Ошибка'):
+        return {
+            'seller_name': reason,
+            'company_name': reason,
+            'inn': reason,
+            'product_url': product_url
+        }
+
+    def _recover_driver(self, exc):
+        """Восстановление после ошибки: мертвую сессию заменяем, живую сбрасываем на about:blank"""
+        kind = classify_error(exc)
+        tripped = driver_breaker.record_failure(id(self.driver), kind)
+        if kind == DRIVER_DEAD or tripped:
+            logger.warning(f"Сессия браузера неработоспособна ({kind}), заменяем")
+            driver_breaker.forget(id(self.driver))
+            self._rotate_driver()
+            return
+        try:
+            self.driver.get("about:blank")
+        except Exception as e:
+            logger.warning(f"Проблемы с драйвером, заменяем: {str(e)}")
+            self._rotate_driver()
+
+    def _respawn_driver(self):
+        """Новый браузер вместо упавшего. False, если запустить его не удалось"""
+        driver_breaker.forget(id(self.driver))
+        with timing_report.measure('driver_respawn'):
+            if not self._rotate_driver():
+                return False
+        return is_session_alive(self.driver)
+
+    def _rotate_driver(self):
+        """Новая сессия браузера вместо помеченной антиботом или упавшей"""
+        try:
+            self.driver = self.seller_parser.rotate_driver()
+            return True
+        except Exception as e:
+            logger.error(f"Не удалось заменить браузер: {str(e)}")
+            return False
+
     def close(self):
         """Закрытие парсера"""
         try:
@@ -0,0 +1,316 @@
+# parser/proxy_pool.py
+import contextvars
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from src.utils import get_app_dir
+from src.config_service import get_config
+from .cancellation import current_token
+from .timing import timing_report
+
+logger = logging.getLogger(__name__)
+
+# Шаг ожидания свободного прокси: между шагами проверяется отмена задачи
+ACQUIRE_WAIT_STEP = 1.0
+# Как часто напоминать в логе, что браузер все еще ждет прокси
+WAIT_LOG_INTERVAL = 30
+
+
+class ProxyUnavailableError(RuntimeError):
+    """Прокси настроены, но свободный не появился за отведенное время"""
+
+
+# Предел ожидания прокси для браузеров, запускаемых внутри proxy_wait_limit
+_proxy_wait = contextvars.ContextVar('proxy_wait', default=None)
+
+
+@contextmanager
+def proxy_wait_limit(seconds):
+    """Ограничение ожидания прокси для всех браузеров, запускаемых в блоке.
+
+    Фоновому прогреву пула нельзя ждать прокси бесконечно: без свободного
+    прокси запуск браузера завершается ProxyUnavailableError.
+    """
+    reset = _proxy_wait.set(seconds)
+    try:
+        yield
+    finally:
+        _proxy_wait.reset(reset)
+
+
+class Proxy:
+    """Прокси из пула и его статистика"""
+
+    def __init__(self, server):
+        self.server = server
+        self.key = server.split("://", 1)[-1]
+        self.in_use = 0
+        self.successes = 0
+        self.failures = 0
+        self.challenges = 0
+        self.latency = None
+        self.strikes = 0
+        self.evicted_until = None
+
+    @property
+    def evicted(self):
+        return self.evicted_until is not None
+
+    def score(self):
+        """Оценка от отрицательных значений до 1: успехи минус проверки антибота и медленные ответы"""
+        total = self.successes + self.failures + self.challenges
+        if total == 0:
+            return 1.0
+        success_rate = (self.successes + 1) / (total + 2)
+        challenge_rate = self.challenges / total
+        latency_penalty = self.latency / (self.latency + 10) if self.latency else 0
+        return success_rate - challenge_rate - 0.3 * latency_penalty
+
+
+class ProxyPool:
+    """Пул прокси для браузеров с оценкой качества.
+
+    Каждый браузер получает прокси при запуске и держит его до quit(). На одном
+    прокси одновременно работает не больше max_sessions браузеров. Проверка
+    антибота или низкая оценка выводит прокси из оборота на evict_seconds
+    (с удвоением при повторах), по истечении срока он возвращается с
+    ополовиненной статистикой.
+    """
+
+    def __init__(self, servers, max_sessions=2, evict_seconds=300, min_samples=5,
+                 min_score=0.3, ewma_alpha=0.3):
+        self.proxies = [Proxy(server) for server in servers]
+        self.max_sessions = max(1, max_sessions)
+        self.evict_seconds = evict_seconds
+        self.min_samples = min_samples
+        self.min_score = min_score
+        self.ewma_alpha = ewma_alpha
+        self._cond = threading.Condition()
+        self._update_gauges()
+
+    @property
+    def capacity(self):
+        """Сколько браузеров пул может обслужить одновременно"""
+        return len(self.proxies) * self.max_sessions
+
+    def acquire(self, timeout=30):
+        """Лучший свободный прокси. None, если за timeout свободного не нашлось.
+
+        timeout=None ждет без ограничения. Ожидание прерывается отменой
+        текущей задачи (JobCancelled).
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        token = current_token()
+        with self._cond:
+            while True:
+                if token is not None:
+                    token.check()
+                self._reinstate_expired()
+                available = [
+                    p for p in self.proxies
+                    if not p.evicted and p.in_use < self.max_sessions
+                ]
+                if available:
+                    proxy = max(available, key=lambda p: (p.score(), -p.in_use))
+                    proxy.in_use += 1
+                    self._update_gauges()
+                    return proxy
+                step = ACQUIRE_WAIT_STEP
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return None
+                    step = min(step, remaining)
+                self._cond.wait(step)
+
+    def release(self, proxy):
+        with self._cond:
+            proxy.in_use = max(0, proxy.in_use - 1)
+            self._update_gauges()
+            self._cond.notify()
+
+    def record_success(self, proxy, seconds):
+        with self._cond:
+            proxy.successes += 1
+            if proxy.latency is None:
+                proxy.latency = seconds
+            else:
+                proxy.latency += self.ewma_alpha * (seconds - proxy.latency)
+            self._update_gauges()
+
+    def record_failure(self, proxy):
+        with self._cond:
+            proxy.failures += 1
+            total = proxy.successes + proxy.failures + proxy.challenges
+            if total >= self.min_samples and proxy.score() < self.min_score:
+                self._evict(proxy, f"низкая оценка {proxy.score():.2f}")
+            self._update_gauges()
+
+    def record_challenge(self, proxy):
+        with self._cond:
+            proxy.challenges += 1
+            self._evict(proxy, "проверка антибота")
+            self._update_gauges()
+
+    def stats(self):
+        with self._cond:
+            return [
+                {
+                    'proxy': p.key,
+                    'score': round(p.score(), 2),
+                    'in_use': p.in_use,
+                    'latency': round(p.latency, 2) if p.latency is not None else None,
+                    'evicted': p.evicted,
+                }
+                for p in self.proxies
+            ]
+
+    def _evict(self, proxy, reason):
+        if proxy.evicted:
+            return
+        proxy.strikes += 1
+        duration = min(self.evict_seconds * 2 ** (proxy.strikes - 1), 3600)
+        proxy.evicted_until = time.monotonic() + duration
+        logger.warning(f"Прокси {proxy.key} выведен из оборота на {duration:.0f}с: {reason}")
+
+    def _reinstate_expired(self):
+        now = time.monotonic()
+        for proxy in self.proxies:
+            if proxy.evicted and proxy.evicted_until <= now:
+                proxy.evicted_until = None
+                # Старая статистика весит вдвое меньше, прокси получает новый шанс
+                proxy.successes //= 2
+                proxy.failures //= 2
+                proxy.challenges //= 2
+                logger.info(f"Прокси {proxy.key} возвращен в оборот")
+
+    def _update_gauges(self):
+        evicted = sum(1 for p in self.proxies if p.evicted)
+        timing_report.set_gauge('proxies_active', len(self.proxies) - evicted)
+        timing_report.set_gauge('proxies_evicted', evicted)
+        timing_report.set_gauge('proxies_in_use', sum(p.in_use for p in self.proxies))
+
+
+def parse_proxy_list(lines):
+    """Адреса прокси из строк вида host:port или scheme://host:port"""
+    servers = []
+    for line in lines:
+        entry = line.strip()
+        if not entry or entry.startswith('#'):
+            continue
+        if '@' in entry:
+            # Chrome не принимает логин и пароль в --proxy-server
+            logger.warning(f"Прокси с авторизацией не поддерживается, пропущен: {entry.split('@')[-1]}")
+            continue
+        if '://' not in entry:
+            entry = f"http://{entry}"
+        if entry not in servers:
+            servers.append(entry)
+    return servers
+
+
+def assign_proxy(options, timeout=None):
+    """Назначение прокси из пула опциям Chrome. Возвращает Proxy или None без пула.
+
+    Если прокси настроены, браузер никогда не запускается напрямую: ожидание
+    длится, пока прокси не освободится или не вернется из вывода из оборота.
+    Его прерывает отмена задачи (JobCancelled), а с timeout (или внутри
+    proxy_wait_limit) — ProxyUnavailableError.
+    """
+    pool = get_proxy_pool()
+    if pool is None:
+        return None
+    if timeout is None:
+        timeout = _proxy_wait.get()
+    started = time.monotonic()
+    while True:
+        step = WAIT_LOG_INTERVAL
+        if timeout is not None:
+            step = min(step, timeout - (time.monotonic() - started))
+        proxy = pool.acquire(max(0, step))
+        if proxy is not None:
+            break
+        waited = time.monotonic() - started
+        if timeout is not None and waited >= timeout:
+            raise ProxyUnavailableError(f"Нет свободного прокси за {waited:.0f}с")
+        logger.warning(f"Нет свободного прокси, браузер ждет уже {waited:.0f}с")
+    options.add_argument(f"--proxy-server={proxy.server}")
+    return proxy
+
+
+def bind_proxy(driver, proxy):
+    """Привязка прокси к драйверу: прокси вернется в пул при driver.quit()"""
+    driver._proxy = proxy
+    if proxy is None:
+        return driver
+
+    original_quit = driver.quit
+    released = []
+
+    def quit_and_release():
+        try:
+            original_quit()
+        finally:
+            if not released:
+                released.append(True)
+                release_proxy(proxy)
+
+    driver.quit = quit_and_release
+    return driver
+
+
+def release_proxy(proxy):
+    pool = get_proxy_pool()
+    if pool is not None and proxy is not None:
+        pool.release(proxy)
+
+
+def proxy_of(driver):
+    """Прокси, через который работает драйвер, или None"""
+    return getattr(driver, '_proxy', None)
+
+
+_proxy_pool = None
+_proxy_pool_loaded = False
+_proxy_pool_lock = threading.Lock()
+
+
+def get_proxy_pool():
+    """Общий пул прокси или None, если прокси не настроены.
+
+    Настройки config.txt: PROXIES (через запятую) и/или PROXY_FILE (по одному на
+    строке), PROXY_MAX_SESSIONS и PROXY_EVICT_SECONDS.
+    """
+    global _proxy_pool, _proxy_pool_loaded
+    with _proxy_pool_lock:
+        if not _proxy_pool_loaded:
+            _proxy_pool = _create_proxy_pool()
+            _proxy_pool_loaded = True
+        return _proxy_pool
+
+
+def _create_proxy_pool():
+    config = get_config()
+    lines = config.typed("PROXIES").split(",")
+
+    proxy_file = config.typed("PROXY_FILE").strip()
+    if proxy_file:
+        if not os.path.isabs(proxy_file):
+            proxy_file = os.path.join(get_app_dir(), proxy_file)
+        try:
+            with open(proxy_file, "r", encoding="utf-8") as f:
+                lines.extend(f.readlines())
+        except Exception as e:
+            logger.error(f"Ошибка при чтении файла прокси {proxy_file}: {str(e)}")
+
+    servers = parse_proxy_list(lines)
+    if not servers:
+        return None
+
+    max_sessions = config.typed("PROXY_MAX_SESSIONS")
+    evict_seconds = config.typed("PROXY_EVICT_SECONDS")
+    logger.info(f"Пул прокси: {len(servers)} шт., до {max_sessions} браузеров на прокси")
+    return ProxyPool(servers, max_sessions=max_sessions, evict_seconds=evict_seconds)
@@ -0,0 +1,150 @@
+# parser/rate_limiter.py
+import logging
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+from src.config_service import get_config
+from .cancellation import cancellable_sleep
+from .timing import timing_report
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Корзина токенов одного ключа (хоста или прокси)"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+
+class RateLimiter:
+    """Общий для процесса ограничитель частоты загрузок страниц.
+
+    Каждый ключ (по умолчанию хост) получает свою корзину токенов со скоростью
+    rate запросов в секунду и запасом burst. К ожиданию добавляется случайная
+    задержка до jitter секунд. penalize() снижает скорость после признаков
+    блокировки, успешные загрузки постепенно возвращают ее к базовой.
+    """
+
+    def __init__(self, rate=1.0, burst=3, jitter=0.5, min_rate=0.05, recovery_step=0.02):
+        self.base_rate = rate
+        self.burst = burst
+        self.jitter = jitter
+        self.min_rate = min_rate
+        self.recovery_step = recovery_step
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def configure(self, rate, burst, jitter):
+        """Новые базовые настройки без перезапуска; сниженная после блокировок скорость не повышается"""
+        with self._lock:
+            previous = self.base_rate
+            self.base_rate = rate
+            self.burst = burst
+            self.jitter = jitter
+            for bucket in self._buckets.values():
+                bucket.rate = rate if bucket.rate >= previous else min(bucket.rate, rate)
+                bucket.burst = burst
+                bucket.tokens = min(bucket.tokens, burst)
+
+    def acquire(self, key="default", deadline=None):
+        """Блокирует поток до получения токена, возвращает время ожидания в секундах.
+
+        Ожидание прерывает отмена задачи (JobCancelled) и исчерпание deadline.
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                bucket = self._bucket(key)
+                now = time.monotonic()
+                bucket.refill(now)
+                if bucket.tokens >= 1:
+                    bucket.tokens -= 1
+                    break
+                delay = (1 - bucket.tokens) / bucket.rate
+            cancellable_sleep(delay, deadline)
+            waited += delay
+
+        if self.jitter:
+            extra = random.uniform(0, self.jitter)
+            cancellable_sleep(extra, deadline)
+            waited += extra
+        timing_report.record('rate_limit_wait', waited)
+        return waited
+
+    def penalize(self, key="default", factor=0.5):
+        """Мультипликативное снижение скорости после признаков блокировки"""
+        with self._lock:
+            bucket = self._bucket(key)
+            bucket.rate = max(self.min_rate, bucket.rate * factor)
+            bucket.tokens = min(bucket.tokens, 0)
+            rate = bucket.rate
+        logger.warning(f"Скорость запросов для {key} снижена до {rate:.2f}/с")
+        timing_report.set_gauge(f'rate_limit_{key}', round(rate, 3))
+
+    def reward(self, key="default"):
+        """Аддитивное восстановление скорости после успешной загрузки"""
+        with self._lock:
+            bucket = self._bucket(key)
+            if bucket.rate >= self.base_rate:
+                return
+            bucket.rate = min(self.base_rate, bucket.rate + self.recovery_step)
+            rate = bucket.rate
+        timing_report.set_gauge(f'rate_limit_{key}', round(rate, 3))
+
+    def current_rate(self, key="default"):
+        with self._lock:
+            return self._bucket(key).rate
+
+    def _bucket(self, key):
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(self.base_rate, self.burst)
+            self._buckets[key] = bucket
+        return bucket
+
+
+def key_for_url(url):
+    """Ключ ограничителя по хосту без www"""
+    host = urlparse(url).netloc.lower()
+    return host[4:] if host.startswith("www.") else host or "default"
+
+
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """Общий ограничитель, настройки RATE_LIMIT_RPS, RATE_LIMIT_BURST и RATE_LIMIT_JITTER применяются на лету"""
+    global _rate_limiter
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            _rate_limiter = _create_rate_limiter()
+        return _rate_limiter
+
+
+def _create_rate_limiter():
+    limiter = RateLimiter(*_rate_settings())
+    logger.info(f"Ограничение запросов: {limiter.base_rate}/с, запас {limiter.burst}, разброс до {limiter.jitter}с")
+
+    def apply(_changed):
+        limiter.configure(*_rate_settings())
+        logger.info(f"Ограничение запросов изменено: {limiter.base_rate}/с, запас {limiter.burst}, "
+                    f"разброс до {limiter.jitter}с")
+
+    get_config().subscribe(apply, ("RATE_LIMIT_RPS", "RATE_LIMIT_BURST", "RATE_LIMIT_JITTER"))
+    return limiter
+
+
+def _rate_settings():
+    config = get_config()
+    return config.typed("RATE_LIMIT_RPS"), config.typed("RATE_LIMIT_BURST"), config.typed("RATE_LIMIT_JITTER")
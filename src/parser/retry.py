@@ -0,0 +1,251 @@
+# parser/retry.py
+import logging
+import random
+import threading
+import time
+
+from selenium.common.exceptions import (
+    WebDriverException,
+    TimeoutException,
+    NoSuchElementException,
+    StaleElementReferenceException,
+    ElementClickInterceptedException,
+    ElementNotInteractableException,
+    InvalidSessionIdException,
+    NoSuchWindowException,
+)
+# urllib3 ставится вместе с selenium: через него идут запросы к chromedriver
+from urllib3.exceptions import MaxRetryError, NewConnectionError, ProtocolError
+
+from .antibot import ChallengeDetectedError
+from .deadline import DeadlineExceeded
+from .timing import timing_report
+
+logger = logging.getLogger(__name__)
+
+# Классы ошибок для решения, имеет ли смысл повтор
+TRANSIENT_DOM = 'dom'
+NAVIGATION = 'navigation'
+DRIVER_DEAD = 'driver_dead'
+CHALLENGE = 'challenge'
+DEADLINE = 'deadline'
+CIRCUIT_OPEN = 'circuit_open'
+FATAL = 'fatal'
+
+DRIVER_DEAD_MARKERS = (
+    'invalid session id', 'chrome not reachable', 'disconnected', 'session deleted',
+    'no such window', 'target window already closed', 'connection refused',
+    'max retries exceeded', 'failed to establish a new connection',
+)
+NAVIGATION_MARKERS = ('net::err_', 'timed out receiving message from renderer', 'page load')
+
+# Сколько раз URL возвращается в очередь после падения браузера
+MAX_RESPAWN_REQUEUES = 1
+
+
+class TransientError(Exception):
+    """Ожидаемый временный сбой на странице (элемент не появился, данные пустые)"""
+
+
+class SessionDeadError(Exception):
+    """Сессия браузера перестала отвечать"""
+
+
+class CircuitOpenError(Exception):
+    """Предохранитель разомкнут: операции с этим ключом временно не выполняются"""
+
+    def __init__(self, name, key, retry_after):
+        super().__init__(f"Предохранитель {name} для {key} разомкнут, повтор через {retry_after:.0f}с")
+        self.key = key
+        self.retry_after = retry_after
+
+
+def classify_error(exc):
+    """Класс ошибки: dom, navigation, driver_dead, challenge, deadline, circuit_open или fatal"""
+    if isinstance(exc, ChallengeDetectedError):
+        return CHALLENGE
+    if isinstance(exc, DeadlineExceeded):
+        return DEADLINE
+    if isinstance(exc, CircuitOpenError):
+        return CIRCUIT_OPEN
+    if isinstance(exc, (SessionDeadError, InvalidSessionIdException, NoSuchWindowException)):
+        return DRIVER_DEAD
+    if isinstance(exc, (TransientError, NoSuchElementException, StaleElementReferenceException,
+                        ElementClickInterceptedException, ElementNotInteractableException)):
+        return TRANSIENT_DOM
+    message = str(exc).lower()
+    if any(marker in message for marker in DRIVER_DEAD_MARKERS):
+        return DRIVER_DEAD
+    if isinstance(exc, TimeoutException):
+        return NAVIGATION if any(marker in message for marker in NAVIGATION_MARKERS) else TRANSIENT_DOM
+    if isinstance(exc, WebDriverException):
+        return NAVIGATION if any(marker in message for marker in NAVIGATION_MARKERS) else TRANSIENT_DOM
+    # Обрыв соединения с chromedriver. Прочие OSError (файлы, таймауты сокетов)
+    # к браузеру не относятся и не должны вести к его замене
+    if isinstance(exc, (ConnectionError, MaxRetryError, NewConnectionError, ProtocolError)):
+        return DRIVER_DEAD
+    return FATAL
+
+
+class CircuitBreaker:
+    """Предохранитель по ключу (хост, драйвер).
+
+    После failure_threshold подряд неудач с учитываемыми классами ошибок
+    размыкается на reset_timeout секунд, затем пропускает одну пробную
+    операцию: успех замыкает его, неудача снова размыкает.
+    """
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=60, counts=None):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.counts = counts
+        self._failures = {}
+        self._opened_at = {}
+        self._lock = threading.Lock()
+
+    def retry_after(self, key):
+        """Сколько секунд предохранитель еще разомкнут (0 — можно работать)"""
+        with self._lock:
+            opened_at = self._opened_at.get(key)
+            if opened_at is None:
+                return 0.0
+            return max(0.0, opened_at + self.reset_timeout - time.monotonic())
+
+    def guard(self, key):
+        """Бросает CircuitOpenError, пока предохранитель разомкнут"""
+        retry_after = self.retry_after(key)
+        if retry_after > 0:
+            raise CircuitOpenError(self.name, key, retry_after)
+
+    def wait(self, key, deadline=None):
+        """Ожидание замыкания предохранителя в пределах deadline"""
+        retry_after = self.retry_after(key)
+        if retry_after <= 0:
+            return
+        logger.warning(f"Предохранитель {self.name} для {key} разомкнут, ждем {retry_after:.0f}с")
+        if deadline is not None:
+            deadline.sleep(retry_after)
+        else:
+            time.sleep(retry_after)
+
+    def record_success(self, key):
+        with self._lock:
+            self._failures.pop(key, None)
+            if self._opened_at.pop(key, None) is not None:
+                logger.info(f"Предохранитель {self.name} для {key} замкнут")
+            self._update_gauge()
+
+    def record_failure(self, key, kind=None):
+        """Учет неудачи. Возвращает True, если предохранитель разомкнулся"""
+        if self.counts is not None and kind not in self.counts:
+            return False
+        with self._lock:
+            failures = self._failures.get(key, 0) + 1
+            self._failures[key] = failures
+            if failures < self.failure_threshold:
+                return False
+            self._failures[key] = 0
+            self._opened_at[key] = time.monotonic()
+            self._update_gauge()
+        logger.warning(
+            f"Предохранитель {self.name} для {key} разомкнут на {self.reset_timeout}с "
+            f"после {failures} неудач подряд"
+        )
+        return True
+
+    def forget(self, key):
+        with self._lock:
+            self._failures.pop(key, None)
+            self._opened_at.pop(key, None)
+            self._update_gauge()
+
+    def _update_gauge(self):
+        timing_report.set_gauge(f'breaker_{self.name}_open', len(self._opened_at))
+
+
+class RetryPolicy:
+    """Повторы с экспоненциальной паузой и случайным разбросом (full jitter).
+
+    Повторяются только ошибки из retry_on. Паузы укладываются в deadline.
+    Статистика попыток на успех публикуется в timing_report, чтобы было видно,
+    сколько повторов тратится впустую.
+    """
+
+    def __init__(self, name, max_attempts=3, base_delay=1.0, max_delay=10.0,
+                 retry_on=(TRANSIENT_DOM, NAVIGATION)):
+        self.name = name
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_on = retry_on
+        self._lock = threading.Lock()
+        self._calls = 0
+        self._successes = 0
+        self._attempts = 0
+        self._wasted = 0
+
+    def backoff(self, attempt):
+        """Пауза перед попыткой attempt + 1"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    def call(self, func, *args, deadline=None, on_retry=None, **kwargs):
+        """Вызов func с повторами.
+
+        on_retry(attempt, exc) вызывается перед паузой и следующей попыткой,
+        например для сброса фильтров или обновления страницы.
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            if deadline is not None:
+                deadline.check(self.name)
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                kind = classify_error(e)
+                if kind not in self.retry_on or attempt >= self.max_attempts:
+                    self._record(attempt, success=False)
+                    raise
+                logger.warning(f"{self.name}: попытка {attempt}/{self.max_attempts} не удалась ({kind}): {str(e)}")
+                if on_retry:
+                    on_retry(attempt, e)
+                pause = self.backoff(attempt)
+                if deadline is not None:
+                    deadline.sleep(pause)
+                else:
+                    time.sleep(pause)
+                continue
+            self._record(attempt, success=True)
+            return result
+
+    def stats(self):
+        with self._lock:
+            return {
+                'calls': self._calls,
+                'successes': self._successes,
+                'attempts': self._attempts,
+                'wasted_attempts': self._wasted,
+                'attempts_per_success': round(self._attempts / self._successes, 2) if self._successes else None,
+            }
+
+    def _record(self, attempts, success):
+        with self._lock:
+            self._calls += 1
+            self._attempts += attempts
+            if success:
+                self._successes += 1
+                # Неудачные попытки перед успехом тоже потрачены впустую
+                self._wasted += attempts - 1
+            else:
+                self._wasted += attempts
+            per_success = f"{self._attempts / self._successes:.2f}" if self._successes else "-"
+            summary = f"{per_success} попыток/успех, успехов {self._successes}/{self._calls}, впустую {self._wasted}"
+        timing_report.set_gauge(f'retry_{self.name}', summary)
+
+
+# Предохранитель хоста: сетевые ошибки навигации подряд останавливают загрузки на время
+host_breaker = CircuitBreaker('host', failure_threshold=5, reset_timeout=60, counts=(NAVIGATION,))
+# Предохранитель драйвера: повторяющиеся падения сессии сигнализируют о замене браузера
+driver_breaker = CircuitBreaker('driver', failure_threshold=3, reset_timeout=300,
+                                counts=(DRIVER_DEAD, NAVIGATION, FATAL))
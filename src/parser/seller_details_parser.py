@@ -3,23 +3,40 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from src.bot.central_logger import central_logger as logger 
+from .tooltip_reader import TooltipReader
+from .legal_info import classifier
+from .utils import open_page, SELLER_PAGE_READY, PRODUCT_PAGE_READY
+from .antibot import ChallengeDetectedError
+from .deadline import Deadline, DeadlineExceeded
+from .cancellation import current_token
+from .adaptive_delay import delay_controller
+import logging
 import time
 
+logger = logging.getLogger(__name__)
+
 class SellerDetailsParser:
     def __init__(self):
         self.max_attempts = 10
         self.current_attempt = 0
         self.visited_products = set()
+        self.tooltip_reader = TooltipReader()
+        self.deadline = Deadline.unbounded()
     
-    def parse_seller_details(self, driver, seller_url=None):
-        """Парсинг дополнительной информации о продавце со страницы товара с повторными попытками"""
+    def parse_seller_details(self, driver, seller_url=None, deadline=None):
+        """Парсинг дополнительной информации о продавце со страницы товара с повторными попытками.
+
+        Все попытки, переходы и ожидания укладываются в deadline; по его истечении
+        бросается DeadlineExceeded.
+        """
         seller_details = {}
         self.current_attempt = 0
+        self.deadline = deadline or Deadline.unbounded(current_token())
         
         while self.current_attempt < self.max_attempts:
+            self.deadline.check("данные продавца")
             self.current_attempt += 1
-            logger.info(f"Попытка {self.current_attempt} из {self.max_attempts} получить данные продавца")
+            logger.info("Попытка %s из %s получить данные продавца", self.current_attempt, self.max_attempts)
             
             try:
                 # Пытаемся получить данные с текущей страницы
@@ -35,6 +52,8 @@ class SellerDetailsParser:
                         logger.warning("Не удалось найти другие товары продавца")
                         break
                         
+            except (ChallengeDetectedError, DeadlineExceeded):
+                raise
             except Exception as e:
                 logger.error(f"Ошибка в попытке {self.current_attempt}: {str(e)}")
                 if self.current_attempt < self.max_attempts:
@@ -56,20 +75,20 @@ class SellerDetailsParser:
             # УЛУЧШЕННАЯ ЛОГИКА СКРОЛЛА (из рабочего примера)
             # Сначала скроллим вниз для активации контента
             driver.execute_script("window.scrollTo(0, 600);")
-            time.sleep(0.5)
+            self.deadline.sleep(0.5)
             
             # Ждем загрузки секции с продавцом
-            seller_section = WebDriverWait(driver, 10).until(
+            seller_section = WebDriverWait(driver, self.deadline.clip(10)).until(
                 EC.presence_of_element_located((By.CSS_SELECTOR, 'div[data-widget="webCurrentSeller"]'))
             )
             
             # Дополнительный скролл к секции с продавцом (как в рабочем примере)
             driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", seller_section)
-            time.sleep(1)
+            self.deadline.sleep(1)
             
             # Еще один скролл для уверенности (из рабочего кода)
             driver.execute_script("window.scrollTo(0, document.body.scrollHeight * 0.4);")
-            time.sleep(0.5)
+            self.deadline.sleep(0.5)
             
             # Ищем кнопку с информацией о продавце
             info_button = self._find_info_button(seller_section)
@@ -77,11 +96,18 @@ class SellerDetailsParser:
                 logger.warning("Кнопка с информацией о продавце не найдена")
                 return seller_details
             
-            # Скроллим к кнопке перед кликом
-            driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", info_button)
-            time.sleep(0.5)
+            # Клик и ожидание тултипа одним скриптом в странице
+            tooltip_data = self.tooltip_reader.read(
+                driver, info_button, timeout=self.deadline.clip(self.tooltip_reader.timeout)
+            )
+            if tooltip_data:
+                text_content = '\n'.join(tooltip_data['paragraphs'])
+                seller_details = self._parse_text_content(text_content, tooltip_data['html'])
+                if seller_details:
+                    return seller_details
             
             # Наводим курсор и кликаем на кнопку, отслеживаем появление тултипа
+            logger.info("Скрипт не получил тултип, пробуем клик через ActionChains")
             tooltip = self._click_info_button(driver, info_button)
             
             if tooltip:
@@ -94,6 +120,8 @@ class SellerDetailsParser:
                 logger.info("Не удалось отследить появление тултипа, пробуем найти существующие")
                 seller_details = self._parse_all_tooltips(driver)
             
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.error(f"Ошибка при парсинге текущей страницы: {str(e)}")
             
@@ -105,8 +133,7 @@ class SellerDetailsParser:
             # Если есть URL продавца, переходим к его магазину
             if seller_url and seller_url not in self.visited_products:
                 logger.info(f"Переходим в магазин продавца: {seller_url}")
-                driver.get(seller_url)
-                time.sleep(3)
+                open_page(driver, seller_url, wait_for=SELLER_PAGE_READY, deadline=self.deadline)
                 
                 # Ищем товары в магазине
                 product_links = self._find_seller_products(driver)
@@ -114,30 +141,29 @@ class SellerDetailsParser:
                     for link in product_links[:5]:  # Берем первые 5 товаров
                         if link not in self.visited_products:
                             logger.info(f"Переходим к товару: {link}")
-                            driver.get(link)
-                            time.sleep(2)
+                            open_page(driver, link, wait_for=PRODUCT_PAGE_READY, deadline=self.deadline)
                             return True
             
             # Альтернативный способ: ищем ссылку на продавца на текущей странице
             seller_link = self._find_seller_link_on_page(driver)
             if seller_link and seller_link not in self.visited_products:
                 logger.info(f"Найдена ссылка на продавца: {seller_link}")
-                driver.get(seller_link)
-                time.sleep(3)
+                open_page(driver, seller_link, wait_for=SELLER_PAGE_READY, deadline=self.deadline)
                 
                 # Ищем товары в магазине
                 product_links = self._find_seller_products(driver)
                 if product_links:
                     for link in product_links[:3]:
                         if link not in self.visited_products:
-                            driver.get(link)
-                            time.sleep(2)
+                            open_page(driver, link, wait_for=PRODUCT_PAGE_READY, deadline=self.deadline)
                             return True
             
             # Если не получилось найти другие товары через магазин, 
             # пробуем найти похожие товары на текущей странице
             return self._try_related_products(driver)
             
+        except (ChallengeDetectedError, DeadlineExceeded):
+            raise
         except Exception as e:
             logger.error(f"Ошибка при поиске другого товара: {str(e)}")
             return False
@@ -169,7 +195,7 @@ class SellerDetailsParser:
         
         try:
             # Ждем загрузки страницы магазина
-            time.sleep(2)
+            self.deadline.sleep(2)
             
             # Различные селекторы для ссылок на товары
             product_selectors = [
@@ -197,6 +223,8 @@ class SellerDetailsParser:
             logger.info(f"Найдено {len(product_links)} товаров продавца")
             return product_links[:10]  # Возвращаем максимум 10 товаров
             
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.error(f"Ошибка при поиске товаров продавца: {str(e)}")
             return []
@@ -219,14 +247,17 @@ class SellerDetailsParser:
                         href = element.get_attribute('href')
                         if href and href not in self.visited_products:
                             logger.info(f"Переходим к похожему товару: {href}")
-                            driver.get(href)
-                            time.sleep(2)
+                            open_page(driver, href, wait_for=PRODUCT_PAGE_READY, deadline=self.deadline)
                             return True
+                except (ChallengeDetectedError, DeadlineExceeded):
+                    raise
                 except Exception:
                     continue
             
             return False
             
+        except (ChallengeDetectedError, DeadlineExceeded):
+            raise
         except Exception as e:
             logger.error(f"Ошибка при поиске похожих товаров: {str(e)}")
             return False
@@ -352,11 +383,10 @@ class SellerDetailsParser:
         try:
             # Убеждаемся, что кнопка видима (дополнительный скролл)
             driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", info_button)
-            time.sleep(0.5)
             
             # Еще один скролл для активации элементов (из рабочего примера)
             driver.execute_script("window.scrollTo(0, window.pageYOffset + 100);")
-            time.sleep(0.3)
+            delay_controller.sleep(0.3)
             
             # Запоминаем количество vue-portal-target до клика
             portals_before = len(driver.find_elements(By.CSS_SELECTOR, 'body .vue-portal-target'))
@@ -364,7 +394,8 @@ class SellerDetailsParser:
             
             actions = ActionChains(driver)
             actions.move_to_element(info_button).perform()
-            time.sleep(0.5)
+            # Наведение запускает обработчики страницы; пауза подстраивается регулятором
+            delay_controller.sleep(0.5)
             
             # Пробуем разные способы клика
             try:
@@ -385,7 +416,7 @@ class SellerDetailsParser:
 
     def _wait_for_tooltip_appearance(self, driver, initial_count):
         """Ожидание появления нового vue-portal-target"""
-        max_wait_time = 5  # максимум 5 секунд ожидания
+        max_wait_time = self.deadline.clip(5)  # максимум 5 секунд ожидания
         check_interval = 0.2  # проверяем каждые 200мс
         elapsed_time = 0
         
@@ -474,32 +505,8 @@ class SellerDetailsParser:
             
             logger.info(f"Найдено {len(lines)} строк для обработки")
             
-            for i, line in enumerate(lines):
-                logger.info(f"Обрабатываем строку {i+1}: '{line}'")
-                
-                # Определяем тип информации и сохраняем
-                if self._is_company_name(line):
-                    seller_details['company_name'] = line
-                    logger.info(f"✓ Название компании: {line}")
-                    
-                elif self._is_inn(line):
-                    seller_details['inn'] = line
-                    logger.info(f"✓ ИНН/ОГРН: {line}")
-                    
-                elif self._is_working_hours(line):
-                    seller_details['working_hours'] = line
-                    logger.info(f"✓ Режим работы: {line}")
-                    
-                elif self._is_address(line):
-                    seller_details['address'] = line
-                    logger.info(f"✓ Адрес: {line}")
-                    
-                else:
-                    # Любая другая информация
-                    if 'other_info' not in seller_details:
-                        seller_details['other_info'] = []
-                    seller_details['other_info'].append(line)
-                    logger.info(f"• Прочая информация: {line}")
+            # Разметка всех строк за один проход общим классификатором
+            seller_details = classifier.classify_lines(lines)
             
             # Дополнительно пытаемся извлечь данные из HTML, если текста недостаточно
             if len(seller_details) < 2:  # Если получили мало данных
@@ -524,24 +531,10 @@ class SellerDetailsParser:
             
             logger.info(f"Найдено {len(p_tags)} параграфов в HTML")
             
-            for i, p_content in enumerate(p_tags):
-                # Очищаем от HTML тегов
-                clean_text = re.sub(r'<[^>]+>', '', p_content).strip()
-                
-                if not clean_text:
-                    continue
-                    
-                logger.info(f"HTML параграф {i+1}: '{clean_text}'")
-                
-                # Применяем те же правила классификации
-                if self._is_company_name(clean_text) and 'company_name' not in seller_details:
-                    seller_details['company_name'] = clean_text
-                elif self._is_inn(clean_text) and 'inn' not in seller_details:
-                    seller_details['inn'] = clean_text
-                elif self._is_working_hours(clean_text) and 'working_hours' not in seller_details:
-                    seller_details['working_hours'] = clean_text
-                elif self._is_address(clean_text) and 'address' not in seller_details:
-                    seller_details['address'] = clean_text
+            # Очищаем от HTML тегов и применяем те же правила классификации
+            paragraphs = [re.sub(r'<[^>]+>', '', p_content).strip() for p_content in p_tags]
+            seller_details = classifier.classify_lines(paragraphs, first=True)
+            seller_details.pop('other_info', None)
             
             return seller_details
             
@@ -576,32 +569,11 @@ class SellerDetailsParser:
             
             logger.info(f"Найдено {len(info_paragraphs)} элементов с информацией")
             
-            for i, paragraph in enumerate(info_paragraphs):
-                text = paragraph.text.strip() if hasattr(paragraph, 'text') else str(paragraph.text).strip()
-                if not text:
-                    continue
-                
-                logger.info(f"Обрабатываем элемент {i}: {text}")
-                
-                # Определяем тип информации более точно
-                if self._is_company_name(text):
-                    seller_details['company_name'] = text
-                    logger.info(f"Найдено название компании: {text}")
-                elif self._is_inn(text):
-                    seller_details['inn'] = text
-                    logger.info(f"Найден ИНН: {text}")
-                elif self._is_working_hours(text):
-                    seller_details['working_hours'] = text
-                    logger.info(f"Найден режим работы: {text}")
-                elif self._is_address(text):
-                    seller_details['address'] = text
-                    logger.info(f"Найден адрес: {text}")
-                else:
-                    # Сохраняем прочую информацию
-                    if 'other_info' not in seller_details:
-                        seller_details['other_info'] = []
-                    seller_details['other_info'].append(text)
-                    logger.info(f"Добавлена прочая информация: {text}")
+            texts = [
+                paragraph.text.strip() if hasattr(paragraph, 'text') else str(paragraph.text).strip()
+                for paragraph in info_paragraphs
+            ]
+            seller_details = classifier.classify_lines(texts)
                     
         except Exception as e:
             logger.error(f"Ошибка при извлечении данных из тултипа: {str(e)}")
@@ -611,54 +583,24 @@ class SellerDetailsParser:
 
     def _looks_like_seller_info(self, text):
         """Проверяет, похож ли текст на информацию о продавце"""
-        seller_keywords = [
-            'ИП', 'ООО', 'АО', 'ЗАО', 'ПАО', 'Ltd', 'LLC', 'Inc',
-            'режим работы', 'working hours', 'график работы',
-            'адрес', 'address', 'г.', 'город', 'ул.', 'улица'
-        ]
-        
-        # Проверяем наличие цифр (для ИНН/ОГРН)
-        has_long_number = any(len(''.join(filter(str.isdigit, word))) >= 10 for word in text.split())
-        
-        # Проверяем ключевые слова
-        has_keywords = any(keyword.lower() in text.lower() for keyword in seller_keywords)
-        
-        return has_long_number or has_keywords
+        return classifier.looks_like_seller_info(text, details=True)
 
     def _is_company_name(self, text):
         """Проверяет, является ли текст названием компании"""
-        company_indicators = ['ИП', 'ООО', 'АО', 'ЗАО', 'ПАО', 'Ltd', 'LLC', 'Inc', 'ОАО']
-        return any(indicator in text for indicator in company_indicators)
+        return classifier.is_company_name(text)
 
     def _is_inn(self, text):
-        """Проверяет, является ли текст ИНН или ОГРН"""
-        # Убираем все нецифровые символы
-        digits_only = ''.join(filter(str.isdigit, text))
-        
-        # ИНН физлица - 12 цифр, ИНН юрлица - 10 цифр, ОГРН - 13 или 15 цифр
-        valid_lengths = [10, 12, 13, 15]
-        
-        # Дополнительная проверка: если строка состоит преимущественно из цифр
-        if len(digits_only) in valid_lengths and len(digits_only) / len(text) > 0.8:
-            return True
-            
-        return False
+        """Проверяет, является ли текст ИНН или ОГРН (с проверкой контрольной суммы)"""
+        return classifier.is_inn(text)
 
     def _is_working_hours(self, text):
         """Проверяет, является ли текст режимом работы"""
-        working_hours_indicators = [
-            'режим работы', 'график работы', 'working hours', 'работаем',
-            'часы работы', 'время работы', 'schedule', 'график'
-        ]
-        return any(indicator in text.lower() for indicator in working_hours_indicators)
+        return classifier.is_working_hours(text)
 
     def _is_address(self, text):
         """Проверяет, является ли текст адресом"""
-        address_indicators = [
-            'г.', 'город', 'ул.', 'улица', 'пр.', 'проспект', 'д.', 'дом', 
-            'обл.', 'область', 'кв.', 'квартира', 'офис', 'помещение',
-            'наб.', 'набережная', 'пер.', 'переулок', 'бул.', 'бульвар'
-        ]
+        return classifier.is_address(text)
+
     def reset_for_new_seller(self):
         """Сброс состояния для нового продавца"""
         self.current_attempt = 0
@@ -5,12 +5,22 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from .tooltip_reader import TooltipReader
+from .legal_info import classifier
+from .deadline import Deadline, DeadlineExceeded
+from .cancellation import JobCancelled, current_token
+from .retry import RetryPolicy, TransientError
+from .adaptive_delay import delay_controller
+
+# Между попытками страница обновляется, пауза растет с разбросом
+SELLER_DETAILS_RETRY = RetryPolicy('seller_info', max_attempts=5, base_delay=1.0, max_delay=6.0)
 
 class SellerInfoParser:
     def __init__(self):
         self.logger = logging.getLogger('seller_info_parser')
         self.max_attempts = 5
         self.visited_products = set()
+        self.tooltip_reader = TooltipReader()
         
     def scroll_to_pdp_grid(self, driver):
         """Прокрутка до блока webPdpGrid чтобы он был на расстоянии максимум 15px от верха"""
@@ -33,7 +43,7 @@ class SellerInfoParser:
             driver.execute_script(f"window.scrollTo(0, {scroll_to});")
             
             # Проверяем результат
-            time.sleep(1)
+            delay_controller.sleep(1)
             new_position = pdp_grid.location['y']
             viewport_top = driver.execute_script("return window.pageYOffset;")
             distance_from_top = new_position - viewport_top
@@ -127,92 +137,89 @@ class SellerInfoParser:
             self.logger.warning(f"Ошибка при получении названия продавца: {str(e)}")
             return 'Не найдено'
 
-    def get_seller_details(self, driver, seller_url=None):
-        """Получение детальной информации о продавце с улучшенной логикой"""
+    def get_seller_details(self, driver, seller_url=None, deadline=None):
+        """Получение детальной информации о продавце с улучшенной логикой.
+
+        Попытки прекращаются по истечении deadline, возвращается то, что успели получить.
+        """
+        deadline = deadline or Deadline.unbounded(current_token())
         seller_details = {
             'seller_name' : 'Не найдено',
             'company_name': 'Не найдено', 
             'inn': 'Не найдено',
             'seller_link': 'Не найдено',
         }
-       
-        for attempt in range(self.max_attempts):
-            self.logger.info(f"=== ПОПЫТКА {attempt + 1} из {self.max_attempts} получить данные продавца ===")
-           
-            try:
-                # Если это не первая попытка - обновляем страницу
-                if attempt > 0:
-                    self.logger.info("Обновляем страницу перед повторной попыткой...")
-                    driver.refresh()
-                    time.sleep(3)  # Ждем загрузки страницы
-                    self.logger.info("Страница обновлена, ждем загрузки контента...")
-               
-                # Сначала прокручиваем к webPdpGrid
-                if not self.scroll_to_pdp_grid(driver):
-                    self.logger.warning("Не удалось прокрутить к webPdpGrid")
-                    
-                time.sleep(2)  # Даем время на загрузку контента
-                
-                # Ждем появления секции с продавцом
-                seller_section = self.wait_for_seller_section(driver)                
-                
-                if not seller_section:
-                    self.logger.warning("Секция продавца не найдена")
-                    if attempt < self.max_attempts - 1:
-                        continue
-                    else:
-                        break
-                        
-                self.logger.info("✓ Секция продавца найдена!")
-                
-                # Получаем ссылку на продавца
-                seller_link = self.get_seller_link(seller_section)
-                seller_name = self.get_seller_name(driver)
-                if seller_link:
-                    seller_details['seller_link'] = seller_link
-                
-                if seller_name:
-                    seller_details['seller_name'] = seller_name
-               
-                # Дополнительный скролл к секции продавца
-                self.logger.info("Прокручиваем к секции продавца...")
-                driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", seller_section)
-                time.sleep(1.5)
-               
-                # Ищем кнопку с информацией
-                self.logger.info("Ищем кнопку с информацией о продавце...")
-                info_button = self._find_info_button(seller_section)
-               
-                if info_button:
-                    self.logger.info("✓ Кнопка информации найдена!")
-                    tooltip_data = self._get_tooltip_data(driver, info_button, attempt + 1)
-                   
-                    if tooltip_data and (tooltip_data.get('company_name') != 'Не найдено' or tooltip_data.get('inn') != 'Не найдено'):
-                        self.logger.info(f"✓ Успешно получены данные продавца: {tooltip_data}")
-                        seller_details.update(tooltip_data)
-                        break
-                    else:
-                        self.logger.warning("Данные из тултипа не получены или пустые")
-                else:
-                    self.logger.warning("✗ Кнопка информации не найдена")
-               
-                # Если не получилось и есть еще попытки
-                if attempt < self.max_attempts - 1:
-                    self.logger.info(f"Попытка {attempt + 1} неуспешна, готовимся к следующей...")
-                    time.sleep(2)
-                   
-            except Exception as e:
-                self.logger.error(f"✗ Ошибка в попытке {attempt + 1}: {str(e)}")
-                if attempt < self.max_attempts - 1:
-                    self.logger.info("Ждем перед следующей попыткой...")
-                    time.sleep(3)
+        attempts = []
+
+        def refresh_page(attempt, exc):
+            self.logger.info("Обновляем страницу перед повторной попыткой...")
+            driver.refresh()
+
+        try:
+            SELLER_DETAILS_RETRY.call(
+                self._read_seller_details_once, driver, seller_details, deadline, attempts,
+                deadline=deadline, on_retry=refresh_page
+            )
+        except JobCancelled:
+            raise
+        except DeadlineExceeded as e:
+            self.logger.warning(f"✗ Попытки прекращены: {str(e)}")
+        except Exception as e:
+            self.logger.error(f"✗ Ошибка в попытке {len(attempts)}: {str(e)}")
        
         if seller_details['company_name'] == 'Не найдено' and seller_details['inn'] == 'Не найдено':
-            self.logger.error(f"✗ После {self.max_attempts} попыток данные продавца не найдены")
+            self.logger.error(f"✗ После {len(attempts)} попыток данные продавца не найдены")
         else:
             self.logger.info(f"✓ Итоговые данные продавца: {seller_details}")
            
         return seller_details
+
+    def _read_seller_details_once(self, driver, seller_details, deadline, attempts):
+        """Одна попытка чтения данных продавца; при неудаче бросает TransientError"""
+        attempts.append(True)
+        self.logger.info(f"=== ПОПЫТКА {len(attempts)} из {SELLER_DETAILS_RETRY.max_attempts} получить данные продавца ===")
+
+        # Сначала прокручиваем к webPdpGrid
+        if not self.scroll_to_pdp_grid(driver):
+            self.logger.warning("Не удалось прокрутить к webPdpGrid")
+            
+        deadline.sleep(2)  # Даем время на загрузку контента
+        
+        # Ждем появления секции с продавцом
+        seller_section = self.wait_for_seller_section(driver, max_wait=deadline.clip(15))
+        if not seller_section:
+            raise TransientError("Секция продавца не найдена")
+                
+        self.logger.info("✓ Секция продавца найдена!")
+        
+        # Получаем ссылку на продавца
+        seller_link = self.get_seller_link(seller_section)
+        seller_name = self.get_seller_name(driver)
+        if seller_link:
+            seller_details['seller_link'] = seller_link
+        
+        if seller_name:
+            seller_details['seller_name'] = seller_name
+       
+        # Дополнительный скролл к секции продавца
+        self.logger.info("Прокручиваем к секции продавца...")
+        driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", seller_section)
+        deadline.sleep(1.5)
+       
+        # Ищем кнопку с информацией
+        self.logger.info("Ищем кнопку с информацией о продавце...")
+        info_button = self._find_info_button(seller_section)
+        if not info_button:
+            raise TransientError("Кнопка информации не найдена")
+
+        self.logger.info("✓ Кнопка информации найдена!")
+        tooltip_data = self._get_tooltip_data(driver, info_button, len(attempts))
+        if not tooltip_data or (tooltip_data.get('company_name') == 'Не найдено' and tooltip_data.get('inn') == 'Не найдено'):
+            raise TransientError("Данные из тултипа не получены или пустые")
+
+        self.logger.info(f"✓ Успешно получены данные продавца: {tooltip_data}")
+        seller_details.update(tooltip_data)
+        return seller_details
     
 
     def _find_info_button(self, seller_section):
@@ -233,23 +240,23 @@ class SellerInfoParser:
         
         for i, selector in enumerate(button_selectors, 1):
             try:
-                self.logger.debug(f"Селектор {i}: {selector}")
+                self.logger.debug("Селектор %s: %s", i, selector)
                 buttons = seller_section.find_elements(By.CSS_SELECTOR, selector)
-                self.logger.debug(f"Найдено {len(buttons)} элементов по селектору {i}")
+                self.logger.debug("Найдено %s элементов по селектору %s", len(buttons), i)
                 
                 for j, button in enumerate(buttons):
                     try:
                         if button and button.is_displayed() and button.is_enabled():
-                            self.logger.debug(f"Проверяем кнопку {j+1} на соответствие критериям...")
+                            self.logger.debug("Проверяем кнопку %s на соответствие критериям...", j+1)
                             if self._is_info_button(button):
                                 self.logger.info(f"✓ Найдена подходящая кнопка по селектору {i}, элемент {j+1}")
                                 return button
                     except Exception as e:
-                        self.logger.debug(f"Ошибка при проверке кнопки {j+1}: {str(e)}")
+                        self.logger.debug("Ошибка при проверке кнопки %s: %s", j+1, e)
                         continue
                         
             except Exception as e:
-                self.logger.debug(f"Ошибка с селектором {i}: {str(e)}")
+                self.logger.debug("Ошибка с селектором %s: %s", i, e)
                 continue
                 
         self.logger.warning("Подходящая кнопка не найдена ни по одному селектору")
@@ -269,7 +276,7 @@ class SellerInfoParser:
             
             # Проверяем размер кнопки (кнопки информации обычно маленькие)
             size = button.size
-            self.logger.debug(f"Размер кнопки: {size}")
+            self.logger.debug("Размер кнопки: %s", size)
             if size['width'] <= 50 and size['height'] <= 50:
                 self.logger.debug("Кнопка подходит по размеру")
                 return True
@@ -284,7 +291,7 @@ class SellerInfoParser:
                 
             return False
         except Exception as e:
-            self.logger.debug(f"Ошибка при проверке кнопки: {str(e)}")
+            self.logger.debug("Ошибка при проверке кнопки: %s", e)
             return False
 
     def _get_tooltip_data(self, driver, info_button, attempt_num):
@@ -292,10 +299,16 @@ class SellerInfoParser:
         try:
             self.logger.info(f"--- Начинаем получение данных из тултипа (попытка {attempt_num}) ---")
             
-            # Скроллим к кнопке
-            self.logger.info("Прокручиваем к кнопке информации...")
-            driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", info_button)
-            time.sleep(1)
+            # Основной путь: клик и ожидание тултипа одним скриптом в странице
+            tooltip = self.tooltip_reader.read(driver, info_button)
+            if tooltip:
+                parsed_data = self._parse_tooltip_lines(tooltip['paragraphs'])
+                if parsed_data:
+                    self.logger.info(f"✓ Данные успешно извлечены: {parsed_data}")
+                    return parsed_data
+                self.logger.warning("Парсинг тултипа не дал результатов")
+            
+            self.logger.info("Скрипт не получил тултип, пробуем резервные способы клика...")
             
             # Запоминаем количество порталов до клика
             portals_before = len(driver.find_elements(By.CSS_SELECTOR, 'body .vue-portal-target'))
@@ -329,7 +342,7 @@ class SellerInfoParser:
                         self.logger.warning(f"Тултип не появился после способа {method_num}")
                         
                     # Небольшая пауза между попытками
-                    time.sleep(1)
+                    delay_controller.sleep(1)
                     
                 except Exception as e:
                     self.logger.warning(f"Ошибка в способе {method_num}: {str(e)}")
@@ -347,20 +360,17 @@ class SellerInfoParser:
         self.logger.debug("Выполняем клик через ActionChains...")
         actions = ActionChains(driver)
         actions.move_to_element(button).click().perform()
-        time.sleep(1.5)
 
     def _click_with_javascript(self, driver, button):
         """Клик через JavaScript"""
         self.logger.debug("Выполняем клик через JavaScript...")
         driver.execute_script("arguments[0].click();", button)
-        time.sleep(1.5)
 
     def _hover_and_click(self, driver, button):
         """Наведение курсора и клик"""
         self.logger.debug("Наводим курсор и кликаем...")
         actions = ActionChains(driver)
         actions.move_to_element(button).pause(0.5).click().perform()
-        time.sleep(1.5)
 
     def _wait_for_tooltip(self, driver, initial_count, method_num):
         """Ожидание появления тултипа с улучшенным логированием"""
@@ -382,23 +392,23 @@ class SellerInfoParser:
                         try:
                             if portal.is_displayed():
                                 text = portal.text.strip()
-                                self.logger.debug(f"Проверяем портал {i+1}, текст: '{text[:100]}...'")
+                                self.logger.debug("Проверяем портал %s, текст: '%.100s...'", i+1, text)
                                 
                                 if self._looks_like_seller_info(text):
                                     self.logger.info(f"✓ Найден тултип с информацией о продавце в портале {i+1}")
                                     return portal
                         except Exception as e:
-                            self.logger.debug(f"Ошибка при проверке портала {i+1}: {str(e)}")
+                            self.logger.debug("Ошибка при проверке портала %s: %s", i+1, e)
                             continue
                 
                 time.sleep(check_interval)
                 elapsed += check_interval
                 
                 if elapsed % 1 == 0:  # Логируем каждую секунду
-                    self.logger.debug(f"Прошло {elapsed:.1f}с, порталов: {new_portals_count}")
+                    self.logger.debug("Прошло %.1fс, порталов: %s", elapsed, new_portals_count)
                 
             except Exception as e:
-                self.logger.debug(f"Ошибка при ожидании тултипа: {str(e)}")
+                self.logger.debug("Ошибка при ожидании тултипа: %s", e)
                 time.sleep(check_interval)
                 elapsed += check_interval
                 
@@ -414,19 +424,24 @@ class SellerInfoParser:
             self.logger.info(f"Содержимое тултипа: '{text_content}'")
             
             lines = [line.strip() for line in text_content.split('\n') if line.strip()]
+            return self._parse_tooltip_lines(lines)
+        except Exception as e:
+            self.logger.error(f"Ошибка при парсинге тултипа: {str(e)}")
+            return seller_details
+
+    def _parse_tooltip_lines(self, lines):
+        """Разбор строк тултипа на название компании и ИНН/ОГРН"""
+        seller_details = {}
+        
+        try:
             self.logger.info(f"Строки для анализа ({len(lines)}): {lines}")
             
-            for i, line in enumerate(lines, 1):
-                self.logger.debug(f"Анализируем строку {i}: '{line}'")
-                
-                if self._is_company_name(line):
-                    self.logger.info(f"✓ Найдено название компании: '{line}'")
-                    seller_details['company_name'] = line
-                elif self._is_inn(line):
-                    self.logger.info(f"✓ Найден ИНН/ОГРН: '{line}'")
-                    seller_details['inn'] = line
-                else:
-                    self.logger.debug(f"Строка не распознана как важная информация")
+            # Разметка всех строк за один проход; нужны только компания и ИНН/ОГРН
+            labeled = classifier.classify_lines(lines)
+            for key in ('company_name', 'inn'):
+                if key in labeled:
+                    self.logger.info(f"✓ Найдено {key}: '{labeled[key]}'")
+                    seller_details[key] = labeled[key]
                     
         except Exception as e:
             self.logger.error(f"Ошибка при парсинге тултипа: {str(e)}")
@@ -440,38 +455,15 @@ class SellerInfoParser:
 
     def _looks_like_seller_info(self, text):
         """Проверка, похож ли текст на информацию о продавце"""
-        if not text or len(text.strip()) < 5:
-            return False
-            
-        seller_keywords = [
-            'ИП', 'ООО', 'АО', 'ЗАО', 'ПАО', 'Ltd', 'LLC', 'Inc', 'ОАО'
-        ]
-        
-        # Проверяем наличие длинных чисел (ИНН/ОГРН)
-        has_long_number = any(len(''.join(filter(str.isdigit, word))) >= 10 for word in text.split())
-        
-        # Проверяем ключевые слова
-        has_keywords = any(keyword.lower() in text.lower() for keyword in seller_keywords)
-        
-        result = has_long_number or has_keywords
-        self.logger.debug(f"Текст '{text[:50]}...' {'ПОХОЖ' if result else 'НЕ ПОХОЖ'} на информацию о продавце")
-        
-        return result
+        return classifier.looks_like_seller_info(text)
 
     def _is_company_name(self, text):
         """Проверка, является ли текст названием компании"""
-        company_indicators = ['ИП', 'ООО', 'АО', 'ЗАО', 'ПАО', 'Ltd', 'LLC', 'Inc', 'ОАО']
-        return any(indicator in text for indicator in company_indicators)
+        return classifier.is_company_name(text)
 
     def _is_inn(self, text):
-        """Проверка, является ли текст ИНН или ОГРН"""
-        digits_only = ''.join(filter(str.isdigit, text))
-        valid_lengths = [10, 12, 13, 15]
-        
-        if len(digits_only) in valid_lengths and len(digits_only) / len(text) > 0.8:
-            return True
-        
-        return False
+        """Проверка, является ли текст ИНН или ОГРН (с проверкой контрольной суммы)"""
+        return classifier.is_inn(text)
 
     def reset_for_new_seller(self):
         """Сброс состояния для нового продавца"""
@@ -0,0 +1,126 @@
+# parser/seller_pipeline.py
+import logging
+
+from .ozon_parser import OzonSellerParser
+from .seller_products_parser import OzonProductParser
+from .timing import timing_report
+from .rate_limiter import get_rate_limiter, key_for_url
+from .deadline import DeadlineExceeded, job_deadline
+from .cancellation import JobCancelled, current_token
+
+# Время, которое сбор товаров оставляет на чтение юридических данных продавца
+DETAILS_RESERVE = 60
+
+logger = logging.getLogger(__name__)
+
+
+class SellerPipeline:
+    """Продавец и его товары за одну загрузку страницы продавца в одном браузере.
+
+    Страница продавца открывается один раз. Первый товар сразу открывается во
+    второй вкладке и грузится в фоне, пока в первой вкладке читается модальное
+    окно магазина и собираются карточки товаров. Затем во второй вкладке
+    читаются юридические данные продавца.
+    """
+
+    def __init__(self, headless=True, driver=None):
+        self.seller_parser = OzonSellerParser(headless=headless, driver=driver)
+        self.driver = self.seller_parser.driver
+        self.product_parser = OzonProductParser(headless=headless, driver=self.driver)
+
+    def run(self, seller_url, deadline=None):
+        """Возвращает словарь seller, products, excel_path, success, seller_name.
+
+        deadline ограничивает всю обработку (по умолчанию JOB_TIMEOUT): сбор
+        товаров останавливается заранее, чтобы осталось время на данные продавца.
+        """
+        deadline = deadline or job_deadline(current_token())
+        driver = self.driver
+        details_tab = None
+        try:
+            main_tab = driver.current_window_handle
+
+            with timing_report.measure('pipeline_seller_page'):
+                if not self.product_parser.load_seller_page(seller_url, deadline=deadline):
+                    raise RuntimeError(f"Не удалось загрузить страницу продавца: {seller_url}")
+            self.seller_parser._simulate_human_behavior()
+
+            seller_name = self.product_parser._get_seller_name()
+            self.product_parser.extract_products_from_page()
+
+            # Первый товар грузится во второй вкладке, пока работаем с первой
+            products = self.product_parser.get_products()
+            if products:
+                details_tab = self._open_background_tab(products[0]['url'], main_tab)
+            else:
+                logger.warning("На странице продавца не найдено товаров для чтения данных продавца")
+
+            with timing_report.measure('pipeline_shop_modal'):
+                try:
+                    seller_data = self.seller_parser.read_shop_modal(deadline)
+                except JobCancelled:
+                    raise
+                except Exception as e:
+                    logger.error(f"Ошибка чтения модального окна магазина: {str(e)}")
+                    seller_data = {}
+
+            with timing_report.measure('pipeline_harvest'):
+                harvest_deadline = deadline.child(
+                    max(0.0, deadline.remaining() - DETAILS_RESERVE), name="сбор товаров"
+                )
+                self.product_parser.harvest_products(harvest_deadline)
+
+            if details_tab:
+                with timing_report.measure('pipeline_seller_details'):
+                    driver.switch_to.window(details_tab)
+                    try:
+                        seller_data.update(self.seller_parser.read_seller_details(deadline))
+                    except JobCancelled:
+                        raise
+                    except DeadlineExceeded as e:
+                        logger.warning(f"Данные продавца не получены: {str(e)}")
+                    driver.close()
+                    details_tab = None
+                    driver.switch_to.window(main_tab)
+
+            excel_path = None
+            if self.product_parser.get_products():
+                excel_path = self.product_parser.save_products(seller_name)
+
+            return {
+                'seller': seller_data,
+                'products': self.product_parser.get_products(),
+                'excel_path': excel_path,
+                'success': bool(excel_path),
+                'seller_name': seller_name,
+            }
+        finally:
+            if details_tab:
+                self._close_tab(details_tab)
+            if self.seller_parser.owns_driver:
+                self.seller_parser.close()
+
+    def _open_background_tab(self, url, main_tab):
+        """Открытие URL в новой вкладке без переключения на нее"""
+        try:
+            get_rate_limiter().acquire(key_for_url(url))
+            handles_before = set(self.driver.window_handles)
+            self.driver.execute_script("window.open(arguments[0], '_blank');", url)
+            new_handles = [h for h in self.driver.window_handles if h not in handles_before]
+            self.driver.switch_to.window(main_tab)
+            if new_handles:
+                logger.info(f"Первый товар открыт во второй вкладке: {url}")
+                return new_handles[0]
+        except JobCancelled:
+            raise
+        except Exception as e:
+            logger.warning(f"Не удалось открыть вторую вкладку: {str(e)}")
+        return None
+
+    def _close_tab(self, handle):
+        try:
+            self.driver.switch_to.window(handle)
+            self.driver.close()
+            self.driver.switch_to.window(self.driver.window_handles[0])
+        except Exception as e:
+            logger.debug(f"Ошибка при закрытии вкладки: {str(e)}")
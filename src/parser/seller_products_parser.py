@@ -2,122 +2,56 @@ import logging
 import time
 import os
 from datetime import datetime
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from selenium.common.exceptions import TimeoutException
-import selenium_stealth
+from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from src.parser.product_extractor import ProductExtractor
 from .excel_writer import ExcelWriter
+from .utils import open_page
+from .antibot import ChallengeDetectedError
+from .deadline import Deadline, DeadlineExceeded
+from .cancellation import current_token
+from .adaptive_delay import delay_controller
+from .stealth_driver import create_stealth_driver
 
 class OzonProductParser:
-    def __init__(self, headless=False):
-        self.driver = None
+    def __init__(self, headless=False, driver=None, on_product=None):
+        """on_product(product_data) вызывается для каждого нового товара сразу по извлечении"""
+        # Внешний драйвер (например, из пула) не закрывается парсером
+        self.driver = driver
+        self.owns_driver = driver is None
         self.headless = headless
         self.products = []
         self.unique_product_urls = set()
         self.target_count = 50
         self.max_retry_attempts = 3
+        self.on_product = on_product
+        # Вывод настраивается централизованно (src.logging_core)
         self.logger = logging.getLogger('product_parser')
-        self.logger.setLevel(logging.INFO)
-        
-        # Создаем обработчик для вывода в консоль
-        ch = logging.StreamHandler()
-        ch.setLevel(logging.INFO)
-        
-        # Форматирование сообщений
-        formatter = logging.Formatter(
-            '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-        )
-        ch.setFormatter(formatter)
-        
-        # Добавляем обработчик к логгеру
-        if not self.logger.handlers:
-            self.logger.addHandler(ch)
             
         self.extractor = ProductExtractor()
         
-    def _find_default_driver(self):
-        """Поиск пути к драйверу по умолчанию"""
-        possible_paths = [
-            r"C:\chromedriver-win64\chromedriver.exe",
-            "./chromedriver.exe",
-            "./drivers/chromedriver.exe",
-            "/usr/local/bin/chromedriver",
-            "/usr/bin/chromedriver"
-        ]
-        
-        for path in possible_paths:
-            if os.path.exists(path):
-                return path
-        return None
-        
     def init_driver(self):
         """Инициализация драйвера с stealth режимом"""
-        self.options = Options()
-        
-        # Базовые настройки Chrome
-        if self.headless:
-            self.options.add_argument("--headless")
-            
-        self.options.add_argument("--window-size=1920,1080")
-        self.options.add_argument("--start-maximized")
-        self.options.add_argument("--no-sandbox")
-        self.options.add_argument("--disable-dev-shm-usage")
-        self.options.add_argument("--disable-gpu")
-        self.options.add_argument("--disable-features=VizDisplayCompositor")
-        self.options.add_argument("--disable-infobars")
-        self.options.add_argument("--disable-extensions")
-        
-        # Дополнительные настройки для обхода детекции
-        self.options.add_argument("--disable-blink-features=AutomationControlled")
-        self.options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        self.options.add_experimental_option('useAutomationExtension', False)
-        
-        # Настройки User-Agent
-        self.options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
-        
+        if not self.owns_driver and self.driver:
+            self.logger.info("Используем переданный браузер для парсинга товаров")
+            return
+
         try:
-            # Поиск пути к драйверу
-            # driver_path = self._find_default_driver()
-            
-            # if driver_path:
-            #     self.logger.info(f"Используем драйвер по пути: {driver_path}")
-            #     service = Service(driver_path)
-            #     self.driver = webdriver.Chrome(service=service, options=self.options)
-            # else:
-            #     # Попытка использовать системный ChromeDriver
-            self.logger.info("Используем системный ChromeDriver")
-            self.driver = webdriver.Chrome(options=self.options)
-            
-            # Применение stealth настроек
-            selenium_stealth.stealth(
-                self.driver,
-                languages=["ru-RU", "ru"],
-                vendor="Google Inc.",
-                platform="Win32",
-                webgl_vendor="Intel Inc.",
-                renderer="Intel Iris OpenGL Engine",
-                fix_hairline=True,
+            self.driver = create_stealth_driver(
+                headless=self.headless,
+                extra_args=("--disable-infobars", "--disable-extensions"),
             )
-            
-            # Дополнительные скрипты для маскировки
-            self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-            self.driver.execute_cdp_cmd('Network.setUserAgentOverride', {
-                "userAgent": 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-            })
-            
             self.logger.info("Браузер инициализирован с stealth режимом для парсинга товаров")
             
         except Exception as e:
             self.logger.error(f"Ошибка инициализации драйвера: {e}")
             raise e
 
-    def load_seller_page(self, seller_url):
+    def load_seller_page(self, seller_url, deadline=None):
         """Загрузка страницы продавца"""
+        deadline = deadline or Deadline.unbounded(current_token())
         try:
             # Валидация URL
             if not seller_url:
@@ -133,10 +67,10 @@ class OzonProductParser:
                 return False
             
             self.logger.info(f"Загрузка страницы продавца: {seller_url}")
-            self.driver.get(seller_url)
+            open_page(self.driver, seller_url, deadline=deadline)
             
             # Ожидаем появления виджета товаров
-            WebDriverWait(self.driver, 20).until(
+            WebDriverWait(self.driver, deadline.clip(20)).until(
                 EC.presence_of_element_located((By.CSS_SELECTOR, '[id="contentScrollPaginator"]'))
             )
             
@@ -144,36 +78,44 @@ class OzonProductParser:
             return True
             
         except TimeoutException:
+            deadline.check(seller_url)
             self.logger.error("Время ожидания истекло при загрузке страницы продавца")
             return False
+        except (ChallengeDetectedError, DeadlineExceeded):
+            raise
         except Exception as e:
             self.logger.error(f"Ошибка загрузки страницы продавца: {str(e)}")
             return False
 
     def extract_products_from_page(self):
-        """Извлечение товаров с текущей страницы"""
+        """Извлечение товаров с текущей страницы, возвращает число новых"""
+        new_products = list(self._new_products_on_page())
+        self.products.extend(new_products)
+        return len(new_products)
+
+    def _new_products_on_page(self):
+        """Товары текущей страницы, которых еще не было среди собранных"""
         try:
             # Находим все карточки товаров
             product_cards = self.driver.find_elements(By.CSS_SELECTOR, '.tile-root')
-            new_products_count = 0
-            
-            for card in product_cards:
-                try:
-                    product_data = self.extractor.extract_product_data(card)
-                    if product_data and product_data['url'] not in self.unique_product_urls:
-                        self.products.append(product_data)
-                        self.unique_product_urls.add(product_data['url'])
-                        new_products_count += 1
-                        
-                except Exception as e:
-                    self.logger.debug(f"Ошибка извлечения данных товара: {str(e)}")
-                    continue
-                    
-            return new_products_count
-            
         except Exception as e:
             self.logger.error(f"Ошибка извлечения товаров: {str(e)}")
-            return 0
+            return
+            
+        for card in product_cards:
+            try:
+                product_data = self.extractor.extract_product_data(card)
+            except Exception as e:
+                self.logger.debug("Ошибка извлечения данных товара: %s", e)
+                continue
+            if product_data and product_data['url'] not in self.unique_product_urls:
+                self.unique_product_urls.add(product_data['url'])
+                if self.on_product:
+                    try:
+                        self.on_product(product_data)
+                    except Exception as e:
+                        self.logger.warning(f"Ошибка передачи промежуточного результата: {str(e)}")
+                yield product_data
 
     def scroll_down_and_wait(self):
         """Плавный скролл вниз и ожидание новых товаров"""
@@ -191,12 +133,14 @@ class OzonProductParser:
             
             self.logger.info("Скролл вниз выполнен, ожидаем появление новых товаров...")
             
-            # Ждем загрузки новых товаров
-            time.sleep(3)
-            
-            # Проверяем, изменилась ли высота страницы
-            new_height = self.driver.execute_script("return document.body.scrollHeight")
-            return new_height > current_height
+            # Ждем, пока подгруженные товары не увеличат высоту страницы, но не дольше 3 секунд
+            try:
+                WebDriverWait(self.driver, delay_controller.delay(3), poll_frequency=0.2).until(
+                    lambda driver: driver.execute_script("return document.body.scrollHeight") > current_height
+                )
+                return True
+            except TimeoutException:
+                return False
             
         except Exception as e:
             self.logger.error(f"Ошибка при скролле: {str(e)}")
@@ -205,12 +149,14 @@ class OzonProductParser:
     def check_for_new_products(self):
         """Проверка появления новых товаров после скролла"""
         try:
-            # Ждем несколько секунд для загрузки
-            time.sleep(2)
-            
-            # Проверяем наличие новых карточек товаров
-            product_cards = self.driver.find_elements(By.CSS_SELECTOR, '.tile-root')
-            return len(product_cards) > len(self.unique_product_urls)
+            # Ждем появления карточек сверх уже собранных, но не дольше 2 секунд
+            try:
+                WebDriverWait(self.driver, delay_controller.delay(2), poll_frequency=0.2).until(
+                    lambda driver: len(driver.find_elements(By.CSS_SELECTOR, '.tile-root')) > len(self.unique_product_urls)
+                )
+                return True
+            except TimeoutException:
+                return False
             
         except Exception as e:
             self.logger.error(f"Ошибка проверки новых товаров: {str(e)}")
@@ -268,6 +214,78 @@ class OzonProductParser:
             logger.warning(f"Ошибка при получении названия продавца: {str(e)}")
             return 'Не найдено'
 
+    def harvest_products(self, deadline=None):
+        """Сбор карточек товаров с уже открытой страницы продавца в self.products.
+
+        По истечении deadline сбор останавливается с уже найденными товарами.
+        """
+        for product_data in self.iter_products(deadline):
+            self.products.append(product_data)
+        return len(self.products)
+
+    def iter_products(self, deadline=None):
+        """Новые товары уже открытой страницы продавца по мере прокрутки.
+
+        Товары не накапливаются в self.products, запоминаются только их ссылки
+        для отсева повторов. По истечении deadline выдача прекращается.
+        """
+        deadline = deadline or Deadline.unbounded(current_token())
+        # Первоначальное извлечение товаров
+        yield from self._new_products_on_page()
+        self.logger.info(f"Спарсили {len(self.unique_product_urls)}/{self.target_count} товаров")
+        
+        retry_count = 0
+        
+        # Основной цикл парсинга
+        while len(self.unique_product_urls) < self.target_count and retry_count < self.max_retry_attempts:
+            deadline.check_cancelled()
+            if deadline.expired():
+                self.logger.warning(f"Время на сбор товаров истекло, собрано {len(self.unique_product_urls)}")
+                break
+            self.logger.info("Скролим вниз, ждем появление новых товаров...")
+            
+            # Скролл и ожидание
+            scroll_success = self.scroll_down_and_wait()
+            
+            if scroll_success:
+                # Извлекаем новые товары
+                new_products = 0
+                for product_data in self._new_products_on_page():
+                    new_products += 1
+                    yield product_data
+                
+                if new_products > 0:
+                    self.logger.info(f"Новые товары появились! Спарсили {len(self.unique_product_urls)}/{self.target_count} товаров")
+                    retry_count = 0  # Сбрасываем счетчик попыток
+                else:
+                    retry_count += 1
+                    self.logger.warning(f"Новые товары не найдены. Попытка {retry_count}/{self.max_retry_attempts}")
+            else:
+                retry_count += 1
+                self.logger.warning(f"Скролл не привел к изменениям. Попытка {retry_count}/{self.max_retry_attempts}")
+        
+        # Финальная обработка
+        final_count = len(self.unique_product_urls)
+        
+        if retry_count >= self.max_retry_attempts:
+            self.logger.info(f"Товары закончились. Все 3 попытки загрузки новых товаров не увенчались успехом.")
+        
+        if final_count == 0:
+            self.logger.error("Не удалось спарсить ни одного товара")
+        else:
+            self.logger.info(f"Парсинг завершен. Итого товаров: {final_count}")
+
+    def save_products(self, seller_name):
+        """Сохранение собранных товаров в Excel, возвращает путь к файлу или None"""
+        excel_writer = ExcelWriter()
+        filename = excel_writer.save_to_excel(self.products, seller_name)
+        
+        if filename:
+            self.logger.info(f"Данные сохранены в файл: {filename}")
+        else:
+            self.logger.error("Ошибка сохранения в Excel")
+        return filename
+
     def parse_products(self, seller_url):
         """Основной метод парсинга товаров"""
         try:
@@ -284,65 +302,23 @@ class OzonProductParser:
                 return False
             
             # Получаем название магазина
-            seller_name = self.get_seller_name()
+            seller_name = self._get_seller_name()
             self.logger.info(f"Парсим товары магазина: {seller_name}")
             
-            # Первоначальное извлечение товаров
-            initial_count = self.extract_products_from_page()
-            self.logger.info(f"Спарсили {len(self.products)}/{self.target_count} товаров")
-            
-            retry_count = 0
-            
-            # Основной цикл парсинга
-            while len(self.products) < self.target_count and retry_count < self.max_retry_attempts:
-                self.logger.info("Скролим вниз, ждем появление новых товаров...")
-                
-                # Скролл и ожидание
-                scroll_success = self.scroll_down_and_wait()
-                
-                if scroll_success:
-                    # Извлекаем новые товары
-                    new_products = self.extract_products_from_page()
-                    
-                    if new_products > 0:
-                        self.logger.info(f"Новые товары появились! Спарсили {len(self.products)}/{self.target_count} товаров")
-                        retry_count = 0  # Сбрасываем счетчик попыток
-                    else:
-                        retry_count += 1
-                        self.logger.warning(f"Новые товары не найдены. Попытка {retry_count}/{self.max_retry_attempts}")
-                else:
-                    retry_count += 1
-                    self.logger.warning(f"Скролл не привел к изменениям. Попытка {retry_count}/{self.max_retry_attempts}")
-            
-            # Финальная обработка
-            final_count = len(self.products)
-            
-            if retry_count >= self.max_retry_attempts:
-                self.logger.info(f"Товары закончились. Все 3 попытки загрузки новых товаров не увенчались успехом.")
-            
-            if final_count == 0:
-                self.logger.error("Не удалось спарсить ни одного товара")
+            if self.harvest_products() == 0:
                 return False
             
-            self.logger.info(f"Парсинг завершен. Итого товаров: {final_count}")
-            
-            # Сохраняем в Excel
-            excel_writer = ExcelWriter()
-            filename = excel_writer.save_to_excel(self.products, seller_name)
-            
+            filename = self.save_products(seller_name)
             if filename:
-                self.logger.info(f"Данные сохранены в файл: {filename}")
                 return True, filename, seller_name
-            else:
-                self.logger.error("Ошибка сохранения в Excel")
-                return False
+            return False
                 
         except Exception as e:
             self.logger.error(f"Критическая ошибка парсинга товаров: {str(e)}")
             return False
             
         finally:
-            if self.driver:
+            if self.driver and self.owns_driver:
                 self.driver.quit()
                 self.logger.info("Браузер закрыт")
 
@@ -353,7 +329,7 @@ class OzonProductParser:
     def close(self):
         """Закрытие драйвера"""
         try:
-            if hasattr(self, 'driver') and self.driver:
+            if hasattr(self, 'driver') and self.driver and self.owns_driver:
                 self.driver.quit()
                 logger.info("Драйвер  успешно закрыт")
         except Exception as e:
@@ -0,0 +1,69 @@
+# parser/stealth_driver.py
+from selenium.webdriver.chrome.options import Options
+import selenium_stealth
+
+from .driver_resolver import create_chrome_driver
+from .proxy_pool import assign_proxy, bind_proxy, release_proxy
+
+USER_AGENT = (
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
+    'AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+)
+
+
+def build_chrome_options(headless=True, extra_args=()):
+    """Базовые опции Chrome с настройками для обхода детекции"""
+    options = Options()
+
+    if headless:
+        options.add_argument("--headless")
+
+    options.add_argument("--window-size=1920,1080")
+    options.add_argument("--start-maximized")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--disable-features=VizDisplayCompositor")
+    for arg in extra_args:
+        options.add_argument(arg)
+
+    options.add_argument("--disable-blink-features=AutomationControlled")
+    options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    options.add_experimental_option('useAutomationExtension', False)
+
+    options.add_argument(f"--user-agent={USER_AGENT}")
+    return options
+
+
+def apply_stealth(driver):
+    """Применение stealth настроек и подмена User-Agent через CDP"""
+    selenium_stealth.stealth(
+        driver,
+        languages=["ru-RU", "ru"],
+        vendor="Google Inc.",
+        platform="Win32",
+        webgl_vendor="Intel Inc.",
+        renderer="Intel Iris OpenGL Engine",
+        fix_hairline=True,
+    )
+
+    driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+    driver.execute_cdp_cmd('Network.setUserAgentOverride', {"userAgent": USER_AGENT})
+
+
+def create_stealth_driver(headless=True, extra_args=()):
+    """Новый Chrome в stealth режиме, через прокси из пула, если он настроен"""
+    options = build_chrome_options(headless, extra_args)
+    proxy = assign_proxy(options)
+    try:
+        driver = create_chrome_driver(options)
+    except Exception:
+        release_proxy(proxy)
+        raise
+    bind_proxy(driver, proxy)
+    try:
+        apply_stealth(driver)
+    except Exception:
+        driver.quit()
+        raise
+    return driver
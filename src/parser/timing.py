@@ -0,0 +1,71 @@
+# parser/timing.py
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class TimingReport:
+    """Сводка длительностей операций парсера за время жизни процесса"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._gauges = {}
+
+    @contextmanager
+    def measure(self, name):
+        """Замер длительности блока кода под именем name"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def record(self, name, seconds):
+        with self._lock:
+            stat = self._stats.get(name)
+            if stat is None:
+                self._stats[name] = {'count': 1, 'total': seconds, 'min': seconds, 'max': seconds}
+            else:
+                stat['count'] += 1
+                stat['total'] += seconds
+                stat['min'] = min(stat['min'], seconds)
+                stat['max'] = max(stat['max'], seconds)
+
+    def set_gauge(self, name, value):
+        """Текущее значение настраиваемого параметра (задержки, лимиты и т.п.)"""
+        with self._lock:
+            self._gauges[name] = value
+
+    def snapshot(self):
+        with self._lock:
+            stats = {name: dict(stat, avg=stat['total'] / stat['count']) for name, stat in self._stats.items()}
+            return {'timings': stats, 'gauges': dict(self._gauges)}
+
+    def format_report(self):
+        snapshot = self.snapshot()
+        lines = ["Отчет по времени операций:"]
+        for name, stat in sorted(snapshot['timings'].items()):
+            lines.append(
+                f"  {name}: n={stat['count']} avg={stat['avg']:.3f}с "
+                f"min={stat['min']:.3f}с max={stat['max']:.3f}с total={stat['total']:.1f}с"
+            )
+        if snapshot['gauges']:
+            lines.append("Текущие параметры:")
+            for name, value in sorted(snapshot['gauges'].items()):
+                lines.append(f"  {name}: {value}")
+        return "\n".join(lines)
+
+    def log_report(self):
+        logger.info(self.format_report())
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self._gauges.clear()
+
+
+timing_report = TimingReport()
@@ -0,0 +1,119 @@
+# parser/tooltip_reader.py
+import logging
+
+from .adaptive_delay import delay_controller
+
+logger = logging.getLogger(__name__)
+
+# Скрипт выполняется через execute_async_script: наводит курсор и кликает по кнопке
+# событиями DOM, ждет вставки тултипа в .vue-portal-target через MutationObserver
+# и возвращает уже разобранные параграфы одним ответом.
+TOOLTIP_SCRIPT = r"""
+const button = arguments[0];
+const timeoutMs = arguments[1];
+const done = arguments[arguments.length - 1];
+
+const PORTAL_SELECTOR = 'body .vue-portal-target';
+const COMPANY_RE = /(ИП|ООО|АО|ЗАО|ПАО|ОАО|Ltd|LLC|Inc)/i;
+
+const isVisible = (el) => !!(el.offsetWidth || el.offsetHeight || el.getClientRects().length);
+
+const looksLikeSellerInfo = (text) => {
+    if (!text || text.trim().length < 5) return false;
+    const hasLongNumber = text.split(/\s+/).some((word) => word.replace(/\D/g, '').length >= 10);
+    return hasLongNumber || COMPANY_RE.test(text);
+};
+
+const extract = (portal) => {
+    const text = (portal.innerText || '').trim();
+    let paragraphs = Array.from(portal.querySelectorAll('p'))
+        .map((p) => (p.innerText || '').trim())
+        .filter(Boolean);
+    if (!paragraphs.length) {
+        paragraphs = text.split('\n').map((line) => line.trim()).filter(Boolean);
+    }
+    return {text: text, paragraphs: paragraphs, html: portal.outerHTML.slice(0, 3000)};
+};
+
+const portalsBefore = new Set(document.querySelectorAll(PORTAL_SELECTOR));
+
+const scan = () => {
+    const portals = Array.from(document.querySelectorAll(PORTAL_SELECTOR)).filter(isVisible);
+    // Сначала новые порталы, затем существующие (тултип может встроиться в старый)
+    portals.sort((a, b) => portalsBefore.has(a) - portalsBefore.has(b));
+    for (const portal of portals) {
+        const text = (portal.innerText || '').trim();
+        if (looksLikeSellerInfo(text)) return extract(portal);
+    }
+    return null;
+};
+
+let finished = false;
+let timer = null;
+const observer = new MutationObserver(() => {
+    const found = scan();
+    if (found) finish(found);
+});
+
+function finish(result) {
+    if (finished) return;
+    finished = true;
+    observer.disconnect();
+    clearTimeout(timer);
+    done(result);
+}
+
+observer.observe(document.body, {childList: true, subtree: true, characterData: true});
+timer = setTimeout(() => finish(scan()), timeoutMs);
+
+try {
+    button.scrollIntoView({block: 'center'});
+    const rect = button.getBoundingClientRect();
+    const init = {
+        bubbles: true,
+        cancelable: true,
+        view: window,
+        clientX: rect.left + rect.width / 2,
+        clientY: rect.top + rect.height / 2
+    };
+    const events = [
+        'pointerover', 'pointerenter', 'mouseover', 'mouseenter',
+        'pointermove', 'mousemove', 'pointerdown', 'mousedown',
+        'pointerup', 'mouseup', 'click'
+    ];
+    for (const type of events) {
+        const EventType = type.startsWith('pointer') && window.PointerEvent ? PointerEvent : MouseEvent;
+        button.dispatchEvent(new EventType(type, init));
+    }
+} catch (e) {
+    finish(null);
+}
+"""
+
+
+class TooltipReader:
+    """Получение тултипа продавца одним асинхронным скриптом вместо опроса порталов"""
+
+    def __init__(self, timeout=5):
+        self.timeout = timeout
+
+    def read(self, driver, button, timeout=None):
+        """Клик по кнопке и ожидание тултипа в странице.
+
+        Возвращает словарь {'text', 'paragraphs', 'html'} или None, если тултип не появился.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            result = driver.execute_async_script(TOOLTIP_SCRIPT, button, int(timeout * 1000))
+        except Exception as e:
+            logger.warning(f"Ошибка выполнения скрипта тултипа: {str(e)}")
+            return None
+
+        if not result or not result.get('paragraphs'):
+            logger.info(f"Тултип не появился за {timeout}с")
+            delay_controller.record_tooltip(False)
+            return None
+
+        delay_controller.record_tooltip(True)
+        logger.info(f"Тултип получен скриптом, параграфов: {len(result['paragraphs'])}")
+        return result
@@ -1,15 +1,110 @@
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.common.by import By
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 import logging
+from .rate_limiter import get_rate_limiter, key_for_url
+from .timing import timing_report
+import time
+from .adaptive_delay import delay_controller, page_type_for_url
+from .antibot import challenge_detector, ChallengeDetectedError
+from .proxy_pool import get_proxy_pool, proxy_of
+from .retry import host_breaker, classify_error
+from src.config_service import get_config
 
 logger = logging.getLogger(__name__)
 
-def wait_for_element(driver, locator, timeout=15):
+def wait_for_element(driver, locator, timeout=15, deadline=None):
+    if deadline is not None:
+        deadline.check(f"ожидание {locator}")
+        timeout = deadline.clip(timeout)
     try:
         return WebDriverWait(driver, timeout).until(
             EC.visibility_of_element_located(locator)
         )
     except TimeoutException:
         logger.error(f"Элемент не найден: {locator}")
-        raise
\ No newline at end of file
+        raise
+
+def is_session_alive(driver):
+    """Отвечает ли сессия браузера: процесс жив и есть открытая вкладка"""
+    if driver is None:
+        return False
+    try:
+        driver.execute_script("return 1")
+        return bool(driver.window_handles)
+    except Exception:
+        return False
+
+
+# Признаки того, что страница загрузилась, вместо фиксированных пауз после driver.get
+SELLER_PAGE_READY = '[id="contentScrollPaginator"]'
+PRODUCT_PAGE_READY = 'div[data-widget="webProductHeading"], div[data-widget="webCurrentSeller"]'
+CATEGORY_PAGE_READY = '.tile-root'
+
+
+def open_page(driver, url, wait_for=None, timeout=None, deadline=None):
+    """Загрузка страницы через общий ограничитель частоты запросов.
+
+    wait_for — CSS селектор элемента, появления которого нужно дождаться.
+    Если вместо страницы пришла проверка антибота, бросает ChallengeDetectedError
+    сразу, не дожидаясь таймаутов. deadline ограничивает ожидание и не дает
+    начать загрузку, когда бюджет уже исчерпан. По умолчанию timeout берется
+    из LOAD_TIMEOUT.
+    """
+    if deadline is not None:
+        deadline.check(url)
+    limiter = get_rate_limiter()
+    # У каждого прокси своя корзина токенов: частота ограничивается на выходной IP
+    proxy = proxy_of(driver)
+    key = key_for_url(url) if proxy is None else f"{key_for_url(url)}@{proxy.key}"
+    proxy_pool = get_proxy_pool() if proxy is not None else None
+    # После серии сетевых ошибок хост (выход через прокси) получает паузу
+    host_breaker.wait(key, deadline)
+    limiter.acquire(key, deadline)
+
+    page_type = page_type_for_url(url)
+    started = time.perf_counter()
+    with timing_report.measure('page_load'):
+        try:
+            driver.get(url)
+        except Exception as e:
+            host_breaker.record_failure(key, classify_error(e))
+            if proxy_pool:
+                proxy_pool.record_failure(proxy)
+            raise
+
+    try:
+        challenge_detector.check(driver, url)
+        if wait_for:
+            if timeout is None:
+                timeout = get_config().typed("LOAD_TIMEOUT")
+            wait_timeout = delay_controller.load_timeout(page_type, timeout)
+            if deadline is not None:
+                wait_timeout = deadline.clip(wait_timeout)
+            try:
+                WebDriverWait(driver, wait_timeout).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, wait_for))
+                )
+            except TimeoutException:
+                # Проверка могла отрисоваться скриптом уже после загрузки
+                challenge_detector.check(driver, url)
+                if deadline is not None:
+                    deadline.check(url)
+                logger.warning(f"Не дождались элемента {wait_for} на странице {url}")
+                if proxy_pool:
+                    proxy_pool.record_failure(proxy)
+                return
+    except ChallengeDetectedError:
+        limiter.penalize(key)
+        delay_controller.record_challenge()
+        if proxy_pool:
+            proxy_pool.record_challenge(proxy)
+        raise
+
+    elapsed = time.perf_counter() - started
+    host_breaker.record_success(key)
+    limiter.reward(key)
+    delay_controller.record_load(page_type, elapsed)
+    if proxy_pool:
+        proxy_pool.record_success(proxy, elapsed)
@@ -74,9 +74,9 @@ def load_config(config_path: str = None) -> dict:
 
 def get_config_value(key: str, default: str = "") -> str:
     """
-    Получает значение конфигурации по ключу.
+    Получает значение конфигурации по ключу (файл перечитывается только после изменения).
     """
-    config = load_config()
-    value = config.get(key, default)
+    from src.config_service import get_config
+    value = get_config().get(key, default)
     logger.debug(f"Получено значение для ключа {key}: {value}")
     return value
\ No newline at end of file
@@ -0,0 +1,88 @@
+import threading
+import time
+
+import pytest
+
+from src.parser.adaptive_delay import AdaptiveDelayController
+from src.parser.cancellation import CancellationToken, JobCancelled, use_token
+from src.parser.deadline import Deadline, DeadlineExceeded
+
+
+def test_job_limits_are_independent():
+    controller = AdaptiveDelayController(max_concurrency=5)
+    first = controller.job_slots(4)
+    second = controller.job_slots(1)
+    # Изменение предела одной задачи не трогает другую
+    second.configure(2)
+    assert first.limit == 4
+    assert second.limit == 2
+    first.close()
+    second.close()
+
+
+def test_challenge_slows_down_every_job():
+    controller = AdaptiveDelayController(max_concurrency=5)
+    with controller.job_slots(4) as first, controller.job_slots(2) as second:
+        controller.record_challenge()
+        assert first.limit == 2
+        assert second.limit == 2
+        controller.record_challenge()
+        assert first.limit == 1
+        assert second.limit == 1
+
+
+def test_worker_slot_respects_job_limit():
+    controller = AdaptiveDelayController(max_concurrency=5)
+    slots = controller.job_slots(2)
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def worker():
+        with slots.worker_slot():
+            with lock:
+                active.append(1)
+                peak.append(len(active))
+            time.sleep(0.05)
+            with lock:
+                active.pop()
+
+    threads = [threading.Thread(target=worker) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    slots.close()
+    assert max(peak) == 2
+
+
+def test_waiting_for_a_slot_is_cancellable():
+    controller = AdaptiveDelayController(max_concurrency=5)
+    slots = controller.job_slots(1)
+    slots.acquire()
+    token = CancellationToken()
+    threading.Timer(0.2, token.cancel).start()
+    with use_token(token), pytest.raises(JobCancelled):
+        slots.acquire()
+    slots.release()
+    slots.close()
+
+
+def test_waiting_for_a_slot_respects_deadline():
+    controller = AdaptiveDelayController(max_concurrency=5)
+    slots = controller.job_slots(1)
+    with slots.worker_slot():
+        with pytest.raises(DeadlineExceeded):
+            slots.acquire(Deadline(0.2))
+    slots.close()
+
+
+def test_sleep_is_cancellable():
+    controller = AdaptiveDelayController()
+    controller.factor = 4.0
+    token = CancellationToken()
+    threading.Timer(0.2, token.cancel).start()
+    started = time.monotonic()
+    with use_token(token), pytest.raises(JobCancelled):
+        controller.sleep(5)
+    assert time.monotonic() - started < 2
@@ -0,0 +1,80 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("selenium")
+
+from src.parser import browser_pool as browser_pool_module
+from src.parser import proxy_pool as proxy_pool_module
+from src.parser.browser_pool import BrowserPool
+from src.parser.proxy_pool import ProxyPool, assign_proxy, bind_proxy
+
+
+class FakeOptions:
+    def add_argument(self, argument):
+        pass
+
+
+class FakeDriver:
+    window_handles = ['main']
+
+    def __init__(self):
+        self.quit_called = False
+
+    def execute_script(self, script):
+        return 1
+
+    def quit(self):
+        self.quit_called = True
+
+
+@pytest.fixture
+def proxies(monkeypatch):
+    pool = ProxyPool(["http://127.0.0.1:8080"], max_sessions=1)
+    monkeypatch.setattr(proxy_pool_module, "get_proxy_pool", lambda: pool)
+    monkeypatch.setattr(browser_pool_module, "WARM_UP_PROXY_WAIT", 0.2)
+    return pool
+
+
+def proxied_driver(created):
+    def factory():
+        proxy = assign_proxy(FakeOptions())
+        driver = bind_proxy(FakeDriver(), proxy)
+        created.append(driver)
+        return driver
+    return factory
+
+
+def test_warm_up_without_free_proxy_does_not_block_shutdown(proxies):
+    created = []
+    pool = BrowserPool(max_size=2, min_idle=2, check_interval=0.1, factory=proxied_driver(created))
+    pool.start()
+    time.sleep(0.5)
+    # Единственный прокси занят прогретым браузером, второй запуск откладывается
+    assert pool.stats()['idle'] == 1
+    started = time.monotonic()
+    pool.shutdown()
+    assert time.monotonic() - started < 5
+    assert all(driver.quit_called for driver in created)
+    assert proxies.proxies[0].in_use == 0
+    assert not any(thread.is_alive() for thread in pool._threads)
+
+
+def test_browser_started_after_shutdown_is_quit():
+    release = threading.Event()
+    created = []
+
+    def slow_factory():
+        release.wait(5)
+        driver = FakeDriver()
+        created.append(driver)
+        return driver
+
+    pool = BrowserPool(max_size=1, min_idle=1, check_interval=0.1, factory=slow_factory)
+    pool.start()
+    time.sleep(0.1)
+    threading.Timer(0.2, release.set).start()
+    pool.shutdown()
+    assert created and all(driver.quit_called for driver in created)
+    assert pool.stats() == {'total': 0, 'idle': 0, 'leased': 0}
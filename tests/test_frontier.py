@@ -0,0 +1,124 @@
+import pytest
+
+from src.parser.frontier import CrawlFrontier, DONE, FAILED
+
+QUEUE = 'inn-sellers'
+
+
+def seller(n):
+    return f"https://www.ozon.ru/seller/shop-{n}/"
+
+
+def result(url, inn='7701234567'):
+    return {'seller_url': url, 'seller_name': 'Магазин', 'company_name': 'ООО Ромашка', 'inn': inn}
+
+
+@pytest.fixture
+def frontier(tmp_path):
+    frontier = CrawlFrontier(str(tmp_path / 'frontier.sqlite3'), fresh_hours=24, retry_minutes=10)
+    yield frontier
+    frontier.close()
+
+
+def state_of(frontier, url):
+    key, _ = frontier.canonicalize(url)
+    return frontier._db.execute("SELECT state FROM frontier WHERE key=?", (key,)).fetchone()[0]
+
+
+def test_overlapping_batches_share_rows(frontier):
+    first = frontier.plan([seller(1), seller(2)], QUEUE)
+    leased = frontier.lease(first)
+    second = frontier.plan([seller(1), seller(2), seller(3)], QUEUE)
+
+    # Вторая задача не забирает ссылки первой: та по-прежнему видит и парсит их
+    assert frontier.unfinished(first) == [seller(1), seller(2)]
+    taken = list(frontier.iter_leases(first))
+    assert [leased] + taken == [seller(1), seller(2)]
+
+    # Вторая задача получает свою новую ссылку, а общие ждет, пока первая их допарсит
+    assert frontier.lease(second) == seller(3)
+    assert frontier._leased_elsewhere(second)
+    for url in (leased, *taken):
+        frontier.record(first, result(url))
+    frontier.record(second, result(seller(3)))
+
+    assert frontier.lease(second) is None
+    assert [r['seller_url'] for r in frontier.shared_results(second)] == [seller(1), seller(2)]
+    assert frontier.unfinished(first) == []
+    assert frontier.unfinished(second) == []
+
+
+def test_queued_row_is_taken_by_whichever_batch_leases_first(frontier):
+    first = frontier.plan([seller(1)], QUEUE)
+    second = frontier.plan([seller(1)], QUEUE)
+    assert frontier.lease(second) == seller(1)
+    assert frontier.lease(first) is None
+    frontier.record(second, result(seller(1)))
+    assert [r['seller_url'] for r in frontier.shared_results(first)] == [seller(1)]
+
+
+def test_failed_row_is_deferred_not_cached(frontier):
+    batch = frontier.plan([seller(1)], QUEUE)
+    frontier.lease(batch)
+    frontier.record(batch, result(seller(1), inn='Ошибка'))
+    frontier.finish(batch)
+    assert state_of(frontier, seller(1)) == FAILED
+
+    again = frontier.plan([seller(1)], QUEUE)
+    assert again.cached == []
+    assert again.deferred == [seller(1)]
+    assert again.to_crawl == 0
+
+    refreshed = frontier.plan([seller(1)], QUEUE, refresh=True)
+    assert frontier.lease(refreshed) == seller(1)
+
+
+def test_done_row_is_cached(frontier):
+    batch = frontier.plan([seller(1)], QUEUE)
+    frontier.lease(batch)
+    frontier.record(batch, result(seller(1)))
+    frontier.finish(batch)
+    assert state_of(frontier, seller(1)) == DONE
+    again = frontier.plan([seller(1), seller(1)], QUEUE)
+    assert [r['inn'] for r in again.cached] == ['7701234567']
+    assert again.duplicates == 1
+
+
+def test_timeout_requeues_without_penalty(frontier):
+    batch = frontier.plan([seller(1)], QUEUE)
+    frontier.lease(batch)
+    frontier.record(batch, result(seller(1), inn='Таймаут'))
+    assert frontier.unfinished(batch) == []
+    assert state_of(frontier, seller(1)) == 'queued'
+    again = frontier.plan([seller(1)], QUEUE)
+    assert frontier.lease(again) == seller(1)
+
+
+def test_retry_delay_is_capped(frontier):
+    assert frontier.retry_delay(1) == 600
+    assert frontier.retry_delay(2) == 1200
+    assert frontier.retry_delay(1000) == 24 * 3600
+
+
+def test_finish_returns_leases_to_queue(frontier):
+    first = frontier.plan([seller(1)], QUEUE)
+    second = frontier.plan([seller(1)], QUEUE)
+    frontier.lease(first)
+    frontier.finish(first)
+    assert frontier.lease(second) == seller(1)
+
+
+def test_processes_sharing_database(tmp_path):
+    path = str(tmp_path / 'frontier.sqlite3')
+    one = CrawlFrontier(path)
+    two = CrawlFrontier(path)
+    try:
+        first = one.plan([seller(1)], QUEUE)
+        # Вторая копия не знает о строке первой, но вставка не падает на первичном ключе
+        second = two.plan([seller(1), seller(2)], QUEUE)
+        assert one.lease(first) == seller(1)
+        assert two.lease(second) == seller(2)
+        assert two.lease(second) is None
+    finally:
+        one.close()
+        two.close()
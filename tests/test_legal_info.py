@@ -0,0 +1,36 @@
+from src.parser.legal_info import classifier
+
+
+def test_inn_keeps_the_whole_line():
+    details = classifier.classify_lines(['ООО «Ромашка»', '7707083893', 'ИНН 7707083893'])
+    assert details['inn'] == 'ИНН 7707083893'
+    assert details['company_name'] == 'ООО «Ромашка»'
+
+
+def test_last_line_of_a_kind_wins():
+    details = classifier.classify_lines(['ИП Иванов', 'ООО Ромашка', 'Москва, ул. Ленина', 'г. Тверь'])
+    assert details['company_name'] == 'ООО Ромашка'
+    assert details['address'] == 'г. Тверь'
+
+
+def test_first_line_of_a_kind_wins_on_request():
+    details = classifier.classify_lines(['ИП Иванов', 'ООО Ромашка'], first=True)
+    assert details['company_name'] == 'ИП Иванов'
+
+
+def test_other_lines_are_collected():
+    details = classifier.classify_lines(['Продавец', '', 'ООО Ромашка'])
+    assert details['other_info'] == ['Продавец']
+
+
+def test_seller_details_keywords():
+    assert classifier.looks_like_seller_info('Режим работы: 9-18', details=True)
+    assert classifier.looks_like_seller_info('Москва, ул. Ленина', details=True)
+    assert not classifier.looks_like_seller_info('Режим работы: 9-18')
+    assert not classifier.looks_like_seller_info('ООО', details=False)
+    assert classifier.looks_like_seller_info('ООО', details=True)
+
+
+def test_long_number_with_separators():
+    assert classifier.looks_like_seller_info('ОГРН 1027-7000-1234-5')
+    assert not classifier.looks_like_seller_info('тел. 8 800 555 35 35')
@@ -0,0 +1,45 @@
+import threading
+
+import pytest
+
+from src.parser import proxy_pool
+from src.parser.cancellation import CancellationToken, JobCancelled, use_token
+from src.parser.proxy_pool import ProxyPool, ProxyUnavailableError, assign_proxy
+
+
+class FakeOptions:
+    def __init__(self):
+        self.arguments = []
+
+    def add_argument(self, argument):
+        self.arguments.append(argument)
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    pool = ProxyPool(["http://127.0.0.1:8080"], max_sessions=1)
+    monkeypatch.setattr(proxy_pool, "get_proxy_pool", lambda: pool)
+    return pool
+
+
+def test_busy_pool_never_falls_back_to_direct_connection(pool):
+    pool.acquire()
+    with pytest.raises(ProxyUnavailableError):
+        assign_proxy(FakeOptions(), timeout=0.2)
+
+
+def test_waits_until_proxy_is_released(pool):
+    busy = pool.acquire()
+    threading.Timer(0.3, pool.release, args=(busy,)).start()
+    options = FakeOptions()
+    proxy = assign_proxy(options)
+    assert proxy is busy
+    assert options.arguments == ["--proxy-server=http://127.0.0.1:8080"]
+
+
+def test_wait_is_cancellable(pool):
+    pool.acquire()
+    token = CancellationToken()
+    threading.Timer(0.3, token.cancel).start()
+    with use_token(token), pytest.raises(JobCancelled):
+        assign_proxy(FakeOptions())
@@ -0,0 +1,28 @@
+import threading
+import time
+
+import pytest
+
+from src.parser.cancellation import CancellationToken, JobCancelled, use_token
+from src.parser.deadline import Deadline, DeadlineExceeded
+from src.parser.rate_limiter import RateLimiter
+
+
+def test_wait_is_cancellable():
+    limiter = RateLimiter(rate=0.1, burst=1, jitter=0)
+    limiter.acquire("ozon.ru")
+    token = CancellationToken()
+    threading.Timer(0.2, token.cancel).start()
+    started = time.monotonic()
+    with use_token(token), pytest.raises(JobCancelled):
+        limiter.acquire("ozon.ru")
+    assert time.monotonic() - started < 2
+
+
+def test_wait_respects_deadline():
+    limiter = RateLimiter(rate=0.1, burst=1, jitter=0)
+    limiter.acquire("ozon.ru")
+    started = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        limiter.acquire("ozon.ru", Deadline(0.2))
+    assert time.monotonic() - started < 2
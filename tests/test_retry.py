@@ -0,0 +1,31 @@
+import pytest
+
+pytest.importorskip("selenium")
+
+from urllib3.exceptions import MaxRetryError
+
+from src.parser.retry import DRIVER_DEAD, FATAL, RetryPolicy, TransientError, classify_error
+
+
+def test_connection_errors_mean_dead_driver():
+    assert classify_error(ConnectionRefusedError("chromedriver")) == DRIVER_DEAD
+    assert classify_error(MaxRetryError("localhost:9515")) == DRIVER_DEAD
+
+
+def test_other_os_errors_are_not_driver_failures():
+    assert classify_error(FileNotFoundError("result.xlsx")) == FATAL
+    assert classify_error(TimeoutError("socket")) == FATAL
+
+
+def test_retries_before_success_count_as_wasted():
+    policy = RetryPolicy('test', max_attempts=3, base_delay=0, max_delay=0)
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise TransientError("еще нет")
+        return True
+
+    assert policy.call(flaky)
+    assert policy.stats()['wasted_attempts'] == 2
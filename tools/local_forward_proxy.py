@@ -0,0 +1,120 @@
+"""Локальный HTTP прокси для проверки пула прокси без настоящих прокси-серверов.
+
+Поддерживает CONNECT (HTTPS) и обычные HTTP запросы с абсолютным URL. Можно
+запустить несколько экземпляров на разных портах и перечислить их в config.txt:
+
+    PROXIES=127.0.0.1:8901,127.0.0.1:8902
+
+--delay добавляет задержку к каждому соединению, --fail-rate обрывает часть
+соединений, чтобы увидеть, как пул снижает оценку и выводит прокси из оборота.
+
+Запуск из корня проекта:
+    python tools/local_forward_proxy.py --port 8901 [--delay 0.5] [--fail-rate 0.2]
+"""
+import argparse
+import asyncio
+import logging
+import random
+from urllib.parse import urlsplit
+
+logger = logging.getLogger("local_forward_proxy")
+
+
+class ForwardProxy:
+    def __init__(self, delay=0.0, fail_rate=0.0):
+        self.delay = delay
+        self.fail_rate = fail_rate
+        self.connections = 0
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        try:
+            request_line = await reader.readline()
+            if not request_line:
+                return
+            method, target, version = request_line.decode("latin-1").split()
+            headers = []
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                headers.append(line)
+
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            if self.fail_rate and random.random() < self.fail_rate:
+                logger.info(f"Обрываем соединение: {method} {target}")
+                return
+
+            if method.upper() == "CONNECT":
+                host, _, port = target.partition(":")
+                upstream_reader, upstream_writer = await asyncio.open_connection(host, int(port or 443))
+                writer.write(b"HTTP/1.1 200 Connection Established\r\n\r\n")
+                await writer.drain()
+            else:
+                parts = urlsplit(target)
+                upstream_reader, upstream_writer = await asyncio.open_connection(
+                    parts.hostname, parts.port or 80
+                )
+                path = parts.path or "/"
+                if parts.query:
+                    path += "?" + parts.query
+                upstream_writer.write(f"{method} {path} {version}\r\n".encode("latin-1"))
+                for header in headers:
+                    if not header.lower().startswith(b"proxy-"):
+                        upstream_writer.write(header)
+                upstream_writer.write(b"\r\n")
+                await upstream_writer.drain()
+
+            logger.info(f"{method} {target}")
+            await asyncio.gather(
+                self._pipe(reader, upstream_writer),
+                self._pipe(upstream_reader, writer),
+            )
+        except Exception as e:
+            logger.debug(f"Ошибка соединения: {e}")
+        finally:
+            writer.close()
+
+    async def _pipe(self, reader, writer):
+        try:
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    break
+                writer.write(data)
+                await writer.drain()
+        except Exception:
+            pass
+        finally:
+            try:
+                writer.close()
+            except Exception:
+                pass
+
+
+async def serve(host, port, delay, fail_rate):
+    proxy = ForwardProxy(delay=delay, fail_rate=fail_rate)
+    server = await asyncio.start_server(proxy.handle, host, port)
+    logger.info(f"Прокси слушает {host}:{port} (задержка {delay}с, обрывы {fail_rate:.0%})")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8901)
+    parser.add_argument("--delay", type=float, default=0.0, help="задержка на соединение, с")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="доля обрываемых соединений")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(message)s")
+    try:
+        asyncio.run(serve(args.host, args.port, args.delay, args.fail_rate))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()